@@ -0,0 +1,165 @@
+"""
+Debounced per-chat batching of forwarded messages.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import structlog
+from aiogram.types import Message
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tenants import TenantConfig, current_tenant, use_tenant
+from app.database.models import User as DBUser
+
+log = structlog.get_logger("ForwardBatcher")
+
+FlushCallback = Callable[[list[Message], DBUser], Awaitable[None]]
+# Личные чаты одного пользователя с разными ботами процесса имеют один chat_id
+ChatKey = tuple[int, int]  # (bot_id, chat_id)
+
+
+def _chat_key(message: Message) -> ChatKey:
+    return message.bot.id if message.bot else 0, message.chat.id
+
+
+@dataclass(slots=True)
+class _Burst:
+    admitted: asyncio.Future[bool]  # Решение лимита по первому пересланному
+    last_seen: float
+    size: int = 1
+
+
+@dataclass(slots=True)
+class _PendingBatch:
+    db_user: DBUser
+    tenant: Optional[TenantConfig]
+    messages: list[Message] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class ForwardBatcher:
+    """
+    Collects forwarded messages per chat until the chat is quiet for ``window`` seconds
+    or ``max_size`` messages are collected, then hands the batch to ``on_flush``.
+
+    AICODE-NOTE: Пачка живёт только в памяти процесса: при рестарте недособранная
+    пачка отправляется сразу (close), а не теряется.
+    """
+
+    def __init__(
+        self,
+        on_flush: FlushCallback,
+        window: float | None = None,
+        max_size: int | None = None,
+    ) -> None:
+        self.on_flush = on_flush
+        self._window = window
+        self._max_size = max_size
+        self._pending: dict[ChatKey, _PendingBatch] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        # (bot_id, chat_id) -> открытая пачка для лимита, в порядке давности
+        self._bursts: OrderedDict[ChatKey, _Burst] = OrderedDict()
+
+    @property
+    def window(self) -> float:
+        return self._window if self._window is not None else settings.FORWARD_BATCH_WINDOW
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size or settings.FORWARD_BATCH_MAX_SIZE
+
+    def join_burst(self, message: Message) -> tuple[asyncio.Future[bool], bool]:
+        """
+        Account a forward before it reaches the handler. Returns (admitted, opened).
+
+        With ``opened`` the message starts a burst: the caller charges it against the rate
+        limit and must resolve ``admitted`` with the outcome. Otherwise the message joins
+        the chat's burst; if ``admitted`` resolves True it passes uncharged, if False the
+        burst is gone and the caller should call join_burst again.
+
+        AICODE-NOTE: Вызывается из ThrottlingMiddleware синхронно: апдейты одной пачки
+        обрабатываются конкурентно и проходят middleware раньше, чем первый из них
+        попадёт в add(), поэтому состояние пачки для лимита не годится. Бесплатно
+        проходят только max_size сообщений пачки, пропущенной лимитом, — ровно столько,
+        сколько уходит в одно саммари; следующее пересланное снова списывает лимит.
+        """
+        now = time.monotonic()
+        while self._bursts:
+            oldest_chat, oldest = next(iter(self._bursts.items()))
+            if now - oldest.last_seen < self.window:
+                break
+            del self._bursts[oldest_chat]
+
+        chat_key = _chat_key(message)
+        burst = self._bursts.get(chat_key)
+        if burst is not None and burst.size < self.max_size:
+            burst.size += 1
+            burst.last_seen = now
+            self._bursts.move_to_end(chat_key)
+            return burst.admitted, False
+
+        burst = _Burst(admitted=asyncio.get_running_loop().create_future(), last_seen=now)
+        self._bursts.pop(chat_key, None)
+        self._bursts[chat_key] = burst
+        burst.admitted.add_done_callback(lambda admitted: self._on_charged(chat_key, burst))
+        return burst.admitted, True
+
+    def _on_charged(self, chat_key: ChatKey, burst: _Burst) -> None:
+        # Первое сообщение отклонено лимитом — пачки нет, каждое следующее платит само
+        if not burst.admitted.result() and self._bursts.get(chat_key) is burst:
+            del self._bursts[chat_key]
+
+    def add(self, message: Message, db_user: DBUser) -> None:
+        """
+        Add a forwarded message to its chat's batch and restart the quiet-period timer.
+        """
+        chat_key = _chat_key(message)
+        batch = self._pending.get(chat_key)
+        if batch is None:
+            batch = self._pending[chat_key] = _PendingBatch(db_user=db_user, tenant=current_tenant())
+        batch.messages.append(message)
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        if len(batch.messages) >= self.max_size:
+            self._flush(chat_key)
+        else:
+            batch.timer = asyncio.get_running_loop().call_later(self.window, self._flush, chat_key)
+
+    def _flush(self, chat_key: ChatKey) -> None:
+        batch = self._pending.pop(chat_key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        # Пересланные из разных апдейтов обрабатываются конкурентно — восстанавливаем порядок
+        messages = sorted(batch.messages, key=lambda m: m.message_id)
+        metrics.observe("forward_batch_size", len(messages))
+        task = asyncio.create_task(self._run(messages, batch.db_user, batch.tenant))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, messages: list[Message], db_user: DBUser, tenant: Optional[TenantConfig]) -> None:
+        try:
+            # Пачка может уйти из close() при остановке — вне контекста апдейта
+            with use_tenant(tenant) if tenant is not None else nullcontext():
+                await self.on_flush(messages, db_user)
+        except Exception as e:
+            log.exception("Forward batch failed", chat_id=messages[0].chat.id, size=len(messages), error=str(e))
+
+    async def close(self) -> None:
+        """
+        Flush every pending batch now and wait for in-flight batches to finish.
+        """
+        for chat_key in list(self._pending):
+            self._flush(chat_key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -2,25 +2,34 @@
 Admin handlers (restricted to ADMIN_IDS).
 """
 
-import csv
-import io
+import asyncio
+import tempfile
+import time
 from datetime import datetime, timedelta
+from html import escape
 from typing import Any
 
 import structlog
 from aiogram import Router
-from aiogram.filters import Command
-from aiogram.types import BufferedInputFile, Message
-from tortoise.functions import Count, Sum
+from aiogram.filters import Command, CommandObject, Filter
+from aiogram.types import FSInputFile, Message
+from tortoise.functions import Avg, Count, Sum
 
 from app.core.config import settings
+from app.core.loop_monitor import LoopHealth, loop_monitor
+from app.core.metrics import metrics
+from app.core.overload import OverloadLevel, OverloadSignals, overload
+from app.core.parsers.guard import parser_guard
+from app.database.export import parse_export_args, write_export_parts
 from app.database.models import SummaryRequest, User
+from app.database.retention import iter_archive_pages
+from app.database.rollups import DailyTrend, all_time_requests, daily_trends, window_totals
 
 router = Router(name="admin")
 log = structlog.get_logger("AdminHandler")
 
 
-class AdminFilter:
+class AdminFilter(Filter):
     """
     Filter that allows only users from ADMIN_IDS.
     """
@@ -28,7 +37,7 @@ class AdminFilter:
     async def __call__(self, message: Message) -> bool:
         if not message.from_user:
             return False
-        return message.from_user.id in settings.admin_ids_list
+        return message.from_user.id in settings.admin_ids_set
 
 
 admin_filter = AdminFilter()
@@ -37,24 +46,37 @@ admin_filter = AdminFilter()
 async def _get_stats(since: datetime) -> dict[str, Any]:
     """
     Collect statistics from database since given datetime.
-    """
-    new_users = await User.filter(created_at__gte=since).count()
 
-    requests = await SummaryRequest.filter(created_at__gte=since).all()
-    total_requests = len(requests)
-    successful_requests = len([r for r in requests if r.status == "success"])
-    failed_requests = len([r for r in requests if r.status == "error"])
-    total_tokens = sum(r.tokens_used for r in requests)
+    AICODE-NOTE: Запросы читаются из почасовых роллапов — O(число бакетов)
+    независимо от размера summary_requests. Окно округляется до начала часа.
+    """
+    new_users, totals = await asyncio.gather(
+        User.filter(created_at__gte=since).count(),
+        window_totals(since),
+    )
 
     return {
         "new_users": new_users,
-        "total_requests": total_requests,
-        "successful_requests": successful_requests,
-        "failed_requests": failed_requests,
-        "total_tokens": total_tokens,
+        "total_requests": totals["requests"],
+        "successful_requests": totals["success"],
+        "failed_requests": totals["error"],
+        "total_tokens": totals["tokens_used"],
     }
 
 
+async def _total_users() -> int:
+    """
+    Number of registered users without a COUNT(*) over the whole table.
+
+    AICODE-NOTE: Пользователи не удаляются, id растёт монотонно, поэтому
+    максимальный id — это поиск по первичному ключу вместо полного скана.
+    Пропуски в последовательности (гонка двух первых апдейтов в get_or_create)
+    могут завысить число на единицы.
+    """
+    last_id = await User.all().order_by("-id").first().values_list("id", flat=True)
+    return last_id or 0
+
+
 def _format_stats_message(
     stats_24h: dict[str, Any], 
     stats_7d: dict[str, Any], 
@@ -99,93 +121,211 @@ async def cmd_stats(message: Message) -> None:
     since_24h = now - timedelta(hours=24)
     since_7d = now - timedelta(days=7)
 
-    stats_24h = await _get_stats(since_24h)
-    stats_7d = await _get_stats(since_7d)
+    # Независимые запросы выполняются конкурентно
+    stats_24h, stats_7d, total_users, total_requests = await asyncio.gather(
+        _get_stats(since_24h),
+        _get_stats(since_7d),
+        _total_users(),
+        all_time_requests(),
+    )
 
-    # Get total counts
-    total_users = await User.all().count()
-    total_requests = await SummaryRequest.all().count()
+    response = _format_stats_message(stats_24h, stats_7d, total_users, total_requests)
+    load = _format_overload_status(overload.level, overload.signals(), time.monotonic() - overload.level_since)
+    await message.answer(f"{response}\n\n{load}")
 
-    response = f"""
-📊 <b>Статистика бота</b>
 
-<b>За последние 24 часа:</b>
-👤 Новых пользователей: <code>{stats_24h['new_users']}</code>
-📩 Всего запросов: <code>{stats_24h['total_requests']}</code>
-✅ Успешных: <code>{stats_24h['successful_requests']}</code>
-❌ С ошибками: <code>{stats_24h['failed_requests']}</code>
-🔢 Токенов использовано: <code>{stats_24h['total_tokens']:,}</code>
+_LEVEL_LABELS = {
+    OverloadLevel.NORMAL: "🟢 норма",
+    OverloadLevel.SHORT_OUTPUT: "🟡 короткие ответы",
+    OverloadLevel.CHEAP_MODEL: "🟠 быстрая модель",
+    OverloadLevel.SKIP_EXPENSIVE: "🔴 без YouTube",
+    OverloadLevel.REJECT: "⛔ отказ новым запросам",
+}
 
-<b>За последние 7 дней:</b>
-👤 Новых пользователей: <code>{stats_7d['new_users']}</code>
-📩 Всего запросов: <code>{stats_7d['total_requests']}</code>
-✅ Успешных: <code>{stats_7d['successful_requests']}</code>
-❌ С ошибками: <code>{stats_7d['failed_requests']}</code>
-🔢 Токенов использовано: <code>{stats_7d['total_tokens']:,}</code>
 
-<b>Всего в системе:</b>
-👥 Пользователей: <code>{total_users}</code>
-📝 Запросов: <code>{total_requests}</code>
-"""
+def _format_overload_status(level: OverloadLevel, signals: OverloadSignals, held_for: float) -> str:
+    """
+    Format the current degradation level and the signals behind it.
+    """
+    return (
+        f"<b>Нагрузка:</b> {_LEVEL_LABELS[level]} (уровень {int(level)}, {held_for:.0f} с)\n"
+        f"В обработке: <code>{signals.requests_in_flight}</code>, "
+        f"LLM в ожидании: <code>{signals.llm_in_flight}</code>\n"
+        f"Лаг loop: <code>{signals.loop_lag * 1000:.0f} мс</code>, "
+        f"ошибки LLM: <code>{signals.llm_error_rate:.0%}</code>"
+    )
+
 
-    await message.answer(response.strip())
+def _format_trends_message(days: int, trends: list[DailyTrend]) -> str:
+    """
+    Format daily trends as a compact fixed-width table.
+    """
+    lines = [f"{'день':<5} {'запр':>6} {'ok':>6} {'err':>5} {'токены':>10} {'сек':>5}"]
+    for trend in trends:
+        lines.append(
+            f"{trend.day.strftime('%m-%d'):<5} {trend.requests:>6} {trend.success:>6} "
+            f"{trend.error:>5} {trend.tokens_used:>10} {trend.avg_latency_s:>5.1f}"
+        )
+    return f"📈 <b>Тренды за {days} дней</b>\n\n<pre>{escape(chr(10).join(lines))}</pre>"
 
 
-@router.message(Command("export"), admin_filter)
-async def cmd_export(message: Message) -> None:
+@router.message(Command("trends"), admin_filter)
+async def cmd_trends(message: Message, command: CommandObject) -> None:
     """
-    Handle /export command for admins only.
-    Generates and sends CSV file with SummaryRequest data.
+    Handle /trends [30|90] command for admins only.
+    Shows daily requests, errors, tokens and average latency from rollups.
     """
-    log.info("Admin export requested", admin_id=message.from_user.id)
+    log.info("Admin trends requested", admin_id=message.from_user.id)
 
-    # Fetch all requests with user data
-    requests = await SummaryRequest.all().prefetch_related("user").order_by("-created_at")
+    days = 90 if (command.args or "").strip() == "90" else 30
+    trends = await daily_trends(days)
+    if not trends:
+        await message.answer("📭 Нет данных за выбранный период.")
+        return
 
-    if not requests:
+    await message.answer(_format_trends_message(days, trends))
+
+
+async def _get_tier_stats(since: datetime) -> list[dict[str, Any]]:
+    """
+    Requests, tokens and latency per routing tier from summary_requests.
+
+    AICODE-NOTE: Тир хранится только в сырых строках (не в роллапах), поэтому
+    окно ограничено горячей таблицей и индексом (created_at, status).
+    """
+    return await (
+        SummaryRequest.filter(created_at__gte=since, status="success")
+        .annotate(
+            requests=Count("id"),
+            tokens=Sum("tokens_used"),
+            avg_latency=Avg("latency_ms"),
+        )
+        .group_by("model_tier", "model")
+        .order_by("model_tier", "model")
+        .values("model_tier", "model", "requests", "tokens", "avg_latency")
+    )
+
+
+def _format_tiers_message(days: int, rows: list[dict[str, Any]]) -> str:
+    """
+    Format per-tier comparison as a fixed-width table.
+    """
+    lines = [f"{'тир':<9} {'запр':>6} {'ток/запр':>9} {'сек':>5}  модель"]
+    for row in rows:
+        requests = row["requests"] or 0
+        tokens_per_request = (row["tokens"] or 0) / requests if requests else 0
+        lines.append(
+            f"{row['model_tier'] or '—':<9} {requests:>6} {tokens_per_request:>9.0f} "
+            f"{(row['avg_latency'] or 0) / 1000:>5.1f}  {row['model'] or '—'}"
+        )
+    return f"🧭 <b>Тиры моделей за {days} дн.</b> (успешные запросы)\n\n<pre>{escape(chr(10).join(lines))}</pre>"
+
+
+@router.message(Command("tiers"), admin_filter)
+async def cmd_tiers(message: Message, command: CommandObject) -> None:
+    """
+    Handle /tiers [days] command for admins only.
+    Compares latency and token cost per routing tier (default 7 days).
+    """
+    log.info("Admin tiers requested", admin_id=message.from_user.id)
+
+    args = (command.args or "").strip()
+    days = min(int(args), settings.RETENTION_DAYS or 365) if args.isdigit() and int(args) > 0 else 7
+    rows = await _get_tier_stats(datetime.utcnow() - timedelta(days=days))
+    if not rows:
+        await message.answer("📭 Нет данных за выбранный период.")
+        return
+
+    await message.answer(_format_tiers_message(days, rows))
+
+
+@router.message(Command("metrics"), admin_filter)
+async def cmd_metrics(message: Message) -> None:
+    """
+    Handle /metrics command for admins only.
+    Dumps in-process metrics (Bot API calls, latencies, etc.).
+    """
+    log.info("Admin metrics requested", admin_id=message.from_user.id)
+
+    rendered = metrics.render() or "пока нет данных"
+    # AICODE-NOTE: Лимит сообщения Telegram — 4096 символов.
+    await message.answer(f"📈 <b>Метрики</b>\n\n<pre>{escape(rendered[:3800])}</pre>")
+
+
+@router.message(Command("export"), admin_filter)
+async def cmd_export(message: Message, command: CommandObject) -> None:
+    """
+    Handle /export [from=YYYY-MM-DD] [to=YYYY-MM-DD] [status=success|error]
+    command for admins only.
+    Streams SummaryRequest rows into gzip-compressed CSV documents.
+    """
+    log.info("Admin export requested", admin_id=message.from_user.id, args=command.args)
+
+    try:
+        filters = parse_export_args(command.args)
+    except ValueError as e:
+        await message.answer(
+            f"❌ {escape(str(e))}\n\n"
+            "Формат: <code>/export from=2025-01-01 to=2025-01-31 status=success</code>"
+        )
+        return
+
+    # AICODE-NOTE: Строки идут страницами (keyset) прямо в gzip-файл на диске,
+    # каждая часть отправляется сразу и удаляется — память не растёт с размером таблицы.
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    total_rows = 0
+    parts = 0
+    with tempfile.TemporaryDirectory(prefix="export_") as directory:
+        # Старые строки читаются из архивов retention-задачи после горячей таблицы
+        archived = iter_archive_pages(filters)
+        async for part in write_export_parts(filters, directory, extra_pages=archived):
+            parts += 1
+            total_rows += part.rows
+            filename = f"summary_requests_{timestamp}_part{part.index:03d}.csv.gz"
+            await message.answer_document(
+                FSInputFile(part.path, filename=filename),
+                caption=f"📊 Экспорт ({filters.describe()}), часть {part.index}: {part.rows} записей",
+            )
+            part.path.unlink(missing_ok=True)
+
+    if not parts:
         await message.answer("📭 Нет данных для экспорта.")
         return
 
-    # Generate CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
-        "id",
-        "user_telegram_id",
-        "user_username",
-        "content_type",
-        "source_url",
-        "status",
-        "tokens_used",
-        "error_message",
-        "created_at",
-    ])
-
-    # Data rows
-    for req in requests:
-        writer.writerow([
-            req.id,
-            req.user.telegram_id,
-            req.user.username or "",
-            req.content_type,
-            req.source_url or "",
-            req.status,
-            req.tokens_used,
-            req.error_message or "",
-            req.created_at.isoformat(),
-        ])
-
-    # Prepare file
-    csv_bytes = output.getvalue().encode("utf-8-sig")  # BOM for Excel compatibility
-    filename = f"summary_requests_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-
-    file = BufferedInputFile(csv_bytes, filename=filename)
-
-    await message.answer_document(
-        file,
-        caption=f"📊 Экспорт данных: {len(requests)} записей",
-    )
+    log.info("Export sent", admin_id=message.from_user.id, records=total_rows, parts=parts)
+
 
-    log.info("Export sent", admin_id=message.from_user.id, records=len(requests))
+def _format_health_message(health: LoopHealth, open_circuits: dict[str, float] | None = None) -> str:
+    """
+    Format event-loop health and domains cut off by the parser circuit breaker for /health.
+    """
+    status = "🟢" if health.lag_p99 < loop_monitor.stall_threshold else "🟠"
+    lines = [
+        f"{status} <b>Event loop</b>\n",
+        f"Лаг сейчас: {health.lag_last * 1000:.1f} мс",
+        f"Лаг p50 / p99 / max: {health.lag_p50 * 1000:.1f} / {health.lag_p99 * 1000:.1f} / "
+        f"{health.lag_max * 1000:.1f} мс",
+        f"Задач в loop: {health.pending_tasks}",
+        f"Очередь to_thread: {health.executor_queue} (потоков: {health.executor_threads})",
+        f"Зависаний всего: {health.stalls_total}",
+    ]
+    for stall in reversed(health.recent_stalls):
+        lines.append(
+            f"\n⏱ {stall.at.strftime('%H:%M:%S')} {stall.duration * 1000:.0f} мс [{stall.source}]\n"
+            f"<code>{escape(stall.where[:300])}</code>"
+        )
+    if open_circuits:
+        lines.append("\n🔌 <b>Отключённые домены</b>")
+        for domain, retry_after in sorted(open_circuits.items(), key=lambda item: -item[1])[:10]:
+            lines.append(f"{escape(domain)} — проба через {retry_after:.0f} с")
+    return "\n".join(lines)
+
+
+@router.message(Command("health"), admin_filter)
+async def cmd_health(message: Message) -> None:
+    """
+    Handle /health command for admins only.
+    Shows event-loop lag, pending tasks, executor backlog, recent stalls and open circuits.
+    """
+    log.info("Admin health requested", admin_id=message.from_user.id)
+    await message.answer(_format_health_message(loop_monitor.health(), parser_guard.open_circuits()))
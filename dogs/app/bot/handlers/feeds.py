@@ -0,0 +1,100 @@
+"""
+Handlers for RSS/Atom subscriptions: /subscribe, /unsubscribe, /subscriptions.
+"""
+
+from html import escape
+
+import structlog
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from app.core.config import settings
+from app.core.feeds import SubscriptionLimitError, list_subscriptions, subscribe, unsubscribe
+from app.core.parsers.exceptions import ExtractionError
+from app.core.parsers.router import is_http_url
+from app.core.tenants import TenantConfig
+from app.database.models import User as DBUser
+
+router = Router(name="feeds")
+log = structlog.get_logger("FeedsHandler")
+
+SCHEDULE_LABELS = {"hourly": "каждый час", "daily": "раз в сутки"}
+
+SUBSCRIBE_USAGE = (
+    "📡 <b>Подписка на RSS/Atom</b>\n\n"
+    "<code>/subscribe https://example.com/feed.xml</code> — дайджест раз в сутки\n"
+    "<code>/subscribe https://example.com/feed.xml hourly</code> — каждый час\n\n"
+    "Новые записи фида придут одним сообщением с саммари."
+)
+
+
+@router.message(Command("subscribe"))
+async def cmd_subscribe(message: Message, command: CommandObject, db_user: DBUser, tenant: TenantConfig) -> None:
+    """
+    Handle /subscribe <feed-url> [hourly|daily].
+    """
+    if not settings.FEEDS_ENABLED:
+        await message.answer("ℹ️ Подписки на фиды сейчас отключены.")
+        return
+
+    args = (command.args or "").split()
+    if not args or not is_http_url(args[0]) or (len(args) > 1 and args[1] not in SCHEDULE_LABELS):
+        await message.answer(SUBSCRIBE_USAGE)
+        return
+    url, schedule = args[0], (args[1] if len(args) > 1 else "daily")
+
+    try:
+        subscription, created = await subscribe(db_user, url, schedule, tenant.name)  # type: ignore[arg-type]
+    except SubscriptionLimitError:
+        await message.answer(f"❌ Можно подписаться не больше чем на {settings.FEED_MAX_SUBSCRIPTIONS} фидов.")
+        return
+    except ExtractionError as e:
+        await message.answer(f"❌ <b>Не удалось прочитать фид</b>\n\n{escape(str(e))}")
+        log.info("Feed subscription rejected", url=url, error=str(e))
+        return
+
+    feed = await subscription.feed
+    verb = "оформлена" if created else "обновлена"
+    await message.answer(
+        f"✅ Подписка на <b>{escape(feed.title)}</b> {verb}.\n"
+        f"Дайджест: {SCHEDULE_LABELS[subscription.schedule]}."
+    )
+    log.info("Feed subscribed", telegram_id=db_user.telegram_id, feed_id=feed.id, created=created)
+
+
+@router.message(Command("subscriptions"))
+async def cmd_subscriptions(message: Message, db_user: DBUser, tenant: TenantConfig) -> None:
+    """
+    Handle /subscriptions: numbered list of the user's feeds.
+    """
+    subscriptions = await list_subscriptions(db_user, tenant.name)
+    if not subscriptions:
+        await message.answer("📭 Подписок нет. " + SUBSCRIBE_USAGE.split("\n\n", 1)[1])
+        return
+
+    lines = [
+        f"{number}. <b>{escape(s.feed.title)}</b> — {SCHEDULE_LABELS[s.schedule]}\n{escape(s.feed.url)}"
+        for number, s in enumerate(subscriptions, start=1)
+    ]
+    await message.answer(
+        "📡 <b>Ваши подписки</b>\n\n" + "\n\n".join(lines) + "\n\nОтписаться: <code>/unsubscribe номер</code>",
+        disable_web_page_preview=True,
+    )
+
+
+@router.message(Command("unsubscribe"))
+async def cmd_unsubscribe(message: Message, command: CommandObject, db_user: DBUser, tenant: TenantConfig) -> None:
+    """
+    Handle /unsubscribe <number|feed-url>.
+    """
+    target = (command.args or "").strip()
+    if not target:
+        await message.answer("Укажите номер из /subscriptions или URL фида.")
+        return
+
+    subscription = await unsubscribe(db_user, target, tenant.name)
+    if subscription is None:
+        await message.answer("🤔 Такой подписки нет. Список — /subscriptions")
+        return
+    await message.answer(f"🗑 Подписка на <b>{escape(subscription.feed.title)}</b> удалена.")
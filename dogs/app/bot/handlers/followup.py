@@ -0,0 +1,100 @@
+"""
+Handler for follow-up questions: a reply to a summary is answered from the stored document.
+"""
+
+from __future__ import annotations
+
+import structlog
+from aiogram import F, Router
+from aiogram.filters import Filter
+from aiogram.types import Message
+from aiogram.utils.chat_action import ChatActionSender
+
+from app.bot.sender import count_api_calls
+from app.core.config import settings
+from app.core.followup import build_followup_messages, followup
+from app.core.llm.service import get_llm_service
+from app.core.logger import bind_request_context
+from app.core.metrics import metrics
+from app.database.analytics import analytics
+from app.database.models import User as DBUser
+
+router = Router(name="followup")
+log = structlog.get_logger("FollowUpHandler")
+
+FOLLOWUP_CONTENT_TYPE = "followup"
+
+EXPIRED_MESSAGE = (
+    "⌛ <b>Документ больше недоступен</b>\n\n"
+    "Вопросы можно задавать в течение суток после саммари. Отправьте ссылку ещё раз."
+)
+ERROR_MESSAGE = "❌ <b>Не удалось ответить на вопрос</b>\n\nСервис временно недоступен. Попробуйте позже."
+
+
+class FollowUpFilter(Filter):
+    """
+    Matches a text reply to a bot message; replies with links go to the regular pipeline.
+    """
+
+    async def __call__(self, message: Message) -> bool:
+        reply = message.reply_to_message
+        if not settings.FOLLOWUP_ENABLED or reply is None or reply.from_user is None:
+            return False
+        if reply.from_user.id != message.bot.id:
+            return False
+        return not any(entity.type in ("url", "text_link") for entity in message.entities or [])
+
+
+@router.message(F.text, FollowUpFilter())
+async def handle_followup(message: Message, db_user: DBUser) -> None:
+    """
+    Answer a question about the document behind the replied summary.
+    """
+    with bind_request_context(user_id=db_user.telegram_id), count_api_calls() as api_calls:
+        await _answer_followup(message, db_user)
+    metrics.observe("bot_api_calls_per_followup", api_calls.calls)
+
+
+async def _answer_followup(message: Message, db_user: DBUser) -> None:
+    question = message.text or ""
+    doc_key = followup.resolve(message.bot.id, message.chat.id, message.reply_to_message.message_id)
+    retrieval = await followup.retrieve(doc_key, question)
+    if retrieval is None:
+        await message.reply(EXPIRED_MESSAGE)
+        return
+
+    record = analytics.start_request(
+        user_id=db_user.id,
+        content_type=FOLLOWUP_CONTENT_TYPE,
+        source_url=retrieval.content.source_url,
+    )
+    try:
+        async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
+            result = await get_llm_service().summarize_messages(
+                build_followup_messages(retrieval, question),
+                max_output_tokens=settings.FOLLOWUP_MAX_OUTPUT_TOKENS,
+            )
+    except Exception as e:
+        analytics.finish_request(record, "error", error_message=str(e))
+        await message.reply(ERROR_MESSAGE)
+        log.exception("Follow-up failed", error=str(e))
+        return
+
+    analytics.finish_request(
+        record,
+        "success",
+        tokens_used=result.tokens.prompt + result.tokens.completion,
+        model=result.model,
+        model_tier=result.tier,
+    )
+    metrics.observe("followup_prompt_tokens", result.tokens.prompt)
+    sent = await message.reply(result.text)
+    followup.link(message.bot.id, message.chat.id, sent.message_id, doc_key)
+
+    log.info(
+        "Follow-up answered",
+        telegram_id=db_user.telegram_id,
+        fragments=len(retrieval.fragments),
+        matched=retrieval.matched,
+        prompt_tokens=result.tokens.prompt,
+    )
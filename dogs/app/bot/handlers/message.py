@@ -4,21 +4,44 @@ Handler for processing user messages (links, text).
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import io
+from html import escape
+from typing import Any, Coroutine, Optional
 
 import structlog
 from aiogram import F, Router
-from aiogram.types import Message, ReactionTypeEmoji
-
-from app.core.llm.service import build_llm_service
-from app.core.llm.types import SummaryPayload
+from aiogram.types import (
+    Message,
+    MessageOriginChannel,
+    MessageOriginChat,
+    MessageOriginHiddenUser,
+    MessageOriginUser,
+    PhotoSize,
+    ReactionTypeEmoji,
+)
+from aiogram.utils.chat_action import ChatActionSender
+
+from app.bot.batching import ForwardBatcher
+from app.bot.sender import count_api_calls, get_bot_username
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, request_deadline, stage
+from app.core.followup import followup
+from app.core.logger import bind_request_context
+from app.core.metrics import metrics
+from app.core.ocr import ocr
+from app.core.overload import Overloaded, OverloadLevel, overload
+from app.core.llm.service import get_llm_service
+from app.core.llm.types import SummaryPayload, Summarizer
 from app.core.parsers.base import BaseParser
 from app.core.parsers.exceptions import ExtractionError, ParserError, UnsupportedContentError
+from app.core.parsers.guard import parser_guard
 from app.core.parsers.router import detect_content_type, is_probably_url, select_parser
 from app.core.parsers.types import ContentType, ParsedContent
 from app.core.parsers.web import WebParser
 from app.core.parsers.youtube import YouTubeParser
-from app.database.models import SummaryRequest, User as DBUser
+from app.database.analytics import RequestRecord, analytics
+from app.database.models import User as DBUser
 
 router = Router(name="message")
 log = structlog.get_logger("MessageHandler")
@@ -30,70 +53,129 @@ PARSERS: list[BaseParser] = [
     WebParser(),
 ]
 
+# Реакции не должны висеть дольше этого, даже если Bot API тормозит (retry_after)
+COSMETIC_CALL_TIMEOUT = 5.0
+_background_tasks: set[asyncio.Task[None]] = set()
+
 FOOTER_TEMPLATE = "\n\n<i>⚡️ Fast read with @{bot_username}</i>"
 
+FORWARD_BATCH_CONTENT_TYPE = "forward_batch"
+IMAGE_CONTENT_TYPE = "image"
+
 ERROR_MESSAGES = {
     "unsupported": "❌ <b>Не удалось обработать контент</b>\n\nЭтот тип контента пока не поддерживается.",
     "extraction": "❌ <b>Не удалось извлечь контент</b>\n\n{details}",
     "parsing": "❌ <b>Ошибка при обработке</b>\n\nПопробуйте ещё раз или отправьте другую ссылку.",
     "llm": "❌ <b>Ошибка генерации саммари</b>\n\nСервис временно недоступен. Попробуйте позже.",
+    "deadline": "⏱ <b>Не успел обработать вовремя</b>\n\nИсточник или сервис отвечает слишком долго. Попробуйте позже.",
+    "busy": "⏳ <b>Сейчас слишком много запросов</b>\n\nПопробуйте ещё раз примерно через {retry_after} с.",
     "empty": "🤔 <b>Пустое сообщение</b>\n\nОтправьте мне ссылку или текст для анализа.",
 }
 
 
-async def _set_reaction(message: Message, emoji: str) -> None:
+async def _cosmetic(coro: Coroutine[Any, Any, None]) -> None:
     """
-    Safely set reaction on message.
+    Run a cosmetic Bot API call (reaction, chat action) with a bounded lifetime; never raises.
     """
     try:
-        await message.react([ReactionTypeEmoji(emoji=emoji)])
-    except Exception:
-        # AICODE-NOTE: Реакции могут быть недоступны в некоторых чатах.
-        pass
+        async with asyncio.timeout(COSMETIC_CALL_TIMEOUT):
+            await coro
+    except Exception as e:
+        log.debug("Cosmetic call failed", error=str(e))
 
 
-async def _send_typing(message: Message) -> None:
+def _spawn_background(coro: Coroutine[Any, Any, None]) -> None:
     """
-    Send typing action to show bot is processing.
+    Fire-and-forget: keep a strong reference until the task finishes.
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _set_reaction(message: Message, emoji: str) -> None:
+    """
+    Safely set reaction on message.
     """
     try:
-        await message.bot.send_chat_action(message.chat.id, "typing")
+        await message.react([ReactionTypeEmoji(emoji=emoji)])
     except Exception:
+        # AICODE-NOTE: Реакции могут быть недоступны в некоторых чатах.
         pass
 
 
-def _extract_url_from_message(message: Message) -> Optional[str]:
+def _extract_urls_from_message(message: Message) -> list[str]:
     """
-    Extract URL from message text or entities.
+    Extract all unique URLs from message text or entities, preserving order.
     """
     text = message.text or message.caption or ""
 
-    # Check entities for URLs
+    urls: list[str] = []
     entities = message.entities or message.caption_entities or []
     for entity in entities:
-        if entity.type in ("url", "text_link"):
-            if entity.type == "text_link" and entity.url:
-                return entity.url
-            elif entity.type == "url":
-                return text[entity.offset : entity.offset + entity.length]
+        if entity.type == "text_link" and entity.url:
+            urls.append(entity.url)
+        elif entity.type == "url":
+            # AICODE-NOTE: extract_from учитывает UTF-16 offsets Telegram (эмодзи в тексте).
+            urls.append(entity.extract_from(text))
 
     # Fallback: check if whole text is a URL
-    if is_probably_url(text):
-        return text.strip()
+    if not urls and is_probably_url(text):
+        urls.append(text.strip())
 
-    return None
+    return list(dict.fromkeys(url.strip() for url in urls if url.strip()))
 
 
 def _extract_forwarded_text(message: Message) -> Optional[str]:
     """
     Extract text from forwarded message.
     """
-    if message.forward_date:
+    # AICODE-NOTE: С Bot API 7.0 Telegram присылает forward_origin; forward_date устарел и не приходит.
+    if message.forward_origin:
         return message.text or message.caption
     return None
 
 
-async def _parse_content(payload: str, content_type: ContentType) -> ParsedContent:
+def _forward_source(message: Message) -> str:
+    """
+    Human-readable origin of a forwarded message: channel, chat or user.
+    """
+    origin = message.forward_origin
+    if isinstance(origin, MessageOriginChannel):
+        source = f"Канал «{origin.chat.title}»"
+        signature = origin.author_signature
+    elif isinstance(origin, MessageOriginChat):
+        source = f"Чат «{origin.sender_chat.title}»"
+        signature = origin.author_signature
+    elif isinstance(origin, MessageOriginUser):
+        source, signature = origin.sender_user.full_name, None
+    elif isinstance(origin, MessageOriginHiddenUser):
+        source, signature = origin.sender_user_name, None
+    else:
+        source, signature = "Неизвестный источник", None
+    if signature:
+        source += f" ({signature})"
+    if origin is not None:
+        source += f", {origin.date:%d.%m %H:%M}"
+    return source
+
+
+def _merge_forwarded(messages: list[Message]) -> str:
+    """
+    Join a burst of forwarded messages into one document, each post with its source.
+    """
+    total = len(messages)
+    return "\n\n".join(
+        f"[{index}/{total}] {_forward_source(message)}\n{(message.text or message.caption or '').strip()}"
+        for index, message in enumerate(messages, start=1)
+    )
+
+
+async def _parse_content(
+    payload: str,
+    content_type: ContentType,
+    title: str = "Текст от пользователя",
+) -> ParsedContent:
     """
     Parse content using appropriate parser.
     """
@@ -101,47 +183,55 @@ async def _parse_content(payload: str, content_type: ContentType) -> ParsedConte
         # Direct text doesn't need parsing
         return ParsedContent(
             type=ContentType.TEXT,
-            title="Текст от пользователя",
+            title=title,
             body=payload,
         )
 
     parser = select_parser(payload, PARSERS)
-    return await parser.parse(payload)
+    overload.check_parser(parser)
+    # Известная плохая ссылка или падающий домен — ошибка сразу, без таймаута загрузки
+    async with stage("parse"):
+        return await parser_guard.parse(parser, payload)
 
 
-async def _create_summary_request(
+def _start_request_record(
     db_user: DBUser,
-    content_type: ContentType,
+    content_type: str,
     source_url: Optional[str] = None,
-) -> SummaryRequest:
+) -> RequestRecord:
     """
-    Create a new SummaryRequest record with 'processing' status.
+    Register a new SummaryRequest in the analytics buffer with 'processing' status.
     """
-    return await SummaryRequest.create(
-        user=db_user,
-        content_type=content_type.value,
+    return analytics.start_request(
+        user_id=db_user.id,
+        content_type=content_type,
         source_url=source_url,
-        status="processing",
     )
 
 
-async def _update_summary_request(
-    request: SummaryRequest,
+def _finish_request_record(
+    record: RequestRecord,
     status: str,
     tokens_used: int = 0,
     error_message: Optional[str] = None,
+    model: Optional[str] = None,
+    model_tier: Optional[str] = None,
 ) -> None:
     """
-    Update SummaryRequest with final status.
+    Set the final status; the row is written to the DB in the background.
     """
-    request.status = status
-    request.tokens_used = tokens_used
-    if error_message:
-        request.error_message = error_message
-    await request.save()
+    analytics.finish_request(
+        record,
+        status,
+        tokens_used=tokens_used,
+        error_message=error_message,
+        model=model,
+        model_tier=model_tier,
+    )
 
 
-@router.message(F.text | F.caption)
+# Фото с подписью — в handle_photo: он решает, распознавать ли изображение
+@router.message(F.text | (F.caption & ~F.photo))
 async def handle_message(message: Message, db_user: DBUser) -> None:
     """
     Main handler for processing user messages with links or text.
@@ -152,96 +242,360 @@ async def handle_message(message: Message, db_user: DBUser) -> None:
         await message.answer(ERROR_MESSAGES["empty"])
         return
 
-    # Set acknowledgment reaction
-    await _set_reaction(message, "👀")
-    await _send_typing(message)
+    if settings.FORWARD_BATCH_ENABLED and message.forward_origin is not None:
+        # Пересланные пачкой посты суммаризируются одним запросом после паузы в чате
+        forward_batcher.add(message, db_user)
+        return
+
+    if await _reject_if_overloaded(message):
+        return
+
+    # request_id/user_id попадают во все записи лога этого запроса (contextvars)
+    with (
+        bind_request_context(user_id=db_user.telegram_id),
+        count_api_calls() as api_calls,
+        request_deadline(_deadline_for(message)),
+        overload.track_request(),
+    ):
+        await _process_message(message, db_user, text)
+    metrics.observe("bot_api_calls_per_summary", api_calls.calls)
+
+
+@router.message(F.photo)
+async def handle_photo(message: Message, db_user: DBUser) -> None:
+    """
+    Photos and screenshots: recognize the text (OCR) and summarize it like a text message.
+
+    A caption with links, or the caption of a forwarded post, is handled as a usual message.
+    """
+    caption = (message.caption or "").strip()
+    if caption and (
+        not settings.OCR_ENABLED or message.forward_origin is not None or _extract_urls_from_message(message)
+    ):
+        await handle_message(message, db_user)
+        return
+    if not settings.OCR_ENABLED:
+        await message.answer(ERROR_MESSAGES["unsupported"])
+        return
+
+    if await _reject_if_overloaded(message):
+        return
+
+    with (
+        bind_request_context(user_id=db_user.telegram_id),
+        count_api_calls() as api_calls,
+        request_deadline(settings.REQUEST_DEADLINE),
+        overload.track_request(),
+    ):
+        pipeline = _summarize_item(
+            message,
+            db_user,
+            get_llm_service(),
+            payload=caption,
+            content_type=ContentType.TEXT,
+            source_url=None,
+            title="Текст с изображения",
+            record_type=IMAGE_CONTENT_TYPE,
+            # Самый большой из присланных размеров
+            image=message.photo[-1],
+        )
+        await _run_with_feedback(message, pipeline)
+    metrics.observe("bot_api_calls_per_summary", api_calls.calls)
+
 
-    # Determine content type and extract payload
-    url = _extract_url_from_message(message)
+async def _recognize_photo(message: Message, photo: PhotoSize, caption: str) -> str:
+    """
+    Download the photo and recognize its text; the caption, if any, goes first as the user's note.
+    """
+    buffer = io.BytesIO()
+    async with stage("download"):
+        await message.bot.download(photo, destination=buffer)
+    text = await ocr.recognize(buffer.getvalue())
+    return f"{caption}\n\n{text}" if caption else text
+
+
+async def _reject_if_overloaded(message: Message) -> bool:
+    """
+    At the top overload level answer "busy" with an ETA right away instead of queueing the work.
+    """
+    if overload.level < OverloadLevel.REJECT:
+        return False
+    metrics.inc("overload_rejected_total", stage="request")
+    await message.answer(ERROR_MESSAGES["busy"].format(retry_after=overload.retry_after()))
+    return True
+
+
+def _deadline_for(message: Message) -> float:
+    """
+    Time budget for the whole message: REQUEST_DEADLINE per wave of concurrently processed links.
+
+    AICODE-NOTE: Дедлайн ставится один раз на сообщение и наследуется задачами ссылок.
+    Ссылки идут волнами по URL_CONCURRENCY, поэтому бюджет умножается на число волн —
+    иначе последние ссылки длинного сообщения гарантированно не успевали бы.
+    """
+    links = min(len(_extract_urls_from_message(message)), settings.MAX_URLS_PER_MESSAGE)
+    waves = max(1, -(-links // settings.URL_CONCURRENCY))
+    return settings.REQUEST_DEADLINE * waves
+
+
+async def _process_message(message: Message, db_user: DBUser, text: str) -> None:
+    """
+    Run the summarization pipeline for a single message (one or many links).
+    """
+    urls = _extract_urls_from_message(message)
     forwarded_text = _extract_forwarded_text(message)
+    llm_service = get_llm_service()
 
-    if url:
-        payload = url
-        try:
-            content_type = detect_content_type(payload)
-        except ValueError:
-            content_type = ContentType.TEXT
-    elif forwarded_text:
-        payload = forwarded_text
-        content_type = ContentType.TEXT
+    if len(urls) > 1:
+        pipeline = _process_many_urls(message, db_user, llm_service, urls)
     else:
-        payload = text.strip()
-        content_type = ContentType.TEXT
-
-    log.info(
-        "Processing message",
-        telegram_id=db_user.telegram_id,
-        content_type=content_type.value,
-        has_url=bool(url),
-    )
+        payload, content_type = _select_single_payload(urls, forwarded_text, text)
+        pipeline = _summarize_item(
+            message,
+            db_user,
+            llm_service,
+            payload=payload,
+            content_type=content_type,
+            source_url=urls[0] if urls else None,
+        )
+    await _run_with_feedback(message, pipeline)
 
-    # Create SummaryRequest for analytics
-    summary_request = await _create_summary_request(
-        db_user=db_user,
-        content_type=content_type,
-        source_url=url,
-    )
 
-    try:
-        # Parse content
-        parsed = await _parse_content(payload, content_type)
-
-        # Send another typing indicator before LLM call
-        await _send_typing(message)
-
-        # Build LLM service and summarize
-        llm_service = build_llm_service()
-        summary_payload = SummaryPayload(
-            content=parsed.body,
-            title=parsed.title,
-            content_type=parsed.type,
-            source_url=parsed.source_url,
-            metadata=parsed.metadata,
-        )
-        result = await llm_service.summarize(summary_payload)
+async def _process_forward_batch(messages: list[Message], db_user: DBUser) -> None:
+    """
+    Summarize a burst of forwarded messages as one document; a single forward goes the usual way.
+    """
+    last = messages[-1]
+    if await _reject_if_overloaded(last):
+        return
 
-        # Update request with success
-        total_tokens = result.tokens.prompt + result.tokens.completion
-        await _update_summary_request(summary_request, "success", tokens_used=total_tokens)
+    with (
+        bind_request_context(user_id=db_user.telegram_id),
+        count_api_calls() as api_calls,
+        request_deadline(_deadline_for(last) if len(messages) == 1 else settings.REQUEST_DEADLINE),
+        overload.track_request(),
+    ):
+        if len(messages) == 1:
+            await _process_message(last, db_user, last.text or last.caption or "")
+        else:
+            log.info("Processing forwarded batch", telegram_id=db_user.telegram_id, messages=len(messages))
+            pipeline = _summarize_item(
+                last,
+                db_user,
+                get_llm_service(),
+                payload=_merge_forwarded(messages),
+                content_type=ContentType.TEXT,
+                source_url=None,
+                header=f"📨 <b>Сводка по {len(messages)} пересланным сообщениям</b>\n\n",
+                title=f"Пересланные сообщения ({len(messages)})",
+                record_type=FORWARD_BATCH_CONTENT_TYPE,
+            )
+            await _run_with_feedback(last, pipeline)
+    metrics.observe("bot_api_calls_per_summary", api_calls.calls)
+
+
+forward_batcher = ForwardBatcher(_process_forward_batch)
+
+
+async def _run_with_feedback(message: Message, pipeline: Coroutine[Any, Any, bool]) -> None:
+    """
+    Await the summarization pipeline with 👀 and "typing" feedback, then mark success with ✅.
+    """
+    # AICODE-NOTE: Реакция 👀 и keep-alive "typing" идут параллельно с парсингом и LLM,
+    # а не перед ними, и живут не дольше хендлера: при отмене или ошибке пайплайна
+    # реакция отменяется. Пайплайн не в TaskGroup — его исключение уходит выше как есть,
+    # а не завёрнутым в ExceptionGroup.
+    reaction = asyncio.create_task(_cosmetic(_set_reaction(message, "👀")))
+    try:
+        async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
+            succeeded = await pipeline
+    except BaseException:
+        reaction.cancel()
+        raise
+    await reaction
+
+    if succeeded:
+        # 👀 к этому моменту уже выставлена (дождались её выше), порядок реакций сохранён.
+        # Ответ пользователю уже отправлен — ✅ не задерживает завершение хендлера.
+        _spawn_background(_cosmetic(_set_reaction(message, "✅")))
+
+
+def _select_single_payload(
+    urls: list[str],
+    forwarded_text: Optional[str],
+    text: str,
+) -> tuple[str, ContentType]:
+    """
+    Pick what to summarize for a message with at most one link.
+    """
+    if urls:
+        try:
+            return urls[0], detect_content_type(urls[0])
+        except ValueError:
+            return urls[0], ContentType.TEXT
+    if forwarded_text:
+        return forwarded_text, ContentType.TEXT
+    return text.strip(), ContentType.TEXT
 
-        # Build response with footer
-        bot_info = await message.bot.get_me()
-        footer = FOOTER_TEMPLATE.format(bot_username=bot_info.username or "SummarizerBot")
-        response = result.text + footer
 
-        await message.answer(response)
-        await _set_reaction(message, "✅")
+async def _process_many_urls(
+    message: Message,
+    db_user: DBUser,
+    llm_service: Summarizer,
+    urls: list[str],
+) -> bool:
+    """
+    Summarize several links concurrently; each result is sent as soon as it is ready.
 
-        log.info(
-            "Summary sent",
-            telegram_id=db_user.telegram_id,
-            tokens_used=total_tokens,
-            model=result.model,
+    Returns True if at least one link was summarized successfully.
+    """
+    if len(urls) > settings.MAX_URLS_PER_MESSAGE:
+        await message.answer(
+            f"ℹ️ Обработаю первые {settings.MAX_URLS_PER_MESSAGE} ссылок из {len(urls)}."
         )
+        urls = urls[: settings.MAX_URLS_PER_MESSAGE]
+
+    total = len(urls)
+    semaphore = asyncio.Semaphore(settings.URL_CONCURRENCY)
+
+    log.info("Processing multi-link message", telegram_id=db_user.telegram_id, links=total)
+
+    async def _worker(index: int, url: str) -> bool:
+        async with semaphore:
+            try:
+                content_type = detect_content_type(url)
+            except ValueError:
+                content_type = ContentType.TEXT
+            return await _summarize_item(
+                message,
+                db_user,
+                llm_service,
+                payload=url,
+                content_type=content_type,
+                source_url=url,
+                header=f"🔗 <b>{index}/{total}</b> {escape(url)}\n\n",
+            )
+
+    # Частичные ошибки не должны ронять весь батч
+    results = await asyncio.gather(
+        *(_worker(index, url) for index, url in enumerate(urls, start=1)),
+        return_exceptions=True,
+    )
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            log.error("Multi-link item failed", source_url=url, error=str(result))
+    return any(result is True for result in results)
 
-    except UnsupportedContentError as e:
-        await _update_summary_request(summary_request, "error", error_message=str(e))
-        await message.answer(ERROR_MESSAGES["unsupported"])
-        log.warning("Unsupported content", error=str(e))
 
-    except ExtractionError as e:
-        await _update_summary_request(summary_request, "error", error_message=str(e))
-        error_text = ERROR_MESSAGES["extraction"].format(details=str(e))
-        await message.answer(error_text)
-        log.warning("Extraction error", error=str(e))
+async def _summarize_item(
+    message: Message,
+    db_user: DBUser,
+    llm_service: Summarizer,
+    *,
+    payload: str,
+    content_type: ContentType,
+    source_url: Optional[str],
+    header: str = "",
+    title: str = "Текст от пользователя",
+    record_type: Optional[str] = None,
+    image: Optional[PhotoSize] = None,
+) -> bool:
+    """
+    Parse and summarize one payload, reply to the user and record analytics.
+    With ``image`` the payload is the caption and the recognized text is appended to it.
 
-    except ParserError as e:
-        await _update_summary_request(summary_request, "error", error_message=str(e))
-        await message.answer(ERROR_MESSAGES["parsing"])
-        log.error("Parser error", error=str(e))
+    Returns True on success. All pipeline errors are reported to the user here.
+    """
+    record_type = record_type or content_type.value
+    # content_type снимается с контекста на выходе: одиночная ссылка и фото
+    # обрабатываются в задаче самого хендлера, и ключ не должен утечь в её логи
+    with structlog.contextvars.bound_contextvars(content_type=record_type):
+        log.info(
+            "Processing message",
+            telegram_id=db_user.telegram_id,
+            content_type=record_type,
+            has_url=bool(source_url),
+        )
 
-    except Exception as e:
-        await _update_summary_request(summary_request, "error", error_message=str(e))
-        await message.answer(ERROR_MESSAGES["llm"])
-        log.exception("Unexpected error during message processing", error=str(e))
+        # Register SummaryRequest for analytics (written behind, off the latency path)
+        summary_request = _start_request_record(
+            db_user=db_user,
+            content_type=record_type,
+            source_url=source_url,
+        )
 
+        try:
+            if image is not None:
+                payload = await _recognize_photo(message, image, payload)
+            parsed = await _parse_content(payload, content_type, title)
+
+            summary_payload = SummaryPayload(
+                content=parsed.body,
+                title=parsed.title,
+                content_type=parsed.type,
+                source_url=parsed.source_url,
+                metadata=parsed.metadata,
+            )
+            result = await llm_service.summarize(summary_payload)
+
+            # Update request with success
+            total_tokens = result.tokens.prompt + result.tokens.completion
+            _finish_request_record(
+                summary_request,
+                "success",
+                tokens_used=total_tokens,
+                model=result.model,
+                model_tier=result.tier,
+            )
+
+            # Build response with footer
+            footer = FOOTER_TEMPLATE.format(bot_username=await get_bot_username(message.bot))
+            response = header + result.text + footer
+
+            sent = await message.answer(response)
+            if settings.FOLLOWUP_ENABLED:
+                # Реплай на это саммари — уточняющий вопрос по документу (handlers/followup.py)
+                followup.remember(message.bot.id, message.chat.id, sent.message_id, parsed)
+
+            log.info(
+                "Summary sent",
+                telegram_id=db_user.telegram_id,
+                tokens_used=total_tokens,
+                model=result.model,
+                model_tier=result.tier,
+            )
+            return True
+
+        except Overloaded as e:
+            _finish_request_record(summary_request, "error", error_message=str(e))
+            await message.answer(header + ERROR_MESSAGES["busy"].format(retry_after=e.retry_after))
+            log.warning("Skipped under overload", error=str(e))
+
+        except DeadlineExceeded as e:
+            # В error_message попадает этап, на котором кончился бюджет
+            _finish_request_record(summary_request, "error", error_message=str(e))
+            await message.answer(header + ERROR_MESSAGES["deadline"])
+            log.warning("Request deadline exceeded", stage=e.stage, budget=e.budget)
+
+        except UnsupportedContentError as e:
+            _finish_request_record(summary_request, "error", error_message=str(e))
+            await message.answer(header + ERROR_MESSAGES["unsupported"])
+            log.warning("Unsupported content", error=str(e))
+
+        except ExtractionError as e:
+            _finish_request_record(summary_request, "error", error_message=str(e))
+            error_text = ERROR_MESSAGES["extraction"].format(details=str(e))
+            await message.answer(header + error_text)
+            log.warning("Extraction error", error=str(e))
+
+        except ParserError as e:
+            _finish_request_record(summary_request, "error", error_message=str(e))
+            await message.answer(header + ERROR_MESSAGES["parsing"])
+            log.error("Parser error", error=str(e))
+
+        except Exception as e:
+            _finish_request_record(summary_request, "error", error_message=str(e))
+            await message.answer(header + ERROR_MESSAGES["llm"])
+            log.exception("Unexpected error during message processing", error=str(e))
+
+        return False
@@ -6,6 +6,7 @@ from aiogram import Router
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message
 
+from app.bot.sender import get_bot_username
 from app.database.models import User as DBUser
 
 router = Router(name="start")
@@ -31,6 +32,7 @@ HELP_MESSAGE = """
 1️⃣ <b>YouTube</b> — отправь ссылку, и я извлеку субтитры и сделаю саммари.
 2️⃣ <b>Статьи</b> — отправь URL любой статьи, я прочитаю её за тебя.
 3️⃣ <b>Текст</b> — просто пришли текст, и получишь структурированную выжимку.
+4️⃣ <b>Блоги</b> — <code>/subscribe URL-фида</code>, и новые посты придут дайджестом.
 
 <b>Что ты получишь:</b>
 🎯 TL;DR — суть в двух предложениях
@@ -56,7 +58,6 @@ async def cmd_help(message: Message) -> None:
     """
     Handle /help command.
     """
-    bot_info = await message.bot.get_me()
-    help_text = HELP_MESSAGE.format(bot_username=bot_info.username or "SummarizerBot")
+    help_text = HELP_MESSAGE.format(bot_username=await get_bot_username(message.bot))
     await message.answer(help_text)
 
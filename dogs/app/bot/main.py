@@ -2,32 +2,61 @@
 Bot initialization and dispatcher configuration.
 """
 
+from typing import TYPE_CHECKING, Optional
+
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
+from app.bot.sender import OutboundRateLimiter
 from app.core.config import settings
+from app.core.tenants import TenantConfig, load_tenants
+
+if TYPE_CHECKING:
+    from app.bot.middlewares.user_sync import UserSyncMiddleware
 
 # AICODE-NOTE: Используем MemoryStorage для MVP. В продакшене заменить на Redis.
 storage = MemoryStorage()
 
-bot = Bot(
-    token=settings.TG_TOKEN.get_secret_value(),
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-)
+
+
+def create_bot(tenant: TenantConfig) -> Bot:
+    """
+    Bot of one tenant with its own Bot API session and flood-control limiter.
+    """
+    tenant_bot = Bot(
+        token=tenant.token.get_secret_value(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+    # Все исходящие вызовы Bot API проходят через лимитер (flood control + retry_after).
+    # Лимиты Telegram считаются на бота, поэтому лимитер у каждого свой.
+    tenant_bot.session.middleware(OutboundRateLimiter())
+    return tenant_bot
+
+
+# AICODE-NOTE: Один Dispatcher (роутеры, middleware, парсеры, LLM, БД) на все боты процесса;
+# тенант апдейта определяется по id бота в TenantMiddleware.
+tenants = load_tenants()
+bots: dict[str, Bot] = {tenant.name: create_bot(tenant) for tenant in tenants}
+bot = bots[tenants[0].name]  # Первый тенант: бенчмарки и код с одним ботом
 
 dp = Dispatcher(storage=storage)
 
+user_sync_middleware: Optional["UserSyncMiddleware"] = None
+
 
 def setup_handlers() -> None:
     """
     Register all routers (handlers) to the dispatcher.
     """
-    from app.bot.handlers import admin, message, start
+    from app.bot.handlers import admin, feeds, followup, message, start
 
     dp.include_router(start.router)
     dp.include_router(admin.router)
+    dp.include_router(feeds.router)
+    # Реплай на саммари — вопрос по документу, а не новый текст для саммари
+    dp.include_router(followup.router)
     dp.include_router(message.router)
 
 
@@ -35,12 +64,35 @@ def setup_middlewares() -> None:
     """
     Register all middlewares to the dispatcher.
     """
+    from app.bot.handlers.message import forward_batcher
+    from app.bot.middlewares.tenant import TenantMiddleware
     from app.bot.middlewares.throttling import ThrottlingMiddleware
     from app.bot.middlewares.user_sync import UserSyncMiddleware
 
+    global user_sync_middleware
+
+    # Тенант — раньше всех: от него зависят лимиты, промпт, модель и метки в аналитике
+    dp.update.outer_middleware(TenantMiddleware(tenants))
     # Throttling первым — отсекает спам до обработки
-    dp.message.middleware(ThrottlingMiddleware())
-    # User sync — создаёт/обновляет пользователя в БД
-    dp.message.middleware(UserSyncMiddleware())
-    dp.callback_query.middleware(UserSyncMiddleware())
+    # Пачка пересланных списывает лимит один раз — только если пачки включены
+    dp.message.middleware(
+        ThrottlingMiddleware(forward_batcher=forward_batcher if settings.FORWARD_BATCH_ENABLED else None)
+    )
+    # User sync — создаёт/обновляет пользователя в БД.
+    # Один экземпляр на message и callback_query — общий кэш пользователей.
+    user_sync_middleware = UserSyncMiddleware()
+    dp.message.middleware(user_sync_middleware)
+    dp.callback_query.middleware(user_sync_middleware)
+
+
+async def shutdown_middlewares() -> None:
+    """
+    Flush state buffered by middlewares and handlers (must run before the DB is closed).
+    """
+    from app.bot.handlers.message import forward_batcher
+
+    # Недособранные пачки пересланных отправляем сейчас, пока сессия бота открыта
+    await forward_batcher.close()
+    if user_sync_middleware is not None:
+        await user_sync_middleware.close()
 
@@ -1,5 +1,5 @@
+from .tenant import TenantMiddleware
 from .throttling import ThrottlingMiddleware
 from .user_sync import UserSyncMiddleware
 
-__all__ = ["ThrottlingMiddleware", "UserSyncMiddleware"]
-
+__all__ = ["TenantMiddleware", "ThrottlingMiddleware", "UserSyncMiddleware"]
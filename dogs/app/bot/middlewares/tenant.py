@@ -0,0 +1,36 @@
+"""
+Resolves the tenant (which of the process's bots received the update).
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+import structlog
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject
+
+from app.core.tenants import TenantConfig, use_tenant
+
+
+class TenantMiddleware(BaseMiddleware):
+    """
+    Outer update middleware: puts ``tenant`` into handler data and makes it current
+    (contextvar) for the LLM service, analytics and logs.
+    """
+
+    def __init__(self, tenants: Iterable[TenantConfig]) -> None:
+        self._by_bot_id = {tenant.bot_id: tenant for tenant in tenants}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        bot: Bot = data["bot"]
+        tenant = self._by_bot_id.get(bot.id)
+        if tenant is None:
+            # Бот не из конфигурации (например, подменённый в тестах) — обрабатываем как раньше
+            return await handler(event, data)
+        data["tenant"] = tenant
+        with use_tenant(tenant), structlog.contextvars.bound_contextvars(tenant=tenant.name):
+            return await handler(event, data)
@@ -2,38 +2,80 @@
 Rate limiting middleware to protect from spam.
 """
 
-import time
-from collections import defaultdict
-from typing import Any, Awaitable, Callable, Dict
+import asyncio
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
 
 import structlog
 from aiogram import BaseMiddleware
 from aiogram.types import Message, TelegramObject
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.ratelimit import (
+    GCRARateLimiter,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    SQLiteRateLimitBackend,
+)
+from app.core.tenants import DEFAULT_TENANT, TenantConfig
+
+if TYPE_CHECKING:
+    from app.bot.batching import ForwardBatcher
 
 log = structlog.get_logger("ThrottlingMiddleware")
 
-# AICODE-NOTE: Используем in-memory хранилище для MVP.
-# В продакшене заменить на Redis для персистентности между перезапусками.
+# AICODE-NOTE: GCRA хранит одно число на пользователя, idle-ключи периодически
+# вычищаются. Для нескольких процессов бота используем RATE_LIMIT_BACKEND=sqlite.
+
+
+def build_rate_limit_backend() -> RateLimitBackend:
+    """
+    Create the rate limit backend configured in settings.
+    """
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimitBackend(settings.RATE_LIMIT_SQLITE_PATH)
+    return MemoryRateLimitBackend()
 
 
 class ThrottlingMiddleware(BaseMiddleware):
     """
     Middleware that limits the number of requests per user within a time window.
-    
-    Admins are exempt from rate limiting.
+
+    Admins are exempt from rate limiting. A burst of forwarded messages counts as one
+    request: forwards joining a batch that is already being collected are not limited.
+    Tenants with their own ``rate_limit_*`` get their own limiter over the shared backend.
     """
 
     def __init__(
         self,
         max_requests: int | None = None,
         period_seconds: int | None = None,
+        backend: RateLimitBackend | None = None,
+        forward_batcher: Optional["ForwardBatcher"] = None,
     ) -> None:
         self.max_requests = max_requests or settings.RATE_LIMIT_REQUESTS
         self.period_seconds = period_seconds or settings.RATE_LIMIT_PERIOD
-        # user_id -> list of timestamps
-        self._requests: Dict[int, list[float]] = defaultdict(list)
+        self.backend = backend or build_rate_limit_backend()
+        self.limiter = GCRARateLimiter(
+            max_requests=self.max_requests,
+            period_seconds=self.period_seconds,
+            backend=self.backend,
+        )
+        self._tenant_limiters: dict[str, GCRARateLimiter] = {}
+        self._admin_ids = settings.admin_ids_set
+        self._forward_batcher = forward_batcher
+
+    def _limiter_for(self, tenant: Optional[TenantConfig]) -> GCRARateLimiter:
+        if tenant is None or (tenant.rate_limit_requests is None and tenant.rate_limit_period is None):
+            return self.limiter
+        limiter = self._tenant_limiters.get(tenant.name)
+        if limiter is None:
+            limiter = self._tenant_limiters[tenant.name] = GCRARateLimiter(
+                max_requests=tenant.rate_limit_requests or self.max_requests,
+                period_seconds=tenant.rate_limit_period or self.period_seconds,
+                backend=self.backend,
+            )
+        return limiter
 
     async def __call__(
         self,
@@ -51,51 +93,54 @@ class ThrottlingMiddleware(BaseMiddleware):
         user_id = user.id
 
         # Админы не ограничиваются
-        if user_id in settings.admin_ids_list:
+        if user_id in self._admin_ids:
             return await handler(event, data)
 
-        # Проверяем rate limit
-        if self._is_rate_limited(user_id):
+        # Пачка пересланных — один запрос: лимит списан на её первом сообщении,
+        # остальные ждут, пропустил ли его лимит
+        burst_admitted: Optional[asyncio.Future[bool]] = None
+        if self._forward_batcher is not None and event.forward_origin is not None:
+            while True:
+                burst_admitted, opened = self._forward_batcher.join_burst(event)
+                if opened:
+                    break
+                if await burst_admitted:
+                    return await handler(event, data)
+
+        # Проверяем rate limit; у каждого бота свой счётчик пользователя
+        tenant: Optional[TenantConfig] = data.get("tenant")
+        limiter = self._limiter_for(tenant)
+        key = user_id if tenant is None or tenant.name == DEFAULT_TENANT else f"{tenant.name}:{user_id}"
+        allowed = False
+        try:
+            result = await limiter.hit(key)
+            allowed = result.allowed
+        finally:
+            if burst_admitted is not None and not burst_admitted.done():
+                # Ошибка бэкенда — как отказ: пачка не открывается без списания
+                burst_admitted.set_result(allowed)
+        metrics.inc("rate_limit_checks_total", result="allowed" if allowed else "limited")
+        if not allowed:
             log.warning(
                 "User rate limited",
                 user_id=user_id,
                 username=user.username,
+                retry_after=round(result.retry_after, 1),
             )
             await event.answer(
                 "⏳ <b>Слишком много запросов!</b>\n\n"
-                f"Подождите немного. Лимит: {self.max_requests} запросов "
-                f"за {self.period_seconds} секунд.",
+                f"Подождите немного. Лимит: {limiter.max_requests} запросов "
+                f"за {limiter.period_seconds} секунд.",
             )
             return None
 
-        # Записываем запрос
-        self._record_request(user_id)
         return await handler(event, data)
 
-    def _is_rate_limited(self, user_id: int) -> bool:
-        """Check if user has exceeded the rate limit."""
-        now = time.time()
-        cutoff = now - self.period_seconds
-
-        # Очищаем старые записи
-        self._requests[user_id] = [
-            ts for ts in self._requests[user_id] if ts > cutoff
-        ]
-
-        return len(self._requests[user_id]) >= self.max_requests
-
-    def _record_request(self, user_id: int) -> None:
-        """Record a new request for the user."""
-        self._requests[user_id].append(time.time())
-
-    def get_user_stats(self, user_id: int) -> Dict[str, Any]:
+    async def get_user_stats(self, user_id: int) -> Dict[str, Any]:
         """Get rate limit stats for a user (for debugging)."""
-        now = time.time()
-        cutoff = now - self.period_seconds
-        recent = [ts for ts in self._requests[user_id] if ts > cutoff]
+        remaining = await self.limiter.remaining(user_id)
         return {
-            "requests_in_window": len(recent),
+            "requests_in_window": self.max_requests - remaining,
             "max_requests": self.max_requests,
-            "remaining": max(0, self.max_requests - len(recent)),
+            "remaining": remaining,
         }
-
@@ -2,22 +2,106 @@
 Middleware for automatic user synchronization with database.
 """
 
-from typing import Any, Awaitable, Callable, Dict
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 import structlog
 from aiogram import BaseMiddleware
-from aiogram.types import CallbackQuery, Message, TelegramObject, Update, User
+from aiogram.types import CallbackQuery, Message, TelegramObject, User
+from tortoise.transactions import in_transaction
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.database.models import User as DBUser
 
 log = structlog.get_logger("UserSyncMiddleware")
 
+Profile = Tuple[Optional[str], Optional[str]]
+
+
+def _profile_hash(username: Optional[str], full_name: Optional[str]) -> int:
+    return hash((username, full_name))
+
+
+class ProfileWriteBehind:
+    """
+    Coalesces profile updates and writes them to the DB in periodic batches.
+    """
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        # telegram_id -> последний профиль; повторные изменения схлопываются
+        self._pending: Dict[int, Profile] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def schedule(self, telegram_id: int, username: Optional[str], full_name: Optional[str]) -> None:
+        self._pending[telegram_id] = (username, full_name)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            async with in_transaction():
+                for telegram_id, (username, full_name) in batch.items():
+                    await DBUser.filter(telegram_id=telegram_id).update(
+                        username=username,
+                        full_name=full_name,
+                    )
+            metrics.inc("user_sync_db_queries_total", len(batch))
+            log.debug("Flushed user profile updates", users=len(batch))
+        except asyncio.CancelledError:
+            # Отмена посреди транзакции (например, из close()) не должна терять пакет
+            self._requeue(batch)
+            raise
+        except Exception as e:
+            self._requeue(batch)
+            log.error("Failed to flush user profile updates", users=len(batch), error=str(e))
+
+    def _requeue(self, batch: Dict[int, Profile]) -> None:
+        # Возвращаем в очередь, если за это время не пришло более свежее значение
+        for telegram_id, profile in batch.items():
+            self._pending.setdefault(telegram_id, profile)
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
 
 class UserSyncMiddleware(BaseMiddleware):
     """
-    Middleware that creates or updates User in DB on every incoming update.
+    Middleware that creates or updates User in DB on incoming updates.
+
+    Returning users are served from an in-process LRU/TTL cache; the DB is
+    touched only on a cache miss, and profile changes are written behind in batches.
     """
 
+    def __init__(
+        self,
+        cache_size: int | None = None,
+        cache_ttl: float | None = None,
+        flush_interval: float | None = None,
+    ) -> None:
+        # telegram_id -> (DBUser, hash профиля)
+        self._cache: TTLCache[Tuple[DBUser, int]] = TTLCache(
+            maxsize=cache_size or settings.USER_CACHE_SIZE,
+            ttl=cache_ttl or settings.USER_CACHE_TTL,
+        )
+        self._writer = ProfileWriteBehind(flush_interval or settings.USER_SYNC_FLUSH_INTERVAL)
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
@@ -39,18 +123,62 @@ class UserSyncMiddleware(BaseMiddleware):
 
     async def _sync_user(self, tg_user: User) -> DBUser:
         """
-        Create or update user in database.
+        Return the DB user, creating it on first contact and scheduling profile updates.
         """
-        # AICODE-NOTE: Используем update_or_create для атомарной операции.
-        # Поля username и full_name могут меняться, поэтому обновляем их.
-        db_user, created = await DBUser.update_or_create(
+        username = tg_user.username
+        full_name = tg_user.full_name
+        profile_hash = _profile_hash(username, full_name)
+
+        cached = self._cache.get(tg_user.id)
+        if cached is not None:
+            metrics.inc("user_sync_cache_total", result="hit")
+            db_user, cached_hash = cached
+            if cached_hash != profile_hash:
+                self._apply_profile(db_user, username, full_name, profile_hash)
+            return db_user
+
+        metrics.inc("user_sync_cache_total", result="miss")
+        metrics.inc("user_sync_db_queries_total")
+        # AICODE-NOTE: get_or_create безопасен при гонке двух апдейтов от нового пользователя.
+        db_user, created = await DBUser.get_or_create(
             telegram_id=tg_user.id,
             defaults={
-                "username": tg_user.username,
-                "full_name": tg_user.full_name,
+                "username": username,
+                "full_name": full_name,
             },
         )
         if created:
-            log.info("New user created", telegram_id=tg_user.id, username=tg_user.username)
+            log.info("New user created", telegram_id=tg_user.id, username=username)
+            self._cache.set(tg_user.id, (db_user, profile_hash))
+        else:
+            self._apply_profile(
+                db_user,
+                username,
+                full_name,
+                profile_hash,
+                changed=(db_user.username, db_user.full_name) != (username, full_name),
+            )
         return db_user
 
+    def _apply_profile(
+        self,
+        db_user: DBUser,
+        username: Optional[str],
+        full_name: Optional[str],
+        profile_hash: int,
+        changed: bool = True,
+    ) -> None:
+        """
+        Update cached user in place and queue a DB write if the profile changed.
+        """
+        if changed:
+            db_user.username = username
+            db_user.full_name = full_name
+            self._writer.schedule(db_user.telegram_id, username, full_name)
+        self._cache.set(db_user.telegram_id, (db_user, profile_hash))
+
+    async def close(self) -> None:
+        """
+        Flush pending profile updates (call on shutdown, before closing the DB).
+        """
+        await self._writer.close()
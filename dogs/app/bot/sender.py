@@ -0,0 +1,170 @@
+"""
+Outbound Bot API layer: flood-limit aware request middleware and call accounting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import structlog
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+log = structlog.get_logger("OutboundSender")
+
+# AICODE-NOTE: Лимиты Telegram: ~30 запросов/сек на бота, ~1 сообщение/сек
+# в личный чат и ~20 сообщений/мин в группу. Корзины позволяют короткие всплески.
+_CHAT_BURST = 3
+_MAX_TRACKED_CHATS = 10_000
+
+
+class TokenBucket:
+    """
+    Reservation-based token bucket: callers take a token and sleep for the returned delay.
+    """
+
+    __slots__ = ("rate", "capacity", "_tokens", "_updated")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Consume one token and return how long the caller has to wait for it.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+@dataclass(slots=True)
+class ApiCallCounter:
+    calls: int = 0
+
+
+_call_counter: ContextVar[Optional[ApiCallCounter]] = ContextVar("bot_api_call_counter", default=None)
+
+
+@contextmanager
+def count_api_calls() -> Iterator[ApiCallCounter]:
+    """
+    Count Bot API calls issued from the current context (including spawned tasks).
+    """
+    counter = ApiCallCounter()
+    token = _call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _call_counter.reset(token)
+
+
+class OutboundRateLimiter(BaseRequestMiddleware):
+    """
+    Session middleware that applies global and per-chat token buckets to every
+    Bot API call and transparently retries on flood control (``retry_after``).
+    """
+
+    def __init__(
+        self,
+        global_rate: float | None = None,
+        private_chat_rate: float | None = None,
+        group_chat_rate: float | None = None,
+        max_retries: int | None = None,
+    ) -> None:
+        self.global_bucket = TokenBucket(
+            rate=global_rate or settings.TG_GLOBAL_RATE,
+            capacity=global_rate or settings.TG_GLOBAL_RATE,
+        )
+        self.private_chat_rate = private_chat_rate or settings.TG_PRIVATE_CHAT_RATE
+        self.group_chat_rate = group_chat_rate or settings.TG_GROUP_CHAT_RATE
+        self.max_retries = max_retries if max_retries is not None else settings.TG_RETRY_ATTEMPTS
+        self._chat_buckets: OrderedDict[int | str, TokenBucket] = OrderedDict()
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        # Long polling is not subject to flood limits and must never be delayed.
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+
+        method_name = type(method).__name__
+        counter = _call_counter.get()
+        attempt = 0
+        while True:
+            await self._wait_for_slot(getattr(method, "chat_id", None))
+            if counter is not None:
+                counter.calls += 1
+            metrics.inc("bot_api_calls_total", method=method_name)
+            # Горячий путь: debug-события семплируются (LOG_DEBUG_SAMPLE_RATE)
+            log.debug("Bot API call", method=method_name, attempt=attempt)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                metrics.inc("bot_api_retry_after_total", method=method_name)
+                if attempt > self.max_retries:
+                    raise
+                log.warning(
+                    "Flood control hit, retrying",
+                    method=method_name,
+                    retry_after=e.retry_after,
+                    attempt=attempt,
+                )
+                await asyncio.sleep(e.retry_after)
+
+    async def _wait_for_slot(self, chat_id: int | str | None) -> None:
+        delay = self.global_bucket.reserve()
+        if chat_id is not None:
+            delay = max(delay, self._chat_bucket(chat_id).reserve())
+        if delay > 0:
+            metrics.observe("bot_api_throttle_delay_seconds", delay)
+            await asyncio.sleep(delay)
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is not None:
+            self._chat_buckets.move_to_end(chat_id)
+            return bucket
+
+        is_group = isinstance(chat_id, str) or chat_id < 0
+        bucket = TokenBucket(
+            rate=self.group_chat_rate if is_group else self.private_chat_rate,
+            capacity=_CHAT_BURST,
+        )
+        self._chat_buckets[chat_id] = bucket
+        if len(self._chat_buckets) > _MAX_TRACKED_CHATS:
+            self._chat_buckets.popitem(last=False)
+        return bucket
+
+
+async def get_bot_username(bot: Bot) -> str:
+    """
+    Return the bot username from the identity cached at startup (no API call).
+    """
+    me = await bot.me()
+    return me.username or "SummarizerBot"
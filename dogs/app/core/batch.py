@@ -0,0 +1,472 @@
+"""
+Headless batch summarization: URLs or texts from a file or stdin, one per line, summarized
+with the bot's parsers and LLM service and written to JSONL as each item finishes.
+
+Telegram, the bot token and the database are not needed. Re-running with the same output
+resumes: items recorded in the checkpoint file are skipped.
+
+Usage:
+    python -m app.core.batch links.txt -o summaries.jsonl
+    cat links.txt | python -m app.core.batch - -o summaries.jsonl \
+        --fetch-concurrency 16 --llm-concurrency 4 --price gpt-4o-mini=0.15,0.60
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+import structlog
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, request_deadline, stage
+from app.core.llm.service import get_llm_service
+from app.core.llm.types import SummaryPayload
+from app.core.parsers.base import BaseParser
+from app.core.parsers.exceptions import ExtractionError, ParserError
+from app.core.parsers.guard import parser_guard
+from app.core.parsers.router import canonical_url, detect_content_type, select_parser
+from app.core.parsers.types import ContentType, ParsedContent
+from app.core.parsers.web import WebParser
+from app.core.parsers.youtube import YouTubeParser
+
+log = structlog.get_logger("BatchSummarizer")
+
+# AICODE-NOTE: Порядок записи — сначала строка результата (flush), потом строка
+# чекпоинта. Падение между ними даёт повтор элемента при следующем запуске, но не
+# потерю: доставка at-least-once, потребитель берёт последнюю запись по "id".
+# Модуль не импортирует aiogram и app.bot — CLI работает без токена бота.
+_READ_CHUNK = 64 * 1024  # Байт входа за одно чтение в потоке
+_PROGRESS_EVERY = 100  # Элементов между строками прогресса в логе
+_TEXT_TITLE = "Текст от пользователя"
+_STOP = None
+
+PARSERS: list[BaseParser] = [
+    YouTubeParser(),
+    WebParser(),
+]
+
+
+@dataclass(slots=True)
+class BatchItem:
+    key: str  # sha1 канонической ссылки или текста: один и тот же вход — одна запись
+    payload: str
+    parsed: Optional[ParsedContent] = None
+    fetch_ms: float = 0.0
+    error: Optional[BaseException] = None
+
+
+@dataclass(slots=True)
+class ModelUsage:
+    items: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: Optional[float] = None
+
+
+@dataclass(slots=True)
+class BatchStats:
+    ok: int = 0
+    errors: int = 0
+    skipped: int = 0  # Уже есть в чекпоинте или повтор строки во входе
+    fetch_ms: List[float] = field(default_factory=list)
+    llm_ms: List[float] = field(default_factory=list)
+    errors_by_type: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    models: Dict[str, ModelUsage] = field(default_factory=lambda: defaultdict(ModelUsage))
+
+
+def item_key(payload: str) -> str:
+    """
+    Stable id of an input line; the same page shared with different tracking parameters maps to one id.
+    """
+    if detect_content_type(payload) != ContentType.TEXT:
+        payload = canonical_url(payload)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def parse_price(value: str) -> Tuple[str, Tuple[float, float]]:
+    """
+    ``MODEL=INPUT,OUTPUT`` in USD per 1M tokens, e.g. ``gpt-4o-mini=0.15,0.60``.
+    """
+    model, _, prices = value.partition("=")
+    try:
+        prompt_price, completion_price = (float(price) for price in prices.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected MODEL=INPUT,OUTPUT, got {value!r}") from None
+    if not model:
+        raise argparse.ArgumentTypeError(f"expected MODEL=INPUT,OUTPUT, got {value!r}")
+    return model, (prompt_price, completion_price)
+
+
+def _drop_partial_line(path: Path) -> None:
+    # Запуск, убитый посреди записи, оставляет обрезанную последнюю строку
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    with path.open("rb+") as file:
+        data = file.read()
+        if data.endswith(b"\n"):
+            return
+        file.truncate(data.rfind(b"\n") + 1)
+    log.warning("Dropped a partial last line", path=str(path))
+
+
+class Checkpoint:
+    """
+    Append-only ``key<TAB>status`` file of finished items; the last status of a key wins.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: Dict[str, str] = {}
+        _drop_partial_line(path)
+        if path.exists():
+            with path.open(encoding="utf-8") as file:
+                for line in file:
+                    key, _, status = line.rstrip("\n").partition("\t")
+                    if key:
+                        self.done[key] = status
+        self._file = path.open("a", encoding="utf-8")
+
+    def should_skip(self, key: str, retry_errors: bool) -> bool:
+        status = self.done.get(key)
+        if status is None:
+            return False
+        return status == "ok" or not retry_errors
+
+    def record(self, key: str, status: str) -> None:
+        self.done[key] = status
+        self._file.write(f"{key}\t{status}\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class BatchSummarizer:
+    """
+    Producer -> ``fetch_concurrency`` parse workers -> ``llm_concurrency`` LLM workers -> one writer.
+
+    Queues between the stages are bounded, so memory stays flat whatever the input size and
+    slow LLM calls hold back fetching instead of piling up parsed documents.
+    """
+
+    def __init__(
+        self,
+        output: Path,
+        checkpoint: Checkpoint,
+        *,
+        fetch_concurrency: int = 8,
+        llm_concurrency: int = 4,
+        deadline: float | None = None,
+        retry_errors: bool = False,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> None:
+        self.output = output
+        self.checkpoint = checkpoint
+        self.fetch_concurrency = fetch_concurrency
+        self.llm_concurrency = llm_concurrency
+        self.deadline = deadline or settings.REQUEST_DEADLINE
+        self.retry_errors = retry_errors
+        self.prices = prices or {}
+        self.stats = BatchStats()
+        self.started = time.perf_counter()
+        self._seen: set[str] = set()
+        self._fetch_queue: asyncio.Queue[Optional[BatchItem]] = asyncio.Queue(maxsize=fetch_concurrency * 2)
+        self._llm_queue: asyncio.Queue[Optional[BatchItem]] = asyncio.Queue(maxsize=llm_concurrency * 2)
+        self._write_queue: asyncio.Queue[Optional[Dict[str, Any]]] = asyncio.Queue(maxsize=llm_concurrency * 4)
+
+    async def run(self, source: IO[str]) -> BatchStats:
+        _drop_partial_line(self.output)
+        with self.output.open("ab") as out:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._write(out))
+                tg.create_task(self._llm_stage())
+                tg.create_task(self._fetch_stage())
+                tg.create_task(self._produce(source))
+        return self.stats
+
+    async def _produce(self, source: IO[str]) -> None:
+        while lines := await asyncio.to_thread(source.readlines, _READ_CHUNK):
+            for line in lines:
+                payload = line.strip()
+                if not payload or payload.startswith("#"):
+                    continue
+                error: Optional[ValueError] = None
+                try:
+                    key = item_key(payload)
+                except ValueError as e:
+                    # Одна кривая строка не должна ронять весь прогон: ключ — хэш сырой строки
+                    key = hashlib.sha1(payload.encode()).hexdigest()[:16]
+                    error = e
+                if key in self._seen or self.checkpoint.should_skip(key, self.retry_errors):
+                    self.stats.skipped += 1
+                    continue
+                self._seen.add(key)
+                if error is not None:
+                    # Сразу в очередь LLM-стадии: она пишет запись со status="error"
+                    await self._llm_queue.put(BatchItem(key=key, payload=payload, error=error))
+                    continue
+                await self._fetch_queue.put(BatchItem(key=key, payload=payload))
+        for _ in range(self.fetch_concurrency):
+            await self._fetch_queue.put(_STOP)
+
+    async def _fetch_stage(self) -> None:
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(self.fetch_concurrency):
+                tg.create_task(self._fetch_worker())
+        for _ in range(self.llm_concurrency):
+            await self._llm_queue.put(_STOP)
+
+    async def _fetch_worker(self) -> None:
+        while (item := await self._fetch_queue.get()) is not _STOP:
+            started = time.perf_counter()
+            try:
+                with request_deadline(self.deadline):
+                    item.parsed = await self._parse(item.payload)
+            except (ParserError, DeadlineExceeded) as e:
+                item.error = e
+            except Exception as e:
+                log.exception("Unexpected parsing error", key=item.key)
+                item.error = e
+            item.fetch_ms = (time.perf_counter() - started) * 1000
+            await self._llm_queue.put(item)
+
+    async def _parse(self, payload: str) -> ParsedContent:
+        try:
+            content_type = detect_content_type(payload)
+        except ValueError as e:
+            raise ExtractionError(f"Invalid input: {e}", "content") from e
+        if content_type == ContentType.TEXT:
+            return ParsedContent(type=ContentType.TEXT, title=_TEXT_TITLE, body=payload)
+        parser = select_parser(payload, PARSERS)
+        async with stage("parse"):
+            return await parser_guard.parse(parser, payload)
+
+    async def _llm_stage(self) -> None:
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(self.llm_concurrency):
+                tg.create_task(self._llm_worker())
+        await self._write_queue.put(_STOP)
+
+    async def _llm_worker(self) -> None:
+        llm_service = get_llm_service()
+        while (item := await self._llm_queue.get()) is not _STOP:
+            if item.error is not None or item.parsed is None:
+                await self._write_queue.put(self._error_record(item, item.error))
+                continue
+            parsed = item.parsed
+            started = time.perf_counter()
+            try:
+                # Свой бюджет на LLM: ожидание в очереди после загрузки в него не входит
+                with request_deadline(self.deadline):
+                    result = await llm_service.summarize(
+                        SummaryPayload(
+                            content=parsed.body,
+                            title=parsed.title,
+                            content_type=parsed.type,
+                            source_url=parsed.source_url,
+                            metadata=parsed.metadata,
+                        )
+                    )
+            except Exception as e:
+                if not isinstance(e, DeadlineExceeded):
+                    log.warning("LLM call failed", key=item.key, error=str(e))
+                await self._write_queue.put(self._error_record(item, e))
+                continue
+            llm_ms = (time.perf_counter() - started) * 1000
+            await self._write_queue.put(
+                self._record(
+                    item,
+                    status="ok",
+                    summary=result.text,
+                    model=result.model,
+                    tier=result.tier,
+                    prompt_tokens=result.tokens.prompt,
+                    completion_tokens=result.tokens.completion,
+                    cost_usd=self._cost(result.model, result.tokens.prompt, result.tokens.completion),
+                    llm_ms=round(llm_ms, 1),
+                )
+            )
+
+    def _cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+        price = self.prices.get(model)
+        if price is None:
+            return None
+        return round((prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000, 6)
+
+    def _record(self, item: BatchItem, **fields: Any) -> Dict[str, Any]:
+        parsed = item.parsed
+        return {
+            "id": item.key,
+            "input": item.payload,
+            "content_type": parsed.type.value if parsed else None,
+            "title": parsed.title if parsed else None,
+            "source_url": parsed.source_url if parsed else None,
+            "fetch_ms": round(item.fetch_ms, 1),
+            **fields,
+        }
+
+    def _error_record(self, item: BatchItem, error: Optional[BaseException]) -> Dict[str, Any]:
+        return self._record(
+            item,
+            status="error",
+            error_type=type(error).__name__ if error else None,
+            error=str(error) if error else None,
+        )
+
+    async def _write(self, out: IO[bytes]) -> None:
+        while (record := await self._write_queue.get()) is not _STOP:
+            out.write(orjson.dumps(record) + b"\n")
+            out.flush()
+            self.checkpoint.record(record["id"], record["status"])
+            self._account(record)
+        os.fsync(out.fileno())
+
+    def _account(self, record: Dict[str, Any]) -> None:
+        stats = self.stats
+        stats.fetch_ms.append(record["fetch_ms"])
+        if record["status"] == "ok":
+            stats.ok += 1
+            stats.llm_ms.append(record["llm_ms"])
+            usage = stats.models[record["model"]]
+            usage.items += 1
+            usage.prompt_tokens += record["prompt_tokens"]
+            usage.completion_tokens += record["completion_tokens"]
+            if record["cost_usd"] is not None:
+                usage.cost_usd = (usage.cost_usd or 0.0) + record["cost_usd"]
+        else:
+            stats.errors += 1
+            stats.errors_by_type[record["error_type"]] += 1
+        done = stats.ok + stats.errors
+        if done % _PROGRESS_EVERY == 0:
+            log.info("Batch progress", done=done, ok=stats.ok, errors=stats.errors, skipped=stats.skipped)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Throughput, latency percentiles and tokens/cost per model of this run (skipped items excluded).
+        """
+        stats = self.stats
+        elapsed = time.perf_counter() - self.started
+        done = stats.ok + stats.errors
+        models = {
+            model: {
+                "items": usage.items,
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "cost_usd": round(usage.cost_usd, 4) if usage.cost_usd is not None else None,
+            }
+            for model, usage in stats.models.items()
+        }
+        costs = [usage.cost_usd for usage in stats.models.values()]
+        return {
+            "ok": stats.ok,
+            "errors": stats.errors,
+            "skipped": stats.skipped,
+            "elapsed_s": round(elapsed, 2),
+            "items_per_s": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+            "fetch_ms": _percentiles(stats.fetch_ms),
+            "llm_ms": _percentiles(stats.llm_ms),
+            "errors_by_type": dict(stats.errors_by_type),
+            "models": models,
+            # Без --price для какой-то из моделей общая стоимость неизвестна
+            "cost_usd": round(sum(costs), 4) if costs and None not in costs else None,
+        }
+
+
+def _percentiles(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None}
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered), 1),
+        "p95": round(ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))], 1),
+    }
+
+
+def _print_report(report: Dict[str, Any], as_json: bool) -> None:
+    # Отчёт — в stderr: stdout занят логами
+    if as_json:
+        print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode(), file=sys.stderr)
+        return
+    lines = [
+        f"ok: {report['ok']}, errors: {report['errors']}, skipped: {report['skipped']}",
+        f"elapsed: {report['elapsed_s']} s, throughput: {report['items_per_s']} items/s",
+        f"fetch ms p50/p95: {report['fetch_ms']['p50']}/{report['fetch_ms']['p95']}, "
+        f"llm ms p50/p95: {report['llm_ms']['p50']}/{report['llm_ms']['p95']}",
+    ]
+    if report["errors_by_type"]:
+        lines.append("errors: " + ", ".join(f"{name}={count}" for name, count in report["errors_by_type"].items()))
+    for model, usage in report["models"].items():
+        cost = f"${usage['cost_usd']}" if usage["cost_usd"] is not None else "n/a (no --price)"
+        lines.append(
+            f"{model}: {usage['items']} items, {usage['prompt_tokens']} prompt + "
+            f"{usage['completion_tokens']} completion tokens, cost {cost}"
+        )
+    if report["cost_usd"] is not None:
+        lines.append(f"total cost: ${report['cost_usd']}")
+    print("\n".join(lines), file=sys.stderr)
+
+
+async def _main() -> None:
+    from app.core.logger import setup_logging
+
+    parser = argparse.ArgumentParser(
+        description="Summarize URLs or texts in bulk", formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input", help="File with one URL or text per line, '-' for stdin; '#' starts a comment")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="JSONL file, appended to")
+    parser.add_argument("--checkpoint", type=Path, help="Default: <output>.checkpoint")
+    parser.add_argument("--fetch-concurrency", type=int, default=8)
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--deadline", type=float, help="Seconds per fetch and per LLM call (REQUEST_DEADLINE)")
+    parser.add_argument("--retry-errors", action="store_true", help="Redo items that failed in earlier runs")
+    parser.add_argument(
+        "--price",
+        type=parse_price,
+        action="append",
+        default=[],
+        metavar="MODEL=IN,OUT",
+        help="USD per 1M prompt/completion tokens; repeat for each model",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the final report as JSON")
+    args = parser.parse_args()
+
+    setup_logging()
+    checkpoint = Checkpoint(args.checkpoint or args.output.with_name(args.output.name + ".checkpoint"))
+    batch = BatchSummarizer(
+        args.output,
+        checkpoint,
+        fetch_concurrency=args.fetch_concurrency,
+        llm_concurrency=args.llm_concurrency,
+        deadline=args.deadline,
+        retry_errors=args.retry_errors,
+        prices=dict(args.price),
+    )
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        await batch.run(source)
+    finally:
+        # Отчёт и при Ctrl-C: записанное уже в чекпоинте, следующий запуск продолжит
+        checkpoint.close()
+        if source is not sys.stdin:
+            source.close()
+        _print_report(batch.report(), args.json)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -1,10 +1,13 @@
-from typing import List, Literal, Optional
+from functools import cache, cached_property
+from typing import TYPE_CHECKING, Any, FrozenSet, List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr, model_validator
 
 
 class Settings(BaseSettings):
-    TG_TOKEN: SecretStr
+    TG_TOKEN: Optional[SecretStr] = None  # Бот по умолчанию (тенант "default")
+    # AICODE-NOTE: JSON-список тенантов (несколько ботов в одном процессе), см. app.core.tenants
+    TENANTS_FILE: str = ""
     OPENAI_API_KEY: Optional[SecretStr] = None
     ADMIN_IDS: str = ""  # Будет распаршено в список
     LLM_PROVIDER: Literal["openai", "anthropic"] = "openai"
@@ -19,9 +22,121 @@ class Settings(BaseSettings):
     # прямой API блокируется (403 Forbidden)
     ANTHROPIC_BASE_URL: str = "https://api.anthropic.com/v1"
 
+    # Tiered model routing (по размеру промпта в токенах)
+    LLM_ROUTING_ENABLED: bool = True  # False — одна модель и *_MAX_OUTPUT_TOKENS
+    LLM_FAST_MODEL: str = ""  # Быстрый тир для коротких входов (пусто — модель провайдера)
+    LLM_FAST_MAX_INPUT_TOKENS: int = 2_000  # Промпт до этого размера идёт в быстрый тир
+    LLM_LONG_MODEL: str = ""  # Тир с длинным контекстом (пусто — модель провайдера)
+    LLM_LONG_MIN_INPUT_TOKENS: int = 24_000  # Промпт от этого размера идёт в long-тир
+    LLM_OUTPUT_TOKENS_RATIO: float = 0.08  # Бюджет ответа как доля токенов промпта
+    LLM_OUTPUT_TOKENS_MIN: int = 700  # Нижняя граница: полный шаблон DEEP_ANALYSIS_PROMPT на русском
+    LLM_OUTPUT_TOKENS_MAX: int = 1_500  # Верхняя граница бюджета ответа
+
+    # Follow-up questions (ответ реплаем на саммари)
+    FOLLOWUP_ENABLED: bool = True
+    FOLLOWUP_STORE_MAX_BYTES: int = 64 * 1024 * 1024  # Бюджет сжатых документов в памяти
+    FOLLOWUP_TTL: int = 24 * 3600  # Сколько секунд документ доступен для вопросов
+    FOLLOWUP_ZSTD_LEVEL: int = 3  # Уровень сжатия zstd
+    FOLLOWUP_CHUNK_WORDS: int = 120  # Размер фрагмента для BM25 (слов)
+    FOLLOWUP_CHUNK_OVERLAP: int = 20  # Перекрытие соседних фрагментов (слов)
+    FOLLOWUP_TOP_K: int = 4  # Сколько фрагментов уходит в LLM
+    FOLLOWUP_MAX_OUTPUT_TOKENS: int = 500  # Бюджет ответа на вопрос
+
+    # RSS/Atom subscriptions
+    FEEDS_ENABLED: bool = True
+    FEED_POLL_TICK: float = 60.0  # Как часто ищем фиды, которые пора опросить (сек)
+    FEED_DEFAULT_INTERVAL: int = 3_600  # Стартовый интервал опроса фида (сек)
+    FEED_MIN_INTERVAL: int = 900  # Нижняя граница адаптивного интервала
+    FEED_MAX_INTERVAL: int = 86_400  # Верхняя граница (и предел backoff при ошибках)
+    FEED_MAX_NEW_ENTRIES: int = 10  # Новых записей за опрос (остальные пропускаются)
+    FEED_SUMMARY_CONCURRENCY: int = 3  # Параллельные саммари записей фидов
+    FEED_SUMMARY_MAX_ATTEMPTS: int = 5  # Попыток саммари записи до статуса error
+    FEED_MAX_SUBSCRIPTIONS: int = 20  # Подписок на пользователя
+    FEED_DIGEST_TICK: float = 60.0  # Как часто проверяем, кому пора слать дайджест (сек)
+
+    # Logging
+    LOG_FORMAT: Literal["console", "json"] = "console"  # json — для продакшена
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10_000  # Строк в очереди writer-потока (json)
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01  # Доля debug-событий, попадающих в лог
+
+    # Event loop health monitor
+    LOOP_MONITOR_INTERVAL: float = 0.5  # Период замера лага (сек)
+    LOOP_STALL_THRESHOLD: float = 0.25  # Лаг, начиная с которого фиксируем зависание
+    LOOP_ASYNCIO_DEBUG: bool = False  # asyncio debug + slow callbacks (дороже, для диагностики)
+
+    # Overload degradation: пороги сигналов, при которых давление = 1.0 (уровень 1)
+    OVERLOAD_ENABLED: bool = True
+    OVERLOAD_CHECK_INTERVAL: float = 1.0  # Период пересчёта уровня (сек)
+    OVERLOAD_LLM_IN_FLIGHT: int = 30  # LLM-вызовов, ждущих ответа провайдера
+    OVERLOAD_REQUESTS_IN_FLIGHT: int = 60  # Сообщений в обработке
+    OVERLOAD_LOOP_LAG: float = 0.2  # Лаг event loop (сек)
+    OVERLOAD_LLM_ERROR_RATE: float = 0.2  # Доля ошибок LLM за минуту
+    OVERLOAD_EXIT_RATIO: float = 0.7  # Ступень вниз — когда давление ниже порога уровня * ratio...
+    OVERLOAD_COOLDOWN: float = 30.0  # ...непрерывно столько секунд
+    OVERLOAD_OUTPUT_FACTOR: float = 0.5  # Доля бюджета ответа LLM начиная с уровня 1
+
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 5  # Максимум запросов за период
     RATE_LIMIT_PERIOD: int = 60  # Период в секундах
+    # AICODE-NOTE: sqlite — общий лимит для нескольких процессов бота на одном хосте
+    RATE_LIMIT_BACKEND: Literal["memory", "sqlite"] = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "ratelimit.sqlite3"
+
+    # User sync cache
+    USER_CACHE_SIZE: int = 10_000  # Пользователей в LRU-кэше
+    USER_CACHE_TTL: int = 3600  # Секунд до повторной сверки с БД
+    USER_SYNC_FLUSH_INTERVAL: float = 5.0  # Период пакетной записи профилей
+
+    # Analytics write-behind buffer
+    ANALYTICS_BUFFER_SIZE: int = 10_000  # Максимум записей в памяти
+    ANALYTICS_FLUSH_BATCH: int = 200  # Размер пакета INSERT (и триггер сброса)
+    ANALYTICS_FLUSH_INTERVAL: float = 2.0  # Сброс не реже, чем раз в N секунд
+    ANALYTICS_OVERFLOW_POLICY: Literal["drop_oldest", "drop_newest"] = "drop_oldest"
+    ANALYTICS_MAX_ATTEMPTS: int = 3  # Неудачных сбросов пакета до построчной записи и карантина
+
+    # Data retention (архивирование summary_requests)
+    RETENTION_DAYS: int = 90  # Сколько дней строки живут в горячей таблице (0 — отключено)
+    RETENTION_ARCHIVE_DIR: str = "archive"  # Каталог для CSV.gz-архивов по дням
+    RETENTION_BATCH_SIZE: int = 500  # Строк на одну транзакцию удаления
+    RETENTION_INTERVAL_HOURS: float = 24.0  # Период запуска задачи
+
+    # Multi-link messages
+    MAX_URLS_PER_MESSAGE: int = 10  # Сколько ссылок из одного сообщения обрабатываем
+    URL_CONCURRENCY: int = 3  # Параллельная обработка ссылок в одном сообщении
+
+    # Per-request deadline: общий бюджет на разбор и суммаризацию одного сообщения
+    REQUEST_DEADLINE: float = 60.0  # Секунд на одну ссылку/текст; для нескольких ссылок — на каждую волну
+
+    # Parser failures: negative cache per URL and circuit breaker per domain
+    PARSER_GUARD_ENABLED: bool = True
+    PARSER_FAILURE_CACHE_SIZE: int = 10_000  # Сколько URL с ошибками (и доменов) помним
+    PARSER_FAILURE_TTL_PERMANENT: int = 6 * 3600  # 401/403/404/410: пейволл, удалённая страница
+    PARSER_FAILURE_TTL_CONTENT: int = 3600  # Пустой текст статьи, нет субтитров
+    PARSER_FAILURE_TTL_TRANSIENT: int = 120  # 5xx, 429, таймауты и прочее
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Ошибок сайта подряд, после которых домен отключается
+    CIRCUIT_OPEN_SECONDS: float = 30.0  # Первое отключение домена; после неудачной пробы удваивается
+    CIRCUIT_MAX_OPEN_SECONDS: float = 600.0
+
+    # Forwarded message bursts
+    FORWARD_BATCH_ENABLED: bool = True
+    FORWARD_BATCH_WINDOW: float = 2.0  # Секунд тишины в чате, после которых пачка уходит в саммари
+    FORWARD_BATCH_MAX_SIZE: int = 30  # Пачка такого размера отправляется сразу
+
+    # OCR of photos and screenshots: tesseract in a pool of worker processes
+    OCR_ENABLED: bool = True
+    OCR_WORKERS: int = 2  # Процессов распознавания; каждый занимает ядро, пока работает
+    OCR_MAX_PENDING: int = 20  # Изображений в очереди, сверх которых отвечаем «занят»
+    OCR_LANGUAGES: str = "rus+eng"  # Языковые пакеты tesseract
+    OCR_MAX_SIDE: int = 2000  # Длинная сторона после уменьшения, px
+    OCR_TIMEOUT: float = 30.0  # Секунд на одно изображение, затем процесс tesseract убивается
+    OCR_MIN_CHARS: int = 20  # Меньше распознанных символов — «текст не найден»
+
+    # Outbound Bot API limits (flood control)
+    TG_GLOBAL_RATE: float = 30.0  # Запросов в секунду на бота
+    TG_PRIVATE_CHAT_RATE: float = 1.0  # Сообщений в секунду в личный чат
+    TG_GROUP_CHAT_RATE: float = 20 / 60  # Сообщений в секунду в группу
+    TG_RETRY_ATTEMPTS: int = 3  # Повторов после retry_after
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
@@ -29,7 +144,11 @@ class Settings(BaseSettings):
 
     @model_validator(mode="after")
     def validate_api_keys(self) -> "Settings":
-        """Проверяет, что API ключ для выбранного провайдера задан."""
+        """Проверяет, что API ключ для выбранного провайдера задан.
+
+        Токен бота проверяет load_tenants() при запуске бота: пакетному CLI
+        (app.core.batch) Telegram не нужен.
+        """
         if self.LLM_PROVIDER == "openai" and not self.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is required when LLM_PROVIDER=openai")
         if self.LLM_PROVIDER == "anthropic" and not self.ANTHROPIC_API_KEY:
@@ -45,5 +164,37 @@ class Settings(BaseSettings):
             return []
         return [int(x.strip()) for x in self.ADMIN_IDS.split(",") if x.strip()]
 
+    @cached_property
+    def admin_ids_set(self) -> FrozenSet[int]:
+        """Множество ID админов, вычисляется один раз (для горячего пути)."""
+        return frozenset(self.admin_ids_list)
+
+
+@cache
+def get_settings() -> Settings:
+    """Единственный экземпляр Settings, создаётся при первом обращении."""
+    return Settings()
+
+
+class _LazySettings:
+    """
+    Прокси к get_settings().
+
+    AICODE-NOTE: `from app.core.config import settings` больше не читает .env и
+    не валидирует ключи при импорте — модули (и тесты) импортируются без окружения,
+    ошибка конфигурации всплывает при первом чтении поля. Поэтому синглтоны модулей
+    (analytics, overload, parser_guard, ocr, ...) не читают settings в __init__:
+    значения из настроек — свойства, вычисляемые при первом обращении. Исключение —
+    app.bot.main: он создаёт Bot по токенам тенантов при импорте.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
 
-settings = Settings()
+if TYPE_CHECKING:
+    settings: Settings
+else:
+    settings = _LazySettings()
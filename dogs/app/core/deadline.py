@@ -0,0 +1,118 @@
+"""
+Per-request deadline shared by all pipeline stages through a context variable.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional
+
+from app.core.metrics import metrics
+
+# AICODE-NOTE: Работу в потоке (to_thread) отменить нельзя: отмена лишь перестаёт её ждать.
+# Поэтому таймауты внутри потоков (сокеты yt-dlp, urlopen) берутся из остатка бюджета
+# с небольшим запасом — asyncio-таймаут этапа срабатывает первым и называет этап,
+# а поток вскоре завершается сам.
+_THREAD_GRACE = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's time budget runs out; ``stage`` is where it happened."""
+
+    def __init__(self, stage: str, budget: float) -> None:
+        super().__init__(f"Deadline exceeded at stage '{stage}' ({budget:.0f}s budget)")
+        self.stage = stage
+        self.budget = budget
+
+
+@dataclass(slots=True, frozen=True)
+class Deadline:
+    expires_at: float  # time.monotonic()
+    budget: float
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+# Стек этапов внешнего stage() текущей задачи: при истечении бюджета берётся самый вложенный
+_stages: ContextVar[Optional[list[str]]] = ContextVar("deadline_stages", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[Deadline]:
+    """
+    Start a deadline for the current task; tasks spawned inside inherit it.
+    """
+    deadline = Deadline(expires_at=time.monotonic() + seconds, budget=seconds)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _deadline.get()
+
+
+def budget(cap: float) -> float:
+    """
+    Timeout for a stage's own client: ``cap`` limited by what is left of the deadline.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return cap
+    return max(0.001, min(cap, deadline.remaining() + _THREAD_GRACE))
+
+
+@asynccontextmanager
+async def stage(name: str) -> AsyncIterator[None]:
+    """
+    Run a pipeline stage under the current deadline and cancel it when the budget expires.
+
+    Raises DeadlineExceeded naming the innermost stage that was running. Without a
+    deadline (follow-up answers, benchmarks) this is a no-op.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        yield
+        return
+
+    stages = _stages.get()
+    if stages is not None:
+        # Вложенный этап: таймаут уже выставлен внешним, здесь только имя
+        stages.append(name)
+        try:
+            yield
+        except asyncio.CancelledError:
+            # Имя остаётся в стеке — внешний этап сообщит, где кончился бюджет
+            raise
+        except BaseException:
+            stages.pop()
+            raise
+        stages.pop()
+        return
+
+    if deadline.remaining() <= 0:
+        metrics.inc("deadline_exceeded_total", stage=name)
+        raise DeadlineExceeded(name, deadline.budget)
+
+    stages = [name]
+    token = _stages.set(stages)
+    timeout = asyncio.timeout(deadline.remaining())
+    try:
+        async with timeout:
+            yield
+    except TimeoutError as e:
+        if not timeout.expired():
+            # TimeoutError самого этапа (например, сокет), а не нашего бюджета
+            raise
+        metrics.inc("deadline_exceeded_total", stage=stages[-1])
+        raise DeadlineExceeded(stages[-1], deadline.budget) from e
+    finally:
+        _stages.reset(token)
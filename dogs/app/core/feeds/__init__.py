@@ -0,0 +1,20 @@
+from .digest import DigestSender, digest_sender
+from .parser import FeedItem, FeedParseError, ParsedFeed, parse_feed
+from .poller import FeedPoller, feed_poller, next_interval
+from .subscriptions import SubscriptionLimitError, list_subscriptions, subscribe, unsubscribe
+
+__all__ = [
+    "DigestSender",
+    "FeedItem",
+    "FeedParseError",
+    "FeedPoller",
+    "ParsedFeed",
+    "SubscriptionLimitError",
+    "digest_sender",
+    "feed_poller",
+    "list_subscriptions",
+    "next_interval",
+    "parse_feed",
+    "subscribe",
+    "unsubscribe",
+]
@@ -0,0 +1,206 @@
+"""
+Batched hourly/daily digests of summarized feed entries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from html import escape
+from typing import TYPE_CHECKING, Mapping, Optional
+
+import structlog
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from tortoise import timezone
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database.models import FeedEntry, Subscription
+
+from .subscriptions import SCHEDULE_PERIODS, remove_subscription
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+log = structlog.get_logger("DigestSender")
+
+# AICODE-NOTE: Лимит сообщения Telegram — 4096 символов; записи не режем посередине,
+# а раскладываем по сообщениям целиком (слишком длинная запись обрезается).
+# Саммари — сырой текст LLM: экранируем его, иначе один "<" ломает HTML всего сообщения.
+MESSAGE_LIMIT = 4000
+
+
+def format_entry(entry: FeedEntry, feed_title: str, limit: int = MESSAGE_LIMIT) -> str:
+    head = (
+        f"📰 <b>{escape(entry.title or feed_title)}</b>\n"
+        f"<i>{escape(feed_title)}</i> · {escape(entry.url)}\n\n"
+    )
+    # Обрезаем до экранирования, чтобы не разрезать сущность вроде &lt;
+    return head + escape((entry.summary or "")[: max(0, limit - len(head))])
+
+
+def pack_messages(header: str, blocks: list[str], limit: int = MESSAGE_LIMIT) -> list[tuple[str, int]]:
+    """
+    Greedily pack blocks into messages of at most ``limit`` characters. Each message comes
+    with the number of blocks delivered once it (and all before it) is sent.
+    """
+    messages: list[tuple[str, int]] = []
+    current = header
+    for index, block in enumerate(blocks):
+        block = block[:limit]
+        if len(current) + len(block) + 2 > limit and current:
+            messages.append((current, index))
+            current = block
+        else:
+            current = f"{current}\n\n{block}" if current else block
+    if current:
+        messages.append((current, len(blocks)))
+    return messages
+
+
+class DigestSender:
+    """
+    Sends each user one digest per bot for all of their due subscriptions with that bot.
+    """
+
+    def __init__(self, tick: float | None = None) -> None:
+        self._tick = tick
+        self._bots: Mapping[str, "Bot"] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def tick(self) -> float:
+        return self._tick or settings.FEED_DIGEST_TICK
+
+    def start(self, bots: Mapping[str, "Bot"]) -> None:
+        """
+        Start the digest loop; ``bots`` maps tenant names to the bots that deliver their digests.
+        """
+        if not settings.FEEDS_ENABLED:
+            return
+        self._bots = bots
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.send_due()
+            except Exception as e:
+                log.exception("Digest run failed", error=str(e))
+
+    async def send_due(self, bots: Optional[Mapping[str, "Bot"]] = None) -> int:
+        """
+        Send digests for subscriptions whose schedule is due. Returns messages sent.
+        """
+        bots = bots or self._bots
+        assert bots, "DigestSender.start(bots) was not called"
+        due = await Subscription.filter(next_digest_at__lte=timezone.now()).prefetch_related("feed", "user")
+        by_recipient: dict[tuple[int, str], list[Subscription]] = defaultdict(list)
+        for subscription in due:
+            by_recipient[subscription.user_id, subscription.tenant].append(subscription)
+
+        sent = 0
+        for (_, tenant), subscriptions in by_recipient.items():
+            bot = bots.get(tenant)
+            if bot is None:
+                # Тенант убран из TENANTS_FILE — подписки ждут, пока его не вернут
+                log.warning("Digest skipped: unknown tenant", tenant=tenant, subscriptions=len(subscriptions))
+                continue
+            sent += await self._send_user_digest(bot, subscriptions)
+        return sent
+
+    async def _collect(self, subscription: Subscription) -> list[FeedEntry]:
+        """
+        Summarized entries after the subscription's cursor, stopping before the first pending
+        one so that an entry summarized late is not skipped by the cursor.
+        """
+        pending = (
+            await FeedEntry.filter(feed_id=subscription.feed_id, status="pending", id__gt=subscription.last_entry_id)
+            .order_by("id")
+            .first()
+            .values_list("id", flat=True)
+        )
+        query = FeedEntry.filter(
+            feed_id=subscription.feed_id,
+            status="summarized",
+            id__gt=subscription.last_entry_id,
+        )
+        if pending is not None:
+            query = query.filter(id__lt=pending)
+        return await query.order_by("id")
+
+    async def _send_user_digest(self, bot: "Bot", subscriptions: list[Subscription]) -> int:
+        user = subscriptions[0].user
+        entries_by_subscription = [(s, await self._collect(s)) for s in subscriptions]
+        blocks = [
+            format_entry(entry, subscription.feed.title)
+            for subscription, entries in entries_by_subscription
+            for entry in entries
+        ]
+
+        sent = 0
+        # Сколько блоков уже у пользователя (или пропущено): курсор двигается за ними
+        delivered = 0
+        if blocks:
+            header = f"📬 <b>Дайджест подписок</b> — новых материалов: {len(blocks)}"
+            for text, upto in pack_messages(header, blocks):
+                try:
+                    await bot.send_message(user.telegram_id, text, disable_web_page_preview=True)
+                    sent += 1
+                except TelegramForbiddenError:
+                    # Пользователь заблокировал бота — подписки больше не нужны
+                    for subscription in subscriptions:
+                        await remove_subscription(subscription)
+                    log.info("Subscriptions removed: bot blocked", telegram_id=user.telegram_id)
+                    return sent
+                except TelegramBadRequest as e:
+                    # Повтор получит тот же отказ — записи этого сообщения пропускаем
+                    metrics.inc("feed_digest_rejected_total")
+                    log.warning("Digest message rejected", telegram_id=user.telegram_id, error=str(e))
+                except Exception as e:
+                    # Доставленное не повторяем; остаток и расписание — на следующем тике
+                    log.warning("Digest delivery failed", telegram_id=user.telegram_id, error=str(e))
+                    await self._advance(entries_by_subscription, delivered, reschedule=False)
+                    return sent
+                delivered = upto
+            metrics.inc("feed_digests_total")
+
+        await self._advance(entries_by_subscription, delivered, reschedule=True)
+        return sent
+
+    async def _advance(
+        self,
+        entries_by_subscription: list[tuple[Subscription, list[FeedEntry]]],
+        delivered: int,
+        reschedule: bool,
+    ) -> None:
+        """
+        Move each cursor past its entries among the first ``delivered`` blocks (blocks follow
+        subscriptions in order); with ``reschedule`` also set the next digest time.
+        """
+        now = timezone.now()
+        for subscription, entries in entries_by_subscription:
+            done = entries[:delivered]
+            delivered -= len(done)
+            fields = []
+            if done:
+                subscription.last_entry_id = done[-1].id
+                fields.append("last_entry_id")
+            if reschedule:
+                subscription.next_digest_at = now + SCHEDULE_PERIODS[subscription.schedule]
+                fields.append("next_digest_at")
+            if fields:
+                await subscription.save(update_fields=fields)
+
+
+digest_sender = DigestSender()
@@ -0,0 +1,145 @@
+"""
+Minimal RSS 2.0 / RSS 1.0 (RDF) / Atom parser on top of lxml.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Optional
+from urllib.parse import urljoin
+
+from lxml import etree, html
+
+from app.core.parsers.exceptions import ExtractionError
+
+# Внешние сущности и сеть отключены: фид — недоверенный вход
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+_SUMMARY_LIMIT = 4000
+
+
+class FeedParseError(ExtractionError):
+    """Raised when the payload is not an RSS/Atom feed."""
+
+
+@dataclass(slots=True)
+class FeedItem:
+    guid: str
+    url: str
+    title: str
+    summary: str  # Текст из description/summary без HTML (запасной вариант для саммари)
+    published_at: Optional[datetime]
+
+
+@dataclass(slots=True)
+class ParsedFeed:
+    title: str
+    items: list[FeedItem]
+
+
+def _local(element: etree._Element) -> str:
+    return etree.QName(element).localname if isinstance(element.tag, str) else ""
+
+
+def _children(element: etree._Element, name: str) -> Iterator[etree._Element]:
+    return (child for child in element if _local(child) == name)
+
+
+def _text(element: etree._Element, *names: str) -> str:
+    for name in names:
+        for child in _children(element, name):
+            if child.text and child.text.strip():
+                return child.text.strip()
+    return ""
+
+
+def _strip_html(markup: str) -> str:
+    if not markup:
+        return ""
+    try:
+        text = html.fromstring(markup).text_content()
+    except (etree.ParserError, ValueError):
+        text = markup
+    return " ".join(text.split())[:_SUMMARY_LIMIT]
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _atom_link(entry: etree._Element) -> str:
+    fallback = ""
+    for link in _children(entry, "link"):
+        href = link.get("href", "")
+        if link.get("rel", "alternate") == "alternate" and href:
+            return href
+        fallback = fallback or href
+    return fallback
+
+
+def _rss_item(item: etree._Element, base_url: str) -> Optional[FeedItem]:
+    link = _text(item, "link")
+    guid = _text(item, "guid") or link
+    if not guid:
+        return None
+    return FeedItem(
+        guid=guid[:512],
+        url=urljoin(base_url, link or guid),
+        title=_strip_html(_text(item, "title"))[:512],
+        summary=_strip_html(_text(item, "encoded", "description")),
+        published_at=_parse_date(_text(item, "pubDate", "date")),
+    )
+
+
+def _atom_entry(entry: etree._Element, base_url: str) -> Optional[FeedItem]:
+    link = _atom_link(entry)
+    guid = _text(entry, "id") or link
+    if not guid:
+        return None
+    return FeedItem(
+        guid=guid[:512],
+        url=urljoin(base_url, link or guid),
+        title=_strip_html(_text(entry, "title"))[:512],
+        summary=_strip_html(_text(entry, "content", "summary")),
+        published_at=_parse_date(_text(entry, "published", "updated")),
+    )
+
+
+def parse_feed(content: bytes, base_url: str) -> ParsedFeed:
+    """
+    Parse a feed document. Items keep the feed's order (usually newest first).
+    """
+    try:
+        root = etree.fromstring(content, _XML_PARSER)
+    except etree.XMLSyntaxError as e:
+        raise FeedParseError(f"Not an XML feed: {e}") from e
+    if root is None:
+        raise FeedParseError("Empty feed document")
+
+    kind = _local(root)
+    if kind == "feed":
+        items = [_atom_entry(entry, base_url) for entry in _children(root, "entry")]
+        title = _text(root, "title")
+    elif kind in ("rss", "RDF"):
+        channel = next(_children(root, "channel"), root)
+        # RSS 2.0: item внутри channel; RSS 1.0: item — соседи channel
+        elements = list(_children(channel, "item")) or list(_children(root, "item"))
+        items = [_rss_item(item, base_url) for item in elements]
+        title = _text(channel, "title")
+    else:
+        raise FeedParseError(f"Unsupported feed format: <{kind}>")
+
+    return ParsedFeed(
+        title=_strip_html(title)[:255] or base_url,
+        items=[item for item in items if item is not None],
+    )
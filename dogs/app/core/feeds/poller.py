@@ -0,0 +1,276 @@
+"""
+Background poller: conditional fetches of subscribed feeds with adaptive intervals,
+and one summary per new entry shared by all subscribers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import timedelta
+from functools import cached_property
+from typing import Optional
+
+import structlog
+from tortoise import timezone
+from tortoise.expressions import F, Q
+
+from app.core.config import settings
+from app.core.deadline import request_deadline
+from app.core.llm.service import get_llm_service
+from app.core.llm.types import SummaryPayload, SummaryResult
+from app.core.metrics import metrics
+from app.core.parsers.exceptions import CircuitOpenError, ExtractionError
+from app.core.parsers.guard import parser_guard
+from app.core.parsers.types import ContentType, ParsedContent
+from app.core.parsers.web import ConditionalResponse, WebParser
+from app.database.models import Feed, FeedEntry
+
+from .parser import FeedItem, ParsedFeed, parse_feed
+
+log = structlog.get_logger("FeedPoller")
+
+FEED_ACCEPT = "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.5"
+# Запись фида без текста статьи: описание короче этого не суммаризируем
+_MIN_FALLBACK_CHARS = 300
+_MAX_BACKOFF_STEPS = 6
+# AICODE-NOTE: Сбой LLM, таймаут, 429 или открытый breaker не хоронят запись: она остаётся
+# "pending" и повторяется с backoff от _RETRY_BASE. "error" — после FEED_SUMMARY_MAX_ATTEMPTS
+# попыток или сразу, если сама ссылка не читается (404, 403, нет текста), а описания мало.
+_RETRY_BASE = timedelta(minutes=1)
+_PERMANENT_REASONS = frozenset({"not_found", "forbidden", "content", "other"})
+
+
+def next_interval(current: int, changed: bool) -> int:
+    """
+    Halve the interval when the feed changed, grow it by half when it did not.
+
+    AICODE-NOTE: Активный блог быстро сходится к FEED_MIN_INTERVAL, заброшенный —
+    к FEED_MAX_INTERVAL; один пропущенный пост даёт задержку не больше интервала.
+    """
+    proposed = current // 2 if changed else int(current * 1.5)
+    return max(settings.FEED_MIN_INTERVAL, min(settings.FEED_MAX_INTERVAL, proposed))
+
+
+class FeedPoller:
+    """
+    Polls due feeds and summarizes new entries in the background.
+    """
+
+    def __init__(self, web: Optional[WebParser] = None, tick: float | None = None) -> None:
+        self.web = web or WebParser()
+        self._tick = tick
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def tick(self) -> float:
+        return self._tick or settings.FEED_POLL_TICK
+
+    @cached_property
+    def _summary_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(settings.FEED_SUMMARY_CONCURRENCY)
+
+    def start(self) -> None:
+        if not settings.FEEDS_ENABLED:
+            log.info("Feed subscriptions disabled")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.run_once()
+            except Exception as e:
+                log.exception("Feed poll failed", error=str(e))
+
+    async def run_once(self) -> int:
+        """
+        Poll every due feed, then summarize pending entries. Returns the number of new entries.
+        """
+        feeds = await Feed.filter(next_poll_at__lte=timezone.now(), subscribers__gt=0).order_by("next_poll_at")
+        new_entries = sum(await asyncio.gather(*(self.poll_feed(feed) for feed in feeds)))
+        await self.summarize_pending()
+        return new_entries
+
+    async def fetch(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> tuple[ConditionalResponse, Optional[ParsedFeed]]:
+        """
+        Conditional GET and parse; the feed is None when the server answered 304.
+        """
+        response = await self.web.fetch_conditional(url, etag=etag, last_modified=last_modified, accept=FEED_ACCEPT)
+        if response.not_modified:
+            return response, None
+        return response, await asyncio.to_thread(parse_feed, response.content, url)
+
+    async def register(self, url: str) -> Feed:
+        """
+        Create a feed on the first subscription. Entries that already exist are marked
+        as skipped so the first digest contains only new posts. Raises ExtractionError.
+        """
+        response, parsed = await self.fetch(url)
+        if parsed is None:
+            raise ExtractionError("Feed server answered 304 to an unconditional request")
+        now = timezone.now()
+        feed, created = await Feed.get_or_create(
+            url=url,
+            defaults={
+                "title": parsed.title,
+                "etag": response.etag,
+                "last_modified": response.last_modified,
+                "poll_interval": settings.FEED_DEFAULT_INTERVAL,
+                "next_poll_at": now + timedelta(seconds=settings.FEED_DEFAULT_INTERVAL),
+            },
+        )
+        if created or feed.subscribers == 0:
+            # Пока подписчиков не было, фид не опрашивался — старое не должно попасть в дайджест
+            await self._store_items(feed, parsed.items, status="skipped")
+        return feed
+
+    async def poll_feed(self, feed: Feed) -> int:
+        """
+        Conditional GET of one feed; stores new entries and reschedules the feed.
+        """
+        started = time.perf_counter()
+        now = timezone.now()
+        try:
+            response, parsed = await self.fetch(feed.url, feed.etag, feed.last_modified)
+        except ExtractionError as e:
+            feed.failures += 1
+            backoff = feed.poll_interval * 2 ** min(feed.failures, _MAX_BACKOFF_STEPS)
+            feed.next_poll_at = now + timedelta(seconds=min(backoff, settings.FEED_MAX_INTERVAL))
+            await feed.save(update_fields=["failures", "next_poll_at"])
+            metrics.inc("feed_fetch_total", result="error")
+            log.warning("Feed fetch failed", feed_id=feed.id, failures=feed.failures, error=str(e))
+            return 0
+
+        new_entries = 0
+        if parsed is None:
+            metrics.inc("feed_fetch_total", result="not_modified")
+        else:
+            metrics.inc("feed_fetch_total", result="modified")
+            new_entries = await self._store_items(feed, parsed.items[: settings.FEED_MAX_NEW_ENTRIES])
+            feed.etag = response.etag
+            feed.last_modified = response.last_modified
+            if new_entries:
+                feed.last_changed_at = now
+
+        feed.failures = 0
+        feed.poll_interval = next_interval(feed.poll_interval, changed=new_entries > 0)
+        feed.next_poll_at = now + timedelta(seconds=feed.poll_interval)
+        await feed.save(
+            update_fields=["etag", "last_modified", "last_changed_at", "failures", "poll_interval", "next_poll_at"]
+        )
+        metrics.observe("feed_poll_seconds", time.perf_counter() - started)
+        log.debug("Feed polled", feed_id=feed.id, new_entries=new_entries, interval=feed.poll_interval)
+        return new_entries
+
+    async def _store_items(self, feed: Feed, items: list[FeedItem], status: str = "pending") -> int:
+        guids = [item.guid for item in items]
+        known = set(await FeedEntry.filter(feed_id=feed.id, guid__in=guids).values_list("guid", flat=True))
+        fresh = [item for item in dict((item.guid, item) for item in items).values() if item.guid not in known]
+        if not fresh:
+            return 0
+        # ignore_conflicts: второй процесс бота мог вставить ту же запись
+        await FeedEntry.bulk_create(
+            [
+                FeedEntry(
+                    feed_id=feed.id,
+                    guid=item.guid,
+                    url=item.url,
+                    title=item.title,
+                    summary=item.summary if status == "pending" else None,
+                    status=status,
+                    published_at=item.published_at,
+                )
+                for item in fresh
+            ],
+            ignore_conflicts=True,
+        )
+        return len(fresh)
+
+    async def summarize_pending(self, limit: int = 50) -> int:
+        """
+        Summarize entries waiting for a summary. Each entry is summarized once for all subscribers.
+        """
+        entries = await (
+            FeedEntry.filter(status="pending")
+            .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=timezone.now()))
+            .order_by("id")
+            .limit(limit)
+        )
+        results = await asyncio.gather(*(self._summarize_entry(entry) for entry in entries))
+        return sum(results)
+
+    async def _summarize_entry(self, entry: FeedEntry) -> bool:
+        # В поле summary до суммаризации лежит описание из фида
+        fallback = entry.summary or ""
+        async with self._summary_semaphore:
+            try:
+                with request_deadline(settings.REQUEST_DEADLINE):
+                    result = await self._parse_and_summarize(entry, fallback)
+            except Exception as e:
+                await self._record_failure(entry, e)
+                return False
+
+        entry.status = "summarized"
+        entry.summary = result.text
+        entry.tokens_used = result.tokens.prompt + result.tokens.completion
+        await entry.save(update_fields=["status", "summary", "tokens_used"])
+        metrics.inc("feed_entries_total", status="summarized")
+        return True
+
+    async def _record_failure(self, entry: FeedEntry, error: Exception) -> None:
+        # Описание из фида в summary не трогаем: оно нужно следующей попытке
+        entry.attempts += 1
+        permanent = (
+            isinstance(error, ExtractionError)
+            and not isinstance(error, CircuitOpenError)
+            and error.reason in _PERMANENT_REASONS
+        )
+        if permanent or entry.attempts >= settings.FEED_SUMMARY_MAX_ATTEMPTS:
+            entry.status = "error"
+            metrics.inc("feed_entries_total", status="error")
+            log.warning("Feed entry summary failed", entry_id=entry.id, attempts=entry.attempts, error=str(error))
+        else:
+            entry.retry_at = timezone.now() + _RETRY_BASE * 2 ** (entry.attempts - 1)
+            metrics.inc("feed_entries_total", status="retry")
+            log.info("Feed entry summary will be retried", entry_id=entry.id, attempts=entry.attempts, error=str(error))
+        await entry.save(update_fields=["status", "attempts", "retry_at"])
+
+    async def _parse_and_summarize(self, entry: FeedEntry, fallback: str) -> SummaryResult:
+        try:
+            parsed = await parser_guard.parse(self.web, entry.url)
+        except ExtractionError:
+            if len(fallback) < _MIN_FALLBACK_CHARS:
+                raise
+            parsed = ParsedContent(type=ContentType.ARTICLE, title=entry.title, body=fallback, source_url=entry.url)
+        return await get_llm_service().summarize(
+            SummaryPayload(
+                content=parsed.body,
+                title=parsed.title or entry.title,
+                content_type=parsed.type,
+                source_url=entry.url,
+                metadata=parsed.metadata,
+            )
+        )
+
+
+async def add_subscriber(feed_id: int, delta: int) -> None:
+    await Feed.filter(id=feed_id).update(subscribers=F("subscribers") + delta)
+
+
+feed_poller = FeedPoller()
@@ -0,0 +1,104 @@
+"""
+Subscribe / unsubscribe operations shared by bot commands and benchmarks.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Literal, Optional
+
+from tortoise import timezone
+from tortoise.exceptions import IntegrityError
+
+from app.core.config import settings
+from app.core.tenants import DEFAULT_TENANT
+from app.database.models import Feed, FeedEntry, Subscription, User
+
+from .poller import add_subscriber, feed_poller
+
+DigestSchedule = Literal["hourly", "daily"]
+SCHEDULE_PERIODS: dict[str, timedelta] = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+}
+
+
+class SubscriptionLimitError(Exception):
+    """Raised when the user already has FEED_MAX_SUBSCRIPTIONS subscriptions."""
+
+
+async def subscribe(
+    user: User,
+    url: str,
+    schedule: DigestSchedule = "daily",
+    tenant: str = DEFAULT_TENANT,
+) -> tuple[Subscription, bool]:
+    """
+    Subscribe ``user`` to a feed, registering the feed on first use. Digests are
+    delivered by the ``tenant`` bot; each bot keeps its own list of subscriptions.
+
+    Returns (subscription, created); an existing subscription gets the new schedule.
+    A new subscription starts after the feed's latest entry, so its first digest has only new posts.
+    Raises ExtractionError if the URL is not a reachable feed.
+    """
+    feed = await Feed.get_or_none(url=url)
+    existing = (
+        await Subscription.get_or_none(user_id=user.id, feed_id=feed.id, tenant=tenant) if feed else None
+    )
+    if existing is not None:
+        if existing.schedule != schedule:
+            existing.schedule = schedule
+            existing.next_digest_at = timezone.now() + SCHEDULE_PERIODS[schedule]
+            await existing.save(update_fields=["schedule", "next_digest_at"])
+        return existing, False
+
+    if await Subscription.filter(user_id=user.id, tenant=tenant).count() >= settings.FEED_MAX_SUBSCRIPTIONS:
+        raise SubscriptionLimitError(f"Subscription limit reached ({settings.FEED_MAX_SUBSCRIPTIONS})")
+
+    if feed is None or feed.subscribers == 0:
+        feed = await feed_poller.register(url)
+    # Курсор — на последней известной записи: в первый дайджест попадает только новое,
+    # даже если у фида уже есть подписчики или пользователь подписывается повторно
+    last_entry_id = (
+        await FeedEntry.filter(feed_id=feed.id).order_by("-id").first().values_list("id", flat=True)
+    )
+    try:
+        subscription = await Subscription.create(
+            user_id=user.id,
+            feed_id=feed.id,
+            schedule=schedule,
+            last_entry_id=last_entry_id or 0,
+            next_digest_at=timezone.now() + SCHEDULE_PERIODS[schedule],
+            tenant=tenant,
+        )
+    except IntegrityError:
+        # Параллельная команда того же пользователя успела первой
+        return await Subscription.get(user_id=user.id, feed_id=feed.id, tenant=tenant), False
+    await add_subscriber(feed.id, 1)
+    return subscription, True
+
+
+async def list_subscriptions(user: User, tenant: str = DEFAULT_TENANT) -> list[Subscription]:
+    return await Subscription.filter(user_id=user.id, tenant=tenant).order_by("id").prefetch_related("feed")
+
+
+async def unsubscribe(user: User, target: str, tenant: str = DEFAULT_TENANT) -> Optional[Subscription]:
+    """
+    Remove a subscription by its number in /subscriptions or by feed URL.
+    """
+    subscriptions = await list_subscriptions(user, tenant)
+    if target.isdigit():
+        index = int(target) - 1
+        subscription = subscriptions[index] if 0 <= index < len(subscriptions) else None
+    else:
+        subscription = next((s for s in subscriptions if s.feed.url == target), None)
+    if subscription is None:
+        return None
+    await remove_subscription(subscription)
+    return subscription
+
+
+async def remove_subscription(subscription: Subscription) -> None:
+    deleted = await Subscription.filter(id=subscription.id).delete()
+    if deleted:
+        await add_subscriber(subscription.feed_id, -1)
@@ -0,0 +1,14 @@
+from .bm25 import BM25Index, chunk_words, tokenize
+from .service import FollowUpService, Retrieval, build_followup_messages, followup
+from .store import ContentStore
+
+__all__ = [
+    "BM25Index",
+    "ContentStore",
+    "FollowUpService",
+    "Retrieval",
+    "build_followup_messages",
+    "chunk_words",
+    "followup",
+    "tokenize",
+]
@@ -0,0 +1,80 @@
+"""
+Chunking and an in-memory BM25 index for follow-up retrieval.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Sequence
+
+_TOKEN_RE = re.compile(r"\w+")
+# AICODE-NOTE: Грубый стеммер: срезаем частые окончания (ru/en), чтобы «цена»,
+# «цены» и «ценах» совпадали. Полноценная морфология здесь не окупается.
+_SUFFIX_RE = re.compile(
+    r"(иями|ями|ами|ого|его|ому|ему|ыми|ими|иях|ах|ях|ов|ев|ей|ой|ый|ий|ая|яя|ое|ее|ую|юю|ом|ем|ам|ям"
+    r"|ing|ed|es|s|ы|и|а|я|о|е|у|ю|ь|й)$"
+)
+
+
+def _stem(token: str) -> str:
+    return _SUFFIX_RE.sub("", token) if len(token) > 4 else token
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(token) for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def chunk_words(text: str, size: int, overlap: int = 0) -> list[str]:
+    """
+    Split text into windows of ``size`` words; neighbouring windows share ``overlap`` words.
+    """
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, size - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start : start + size]))
+        if start + size >= len(words):
+            break
+    return chunks
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of chunks with an inverted index.
+    """
+
+    def __init__(self, chunks: Sequence[str], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.size = len(chunks)
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._lengths: list[int] = []
+        for index, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk))
+            self._lengths.append(sum(terms.values()))
+            for term, freq in terms.items():
+                self._postings[term].append((index, freq))
+        self._avg_length = (sum(self._lengths) / self.size) if self.size else 0.0
+        self._idf = {
+            term: math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """
+        Top-``k`` chunks as (index, score), best first. Chunks without query terms are skipped.
+        """
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for index, freq in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / (self._avg_length or 1))
+                scores[index] += idf * freq * (self.k1 + 1) / (freq + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,155 @@
+"""
+Follow-up questions over the last summarized documents.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+
+import structlog
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.llm.prompt import FOLLOWUP_PROMPT
+from app.core.metrics import metrics
+from app.core.parsers.types import ParsedContent
+
+from .bm25 import BM25Index, chunk_words
+from .store import ContentStore, decode_content
+
+log = structlog.get_logger("FollowUp")
+
+DocKey = tuple[int, int, int]  # (bot_id, chat_id, message_id саммари): у каждого бота свои message_id
+
+# AICODE-NOTE: Документ хранится сжатым (zstd) под ключом сообщения с саммари.
+# BM25-индекс строится при первом вопросе в отдельном потоке и кэшируется
+# ненадолго: между вопросами держим только сжатый текст. В LLM уходят
+# top-k фрагментов и вопрос, а не весь документ.
+_INDEX_CACHE_SIZE = 32
+_INDEX_CACHE_TTL = 600.0
+
+
+@dataclass(slots=True)
+class _Indexed:
+    content: ParsedContent
+    chunks: list[str]
+    index: BM25Index
+
+
+@dataclass(slots=True)
+class Retrieval:
+    content: ParsedContent
+    fragments: list[str]
+    matched: bool  # False — по вопросу ничего не нашлось, взято начало документа
+
+
+class FollowUpService:
+    """
+    Keeps parsed documents per summary message and retrieves relevant chunks for questions.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        top_k: int | None = None,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._top_k = top_k
+        self._indexes: TTLCache[_Indexed] = TTLCache(maxsize=_INDEX_CACHE_SIZE, ttl=_INDEX_CACHE_TTL)
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl or settings.FOLLOWUP_TTL
+
+    @property
+    def top_k(self) -> int:
+        return self._top_k or settings.FOLLOWUP_TOP_K
+
+    @cached_property
+    def store(self) -> ContentStore:
+        return ContentStore(
+            self._max_bytes or settings.FOLLOWUP_STORE_MAX_BYTES,
+            self.ttl,
+            level=settings.FOLLOWUP_ZSTD_LEVEL,
+        )
+
+    @cached_property
+    def _aliases(self) -> TTLCache[DocKey]:
+        # Ответы бота на уточняющие вопросы ссылаются на тот же документ
+        return TTLCache(maxsize=10_000, ttl=self.ttl)
+
+    def remember(self, bot_id: int, chat_id: int, message_id: int, content: ParsedContent) -> None:
+        """
+        Store the document behind a summary message sent by ``bot_id`` to ``chat_id``.
+        """
+        size = self.store.put((bot_id, chat_id, message_id), content)
+        metrics.set_gauge("followup_store_bytes", self.store.bytes)
+        metrics.set_gauge("followup_store_entries", len(self.store))
+        log.debug("Document stored", compressed=size, raw=self.store.raw_bytes, entries=len(self.store))
+
+    def link(self, bot_id: int, chat_id: int, message_id: int, doc_key: DocKey) -> None:
+        """
+        Let replies to ``message_id`` (e.g. a follow-up answer) reach the same document.
+        """
+        self._aliases.set((bot_id, chat_id, message_id), doc_key)
+
+    def resolve(self, bot_id: int, chat_id: int, message_id: int) -> DocKey:
+        key = (bot_id, chat_id, message_id)
+        return self._aliases.get(key) or key
+
+    async def retrieve(self, doc_key: DocKey, question: str) -> Optional[Retrieval]:
+        """
+        Top-k chunks of the stored document for ``question``; None if the document expired.
+        """
+        indexed = self._indexes.get(doc_key)
+        if indexed is None:
+            blob = self.store.get_blob(doc_key)
+            if blob is None:
+                metrics.inc("followup_requests_total", result="miss")
+                return None
+            # Распаковка и индексация длинных субтитров — не в event loop
+            indexed = await asyncio.to_thread(_build_index, blob)
+            self._indexes.set(doc_key, indexed)
+        metrics.inc("followup_requests_total", result="hit")
+
+        hits = indexed.index.search(question, self.top_k)
+        if hits:
+            # В промпт — в порядке следования в документе
+            selected = sorted(index for index, _ in hits)
+        else:
+            selected = list(range(min(self.top_k, len(indexed.chunks))))
+        return Retrieval(
+            content=indexed.content,
+            fragments=[indexed.chunks[index] for index in selected],
+            matched=bool(hits),
+        )
+
+
+def _build_index(blob: bytes) -> _Indexed:
+    content = decode_content(blob)
+    chunks = chunk_words(content.body, settings.FOLLOWUP_CHUNK_WORDS, settings.FOLLOWUP_CHUNK_OVERLAP)
+    return _Indexed(content=content, chunks=chunks, index=BM25Index(chunks))
+
+
+def build_followup_messages(retrieval: Retrieval, question: str) -> list[dict[str, str]]:
+    fragments = "\n\n".join(
+        f"[{number}] {fragment}" for number, fragment in enumerate(retrieval.fragments, start=1)
+    )
+    user_prompt = (
+        f"Документ: {retrieval.content.title}\n"
+        f"Источник: {retrieval.content.source_url or 'n/a'}\n\n"
+        f"Фрагменты:\n{fragments}\n\n"
+        f"Вопрос: {question.strip()}"
+    )
+    return [
+        {"role": "system", "content": FOLLOWUP_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+followup = FollowUpService()
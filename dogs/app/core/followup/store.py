@@ -0,0 +1,107 @@
+"""
+Size-bounded, zstd-compressed in-memory store of parsed documents with a TTL.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+import orjson
+import zstandard
+
+from app.core.parsers.types import ContentType, ParsedContent
+
+
+@dataclass(slots=True)
+class _Entry:
+    blob: bytes
+    raw_size: int
+    expires_at: float
+
+
+def encode_content(content: ParsedContent, level: int = 3) -> tuple[bytes, int]:
+    """
+    Serialize and compress a document; returns (blob, uncompressed size).
+    """
+    raw = orjson.dumps(
+        {
+            "type": content.type.value,
+            "title": content.title,
+            "body": content.body,
+            "source_url": content.source_url,
+            "metadata": content.metadata,
+        },
+        default=str,
+    )
+    return zstandard.ZstdCompressor(level=level).compress(raw), len(raw)
+
+
+def decode_content(blob: bytes) -> ParsedContent:
+    """
+    Inverse of encode_content. Safe to call from a worker thread.
+    """
+    data = orjson.loads(zstandard.ZstdDecompressor().decompress(blob))
+    return ParsedContent(
+        type=ContentType(data["type"]),
+        title=data["title"],
+        body=data["body"],
+        source_url=data["source_url"],
+        metadata=data["metadata"],
+    )
+
+
+class ContentStore:
+    """
+    LRU of compressed documents bounded by total compressed bytes; entries expire after ``ttl``.
+
+    Not thread-safe: intended to be used from the event loop only.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, level: int = 3) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.level = level
+        self.bytes = 0
+        self.raw_bytes = 0
+        self._data: OrderedDict[Hashable, _Entry] = OrderedDict()
+
+    def put(self, key: Hashable, content: ParsedContent) -> int:
+        """
+        Store a document; returns its compressed size (0 if it alone exceeds the budget).
+        """
+        blob, raw_size = encode_content(content, self.level)
+        self._discard(key)
+        if len(blob) > self.max_bytes:
+            return 0
+        self._data[key] = _Entry(blob, raw_size, time.monotonic() + self.ttl)
+        self.bytes += len(blob)
+        self.raw_bytes += raw_size
+        while self.bytes > self.max_bytes:
+            self._discard(next(iter(self._data)))
+        return len(blob)
+
+    def get_blob(self, key: Hashable) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._discard(key)
+            return None
+        self._data.move_to_end(key)
+        return entry.blob
+
+    def get(self, key: Hashable) -> Optional[ParsedContent]:
+        blob = self.get_blob(key)
+        return decode_content(blob) if blob is not None else None
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry.blob)
+            self.raw_bytes -= entry.raw_size
+
+    def __len__(self) -> int:
+        return len(self._data)
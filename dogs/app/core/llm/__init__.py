@@ -1,12 +1,18 @@
-from .service import LLMService, build_llm_service
-from .types import SummaryPayload, SummaryResult, TokenUsage
+from .router import ModelRouter, ModelTier, build_model_router
+from .service import LLMService, build_llm_service, get_llm_service
+from .types import SummaryPayload, SummaryResult, Summarizer, TokenUsage
 
 __all__ = [
     "LLMService",
+    "ModelRouter",
+    "ModelTier",
     "SummaryPayload",
     "SummaryResult",
+    "Summarizer",
     "TokenUsage",
     "build_llm_service",
+    "build_model_router",
+    "get_llm_service",
 ]
 
 
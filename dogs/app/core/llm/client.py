@@ -4,16 +4,16 @@ import abc
 import ssl
 import warnings
 from dataclasses import dataclass
-from typing import Any, Iterable, Optional
+from functools import cache
+from typing import TYPE_CHECKING, Any, Iterable, Optional
 
-import httpx
 import structlog
-from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
-# Suppress SSL warnings for corporate networks
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+if TYPE_CHECKING:
+    from openai import DefaultAsyncHttpxClient
+
+# AICODE-NOTE: openai/urllib3 импортируются при создании первого клиента,
+# а не при импорте модуля: это ~1 с на холодном старте (см. app.core.warmup).
 
 # AICODE-NOTE: Больше не используем нативный anthropic SDK,
 # работаем через OpenAI-совместимый API с кастомным base_url
@@ -30,24 +30,42 @@ def _create_ssl_context() -> ssl.SSLContext:
     return ctx
 
 
+# AICODE-NOTE: Один пул соединений на процесс: клиенты всех моделей, тиров и тенантов
+# ходят через него, модель — лишь параметр запроса.
+@cache
 def _create_insecure_http_client() -> DefaultAsyncHttpxClient:
-    """Create HTTP client that skips SSL verification."""
+    """Create the process-wide HTTP client that skips SSL verification."""
+    import urllib3
+    from openai import DefaultAsyncHttpxClient, Timeout
+
+    # Suppress SSL warnings for corporate networks
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+
     # AICODE-NOTE: Используем DefaultAsyncHttpxClient из OpenAI SDK
     # чтобы корректно передавались заголовки авторизации
     return DefaultAsyncHttpxClient(
         verify=False,
-        timeout=httpx.Timeout(60.0, connect=30.0),
+        # Timeout из SDK: транспорт openai может быть не тем httpx, что установлен рядом
+        timeout=Timeout(60.0, connect=30.0),
     )
 
 ChatMessage = dict[str, str]
 
 
+def _timeout_kwargs(timeout: Optional[float]) -> dict[str, float]:
+    # timeout=None в SDK означает «без таймаута», а не «по умолчанию» — не передаём вовсе
+    return {"timeout": timeout} if timeout is not None else {}
+
+
 @dataclass(slots=True)
 class LLMResponse:
     text: str
     raw: Any
     prompt_tokens: Optional[int]
     completion_tokens: Optional[int]
+    # finish_reason == "length": ответ обрезан по max_tokens
+    truncated: bool = False
 
 
 class BaseLLMClient(abc.ABC):
@@ -61,6 +79,7 @@ class BaseLLMClient(abc.ABC):
         *,
         temperature: float = 0.3,
         max_output_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
     ) -> LLMResponse:
         ...
 
@@ -69,6 +88,8 @@ class OpenAIClient(BaseLLMClient):
     def __init__(self, api_key: str, model: str) -> None:
         self.provider = "openai"
         self.model = model
+        from openai import AsyncOpenAI
+
         # Use insecure client for corporate networks with SSL interception
         self._client = AsyncOpenAI(
             api_key=api_key,
@@ -82,6 +103,7 @@ class OpenAIClient(BaseLLMClient):
         *,
         temperature: float = 0.3,
         max_output_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
     ) -> LLMResponse:
         prepared = list(messages)
         response = await self._client.chat.completions.create(
@@ -89,9 +111,10 @@ class OpenAIClient(BaseLLMClient):
             messages=prepared,
             temperature=temperature,
             max_tokens=max_output_tokens,
+            **_timeout_kwargs(timeout),
         )
-        message = response.choices[0].message
-        text = message.content or ""
+        choice = response.choices[0]
+        text = choice.message.content or ""
         usage = getattr(response, "usage", None)
         prompt_tokens = getattr(usage, "prompt_tokens", None) if usage else None
         completion_tokens = getattr(usage, "completion_tokens", None) if usage else None
@@ -100,6 +123,7 @@ class OpenAIClient(BaseLLMClient):
             raw=response,
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
+            truncated=choice.finish_reason == "length",
         )
 
 
@@ -115,6 +139,8 @@ class AnthropicClient(BaseLLMClient):
     def __init__(self, api_key: str, model: str, base_url: str) -> None:
         self.provider = "anthropic"
         self.model = model
+        from openai import AsyncOpenAI
+
         # AICODE-NOTE: Используем AsyncOpenAI с кастомным base_url
         # для работы с Anthropic через OpenRouter.
         # Корпоративный прокси перехватывает SSL, поэтому:
@@ -138,6 +164,7 @@ class AnthropicClient(BaseLLMClient):
         *,
         temperature: float = 0.3,
         max_output_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
     ) -> LLMResponse:
         # OpenAI-совместимый API использует стандартный формат messages
         prepared = list(messages)
@@ -146,9 +173,10 @@ class AnthropicClient(BaseLLMClient):
             messages=prepared,
             temperature=temperature,
             max_tokens=max_output_tokens,
+            **_timeout_kwargs(timeout),
         )
-        message = response.choices[0].message
-        text = message.content or ""
+        choice = response.choices[0]
+        text = choice.message.content or ""
         usage = getattr(response, "usage", None)
         prompt_tokens = getattr(usage, "prompt_tokens", None) if usage else None
         completion_tokens = getattr(usage, "completion_tokens", None) if usage else None
@@ -157,6 +185,7 @@ class AnthropicClient(BaseLLMClient):
             raw=response,
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
+            truncated=choice.finish_reason == "length",
         )
 
 
@@ -0,0 +1,165 @@
+"""
+Token-aware routing of summaries across model tiers with adaptive output budgets.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import structlog
+
+from app.core.config import Settings, settings
+from app.core.metrics import metrics
+from app.core.overload import OverloadLevel, overload
+
+from .service import LLMService, build_llm_service
+from .token_counter import TokenCounter
+from .types import SummaryPayload, SummaryResult
+
+log = structlog.get_logger("ModelRouter")
+
+# AICODE-NOTE: Тир выбирается по размеру уже собранного промпта (системный
+# промпт + метаданные + текст), посчитанному TokenCounter'ом основной модели.
+# Короткий текст — быстрая дешёвая модель, длинная статья/субтитры —
+# модель с длинным контекстом. Бюджет ответа растёт с размером входа.
+
+
+@dataclass(frozen=True, slots=True)
+class ModelTier:
+    name: str
+    model: str
+    max_input_tokens: Optional[int]  # None — без верхней границы (последний тир)
+
+
+@dataclass(frozen=True, slots=True)
+class OutputBudget:
+    """
+    ``clamp(prompt_tokens * ratio, min_tokens, max_tokens)``.
+    """
+
+    ratio: float
+    min_tokens: int
+    max_tokens: int
+
+    def for_prompt(self, prompt_tokens: int) -> int:
+        return max(self.min_tokens, min(self.max_tokens, round(prompt_tokens * self.ratio)))
+
+
+@dataclass(frozen=True, slots=True)
+class RouteDecision:
+    tier: ModelTier
+    prompt_tokens: int
+    max_output_tokens: int
+
+
+class ModelRouter:
+    """
+    Picks a tier for every payload and delegates to that tier's LLMService.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[ModelTier],
+        services: dict[str, LLMService],
+        *,
+        token_counter: TokenCounter,
+        budget: OutputBudget,
+    ) -> None:
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = list(tiers)
+        self.services = services
+        self.token_counter = token_counter
+        self.budget = budget
+
+    def route(self, prompt_tokens: int) -> RouteDecision:
+        tier = next(
+            (t for t in self.tiers if t.max_input_tokens is None or prompt_tokens <= t.max_input_tokens),
+            self.tiers[-1],
+        )
+        if overload.level >= OverloadLevel.CHEAP_MODEL and tier.max_input_tokens is not None:
+            # Под перегрузкой всё, что не требует длинного контекста, уходит в быстрый тир
+            tier = self.tiers[0]
+        return RouteDecision(
+            tier=tier,
+            prompt_tokens=prompt_tokens,
+            max_output_tokens=self.budget.for_prompt(prompt_tokens),
+        )
+
+    async def summarize(self, payload: SummaryPayload) -> SummaryResult:
+        service = self.services[self.tiers[0].model]
+        return await self.summarize_messages(service.build_messages(payload))
+
+    async def summarize_messages(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        max_output_tokens: Optional[int] = None,
+    ) -> SummaryResult:
+        """
+        Route built messages; an explicit ``max_output_tokens`` replaces the adaptive budget.
+        """
+        decision = self.route(self.token_counter.count_messages(messages))
+        budget = max_output_tokens or decision.max_output_tokens
+        metrics.inc("llm_route_total", tier=decision.tier.name)
+        log.debug(
+            "Model routed",
+            tier=decision.tier.name,
+            model=decision.tier.model,
+            prompt_tokens=decision.prompt_tokens,
+            max_output_tokens=budget,
+        )
+
+        result = await self.services[decision.tier.model].summarize_messages(
+            messages,
+            max_output_tokens=budget,
+        )
+        result.tier = decision.tier.name
+        return result
+
+
+def build_model_router(
+    active_settings: Optional[Settings] = None,
+    *,
+    model: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+) -> ModelRouter:
+    """
+    Build fast / standard / long tiers from Settings. Tiers sharing a model share one client.
+
+    ``model`` replaces the provider's default model (the standard tier and unset
+    fast / long models), ``system_prompt`` is passed to every tier.
+    """
+    cfg = active_settings or settings
+    if cfg.LLM_FAST_MAX_INPUT_TOKENS >= cfg.LLM_LONG_MIN_INPUT_TOKENS:
+        raise ValueError("LLM_FAST_MAX_INPUT_TOKENS must be below LLM_LONG_MIN_INPUT_TOKENS")
+    if cfg.LLM_OUTPUT_TOKENS_MIN > cfg.LLM_OUTPUT_TOKENS_MAX:
+        raise ValueError("LLM_OUTPUT_TOKENS_MIN must not exceed LLM_OUTPUT_TOKENS_MAX")
+
+    default_model = model or (cfg.OPENAI_MODEL if cfg.LLM_PROVIDER == "openai" else cfg.ANTHROPIC_MODEL)
+    tiers = [
+        ModelTier("fast", cfg.LLM_FAST_MODEL or default_model, cfg.LLM_FAST_MAX_INPUT_TOKENS),
+        ModelTier("standard", default_model, cfg.LLM_LONG_MIN_INPUT_TOKENS - 1),
+        ModelTier("long", cfg.LLM_LONG_MODEL or default_model, None),
+    ]
+
+    # Один TokenCounter на роутер: граница тира не должна зависеть от модели тира
+    token_counter = TokenCounter(default_model)
+    services: dict[str, LLMService] = {}
+    for tier in tiers:
+        if tier.model not in services:
+            services[tier.model] = build_llm_service(
+                cfg, model=tier.model, token_counter=token_counter, system_prompt=system_prompt
+            )
+
+    return ModelRouter(
+        tiers,
+        services,
+        token_counter=token_counter,
+        budget=OutputBudget(
+            ratio=cfg.LLM_OUTPUT_TOKENS_RATIO,
+            min_tokens=cfg.LLM_OUTPUT_TOKENS_MIN,
+            max_tokens=cfg.LLM_OUTPUT_TOKENS_MAX,
+        ),
+    )
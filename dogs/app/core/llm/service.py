@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+from functools import cache
 from typing import Iterable, Optional
 
 import structlog
 
 from app.core.config import Settings, settings
+from app.core.deadline import budget, current_deadline, stage
+from app.core.metrics import metrics
+from app.core.overload import overload
+from app.core.tenants import current_tenant
 
 from .client import AnthropicClient, BaseLLMClient, LLMResponse, OpenAIClient
 from .prompt import DEEP_ANALYSIS_PROMPT
 from .token_counter import TokenCounter
-from .types import SummaryPayload, SummaryResult, TokenUsage
+from .types import SummaryPayload, SummaryResult, Summarizer, TokenUsage
+
+LLM_CALL_TIMEOUT = 120.0
 
 
 class LLMService:
@@ -24,20 +31,41 @@ class LLMService:
         token_counter: Optional[TokenCounter] = None,
         max_output_tokens: int = 800,
         temperature: float = 0.3,
+        system_prompt: str = DEEP_ANALYSIS_PROMPT,
     ) -> None:
         self.client = client
         self.token_counter = token_counter or TokenCounter(client.model)
         self.max_output_tokens = max_output_tokens
         self.temperature = temperature
+        self.system_prompt = system_prompt
         self.log = structlog.get_logger("LLMService")
 
     async def summarize(self, payload: SummaryPayload) -> SummaryResult:
-        messages = self._build_messages(payload)
-        response = await self.client.complete(
-            messages,
-            temperature=self.temperature,
-            max_output_tokens=self.max_output_tokens,
-        )
+        return await self.summarize_messages(self.build_messages(payload))
+
+    async def summarize_messages(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        max_output_tokens: Optional[int] = None,
+    ) -> SummaryResult:
+        """
+        Complete already built messages; ``max_output_tokens`` overrides the default budget.
+        """
+        # Под дедлайном запроса HTTP-таймаут клиента не переживает оставшийся бюджет
+        timeout = budget(LLM_CALL_TIMEOUT) if current_deadline() else None
+        output_tokens = overload.output_tokens(max_output_tokens or self.max_output_tokens)
+        async with stage("llm"):
+            with overload.track_llm():
+                response = await self.client.complete(
+                    messages,
+                    temperature=self.temperature,
+                    max_output_tokens=output_tokens,
+                    timeout=timeout,
+                )
+        if response.truncated:
+            metrics.inc("llm_truncated_total", model=self.client.model)
+            self.log.warning("LLM output truncated", model=self.client.model, max_output_tokens=output_tokens)
         token_usage = self._resolve_token_usage(messages, response)
         return SummaryResult(
             text=response.text.strip(),
@@ -45,7 +73,7 @@ class LLMService:
             model=self.client.model,
         )
 
-    def _build_messages(self, payload: SummaryPayload) -> list[dict[str, str]]:
+    def build_messages(self, payload: SummaryPayload) -> list[dict[str, str]]:
         metadata_section = "\n".join(
             f"- {key}: {value}"
             for key, value in payload.metadata.items()
@@ -60,7 +88,7 @@ class LLMService:
             f"Текст:\n{payload.content.strip()}"
         )
         return [
-            {"role": "system", "content": DEEP_ANALYSIS_PROMPT},
+            {"role": "system", "content": self.system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
@@ -70,14 +98,24 @@ class LLMService:
         return TokenUsage(prompt=prompt_tokens, completion=completion_tokens)
 
 
-def build_llm_service(active_settings: Optional[Settings] = None) -> LLMService:
+def build_llm_service(
+    active_settings: Optional[Settings] = None,
+    *,
+    model: Optional[str] = None,
+    token_counter: Optional[TokenCounter] = None,
+    system_prompt: Optional[str] = None,
+) -> LLMService:
+    """
+    Service for the configured provider; ``model`` overrides the provider's default model,
+    ``system_prompt`` the default DEEP_ANALYSIS_PROMPT.
+    """
     cfg = active_settings or settings
     provider = cfg.LLM_PROVIDER.lower()
 
     if provider == "openai":
         client = OpenAIClient(
             api_key=cfg.OPENAI_API_KEY.get_secret_value(),
-            model=cfg.OPENAI_MODEL,
+            model=model or cfg.OPENAI_MODEL,
         )
         max_tokens = cfg.OPENAI_MAX_OUTPUT_TOKENS
     elif provider == "anthropic":
@@ -85,7 +123,7 @@ def build_llm_service(active_settings: Optional[Settings] = None) -> LLMService:
             raise ValueError("ANTHROPIC_API_KEY is required when provider=anthropic")
         client = AnthropicClient(
             api_key=cfg.ANTHROPIC_API_KEY.get_secret_value(),
-            model=cfg.ANTHROPIC_MODEL,
+            model=model or cfg.ANTHROPIC_MODEL,
             base_url=cfg.ANTHROPIC_BASE_URL,
         )
         max_tokens = cfg.ANTHROPIC_MAX_OUTPUT_TOKENS
@@ -94,8 +132,32 @@ def build_llm_service(active_settings: Optional[Settings] = None) -> LLMService:
 
     return LLMService(
         client=client,
-        token_counter=TokenCounter(client.model),
+        token_counter=token_counter or TokenCounter(client.model),
         max_output_tokens=max_tokens,
+        system_prompt=system_prompt or DEEP_ANALYSIS_PROMPT,
     )
 
 
+def get_llm_service() -> Summarizer:
+    """
+    Shared summarizer for the configured provider: the tier router when
+    LLM_ROUTING_ENABLED, otherwise a single-model service. Uses the prompt and
+    model of the current tenant; background jobs get the defaults.
+
+    AICODE-NOTE: Клиент (пул соединений) и TokenCounter (загрузка tiktoken)
+    создаются один раз на процесс, а не на каждое сообщение. Тенанты с одинаковыми
+    промптом и моделью делят один экземпляр.
+    """
+    tenant = current_tenant()
+    if tenant is None:
+        return _summarizer(None, None)
+    return _summarizer(tenant.prompt, tenant.model)
+
+
+@cache
+def _summarizer(system_prompt: Optional[str], model: Optional[str]) -> Summarizer:
+    if settings.LLM_ROUTING_ENABLED:
+        from .router import build_model_router
+
+        return build_model_router(model=model, system_prompt=system_prompt)
+    return build_llm_service(model=model, system_prompt=system_prompt)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Protocol
 
 from app.core.parsers.types import ContentType
 
@@ -30,5 +30,23 @@ class SummaryResult:
     text: str
     tokens: TokenUsage
     model: str
+    tier: Optional[str] = None
+
+
+class Summarizer(Protocol):
+    """
+    Anything that turns a payload into a summary: LLMService or ModelRouter.
+    """
+
+    async def summarize(self, payload: SummaryPayload) -> SummaryResult:
+        ...
+
+    async def summarize_messages(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        max_output_tokens: Optional[int] = None,
+    ) -> SummaryResult:
+        ...
 
 
@@ -1,26 +1,206 @@
-import structlog
+"""
+Logging setup: human-readable console output for development and a JSON mode
+for production that renders with orjson and writes from a background thread.
+"""
+
+from __future__ import annotations
+
+import atexit
 import logging
+import queue
+import random
 import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Iterator, Optional
+
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# AICODE-NOTE: В JSON-режиме event loop только рендерит строку (orjson) и кладёт её
+# в ограниченную очередь; запись в stdout делает отдельный поток. При переполнении
+# очереди строка отбрасывается (метрика logs_dropped_total), loop не блокируется.
+_WRITER_BATCH = 256
+_STOP = object()
+
+_writer: Optional["QueueLogWriter"] = None
+
+
+class QueueLogWriter:
+    """
+    Drains rendered log lines from a bounded queue and writes them in batches.
+    """
+
+    def __init__(self, stream: BinaryIO, maxsize: int) -> None:
+        self._stream = stream
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, line: bytes) -> None:
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            metrics.inc("logs_dropped_total")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Flush queued lines and stop the thread (called at interpreter exit).
+        """
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = []
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= _WRITER_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._stream.write(b"\n".join(batch) + b"\n")
+                    self._stream.flush()
+                except (OSError, ValueError):
+                    pass
+            if item is _STOP:
+                return
+
+
+class QueueLogger:
+    """
+    structlog logger that forwards rendered bytes to the writer thread.
+    """
+
+    def __init__(self, writer: QueueLogWriter) -> None:
+        self._writer = writer
+
+    def msg(self, message: bytes) -> None:
+        self._writer.put(message)
+
+    log = debug = info = warn = warning = error = critical = exception = fatal = msg
+
+
+class QueueLoggerFactory:
+    def __init__(self, writer: QueueLogWriter) -> None:
+        self._writer = writer
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self._writer)
+
+
+class _StdlibQueueHandler(logging.Handler):
+    """
+    Routes stdlib logging (aiogram, tortoise, asyncpg) into the same JSON stream.
+    """
+
+    def __init__(self, writer: QueueLogWriter, serializer: Any) -> None:
+        super().__init__()
+        self._writer = writer
+        self._serializer = serializer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            event = {
+                "event": record.getMessage(),
+                "level": record.levelname.lower(),
+                "logger": record.name,
+                "timestamp": datetime.fromtimestamp(record.created, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            }
+            if record.exc_info:
+                event["exception"] = logging.Formatter().formatException(record.exc_info)
+            self._writer.put(self._serializer(event))
+        except Exception:
+            self.handleError(record)
+
+
+def sample_debug(rate: float) -> structlog.types.Processor:
+    """
+    Keep only a ``rate`` share of debug events (hot-path events stay cheap in volume).
+    """
+
+    def processor(logger: Any, method_name: str, event_dict: dict) -> dict:
+        if method_name == "debug" and random.random() >= rate:
+            raise structlog.DropEvent
+        return event_dict
+
+    return processor
+
+
+@contextmanager
+def bind_request_context(**values: Any) -> Iterator[str]:
+    """
+    Bind request-scoped fields (plus a fresh request_id) for the current task.
+
+    Tasks spawned inside inherit a copy of the context, so per-item fields bound
+    there do not leak between concurrently processed links.
+    """
+    request_id = uuid.uuid4().hex[:12]
+    with structlog.contextvars.bound_contextvars(request_id=request_id, **values):
+        yield request_id
+
+
+def setup_logging() -> None:
+    global _writer
+
+    level = logging.getLevelName(settings.LOG_LEVEL.upper())
+    shared_processors = [
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        sample_debug(settings.LOG_DEBUG_SAMPLE_RATE),
+        structlog.processors.StackInfoRenderer(),
+    ]
+
+    if settings.LOG_FORMAT == "json":
+        import orjson
+
+        if _writer is None:
+            _writer = QueueLogWriter(sys.stdout.buffer, settings.LOG_QUEUE_SIZE)
+            atexit.register(_writer.close)
+
+        stdlib_handler = _StdlibQueueHandler(_writer, orjson.dumps)
+        logging.basicConfig(handlers=[stdlib_handler], level=level, force=True)
+
+        structlog.configure(
+            processors=[
+                *shared_processors,
+                structlog.processors.format_exc_info,
+                structlog.processors.TimeStamper(fmt="iso", utc=True),
+                structlog.processors.JSONRenderer(serializer=orjson.dumps),
+            ],
+            wrapper_class=structlog.make_filtering_bound_logger(level),
+            context_class=dict,
+            logger_factory=QueueLoggerFactory(_writer),
+            cache_logger_on_first_use=True,
+        )
+        return
 
-def setup_logging():
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
-        level=logging.INFO,
+        level=level,
     )
 
     structlog.configure(
         processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
+            *shared_processors,
             structlog.dev.set_exc_info,
             structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
             structlog.dev.ConsoleRenderer()
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         context_class=dict,
         logger_factory=structlog.PrintLoggerFactory(),
         cache_logger_on_first_use=True,
     )
-
@@ -0,0 +1,245 @@
+"""
+Event-loop health monitor: loop lag, pending tasks, executor backlog and
+stack samples of callbacks that stall the loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Deque, Optional
+
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+log = structlog.get_logger("LoopMonitor")
+
+# AICODE-NOTE: Постоянно в проде работает только дешёвая часть: корутина-пульс
+# (один sleep на интервал) и поток-сторож, который снимает стек главного потока,
+# если пульс не обновлялся дольше порога. asyncio debug (slow_callback_duration)
+# заметно дороже и включается отдельно через LOOP_ASYNCIO_DEBUG.
+_STACK_DEPTH = 8
+_MAX_STALLS = 20
+
+
+@dataclass(slots=True)
+class StallRecord:
+    at: datetime
+    duration: float
+    source: str  # watchdog | asyncio
+    where: str  # верхний кадр или описание callback'а
+    stack: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class LoopHealth:
+    lag_last: float
+    lag_p50: float
+    lag_p99: float
+    lag_max: float
+    pending_tasks: int
+    executor_queue: int
+    executor_threads: int
+    stalls_total: int
+    recent_stalls: list[StallRecord]
+
+
+def _default_executor_state(loop: asyncio.AbstractEventLoop) -> tuple[int, int]:
+    """
+    Queue depth and thread count of the loop's default executor (used by to_thread).
+    """
+    executor = getattr(loop, "_default_executor", None)
+    if executor is None:
+        return 0, 0
+    work_queue = getattr(executor, "_work_queue", None)
+    threads = getattr(executor, "_threads", ())
+    return (work_queue.qsize() if work_queue is not None else 0), len(threads)
+
+
+def _format_stack(frame: object) -> list[str]:
+    summary = traceback.extract_stack(frame, limit=_STACK_DEPTH)  # type: ignore[arg-type]
+    return [f"{entry.filename}:{entry.lineno} {entry.name}" for entry in reversed(summary)]
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """
+    Captures asyncio debug-mode reports "Executing <Handle ...> took 0.300 seconds".
+    """
+
+    def __init__(self, monitor: "LoopMonitor") -> None:
+        super().__init__(level=logging.WARNING)
+        self._monitor = monitor
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = record.getMessage()
+        if not message.startswith("Executing "):
+            return
+        duration = 0.0
+        if " took " in message:
+            try:
+                duration = float(message.rsplit(" took ", 1)[1].split()[0])
+            except ValueError:
+                pass
+        self._monitor.record_stall(
+            StallRecord(
+                at=datetime.now(timezone.utc),
+                duration=duration,
+                source="asyncio",
+                where=message.split(" took ", 1)[0].removeprefix("Executing ")[:200],
+            )
+        )
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and records what was running during stalls.
+    """
+
+    def __init__(
+        self,
+        interval: float | None = None,
+        stall_threshold: float | None = None,
+        asyncio_debug: bool | None = None,
+    ) -> None:
+        # Настройки читаются при первом обращении, а не при импорте модуля
+        self._interval = interval
+        self._stall_threshold = stall_threshold
+        self._asyncio_debug = asyncio_debug
+        self.stalls: Deque[StallRecord] = deque(maxlen=_MAX_STALLS)
+        self.lag_last = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        # Стек, снятый сторожем во время текущего зависания (пишет поток, читает loop)
+        self._sampled_stack: Optional[list[str]] = None
+        self._debug_handler: Optional[_SlowCallbackHandler] = None
+
+    @property
+    def interval(self) -> float:
+        return self._interval or settings.LOOP_MONITOR_INTERVAL
+
+    @property
+    def stall_threshold(self) -> float:
+        return self._stall_threshold or settings.LOOP_STALL_THRESHOLD
+
+    @property
+    def asyncio_debug(self) -> bool:
+        return settings.LOOP_ASYNCIO_DEBUG if self._asyncio_debug is None else self._asyncio_debug
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+        if self.asyncio_debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.stall_threshold
+            self._debug_handler = _SlowCallbackHandler(self)
+            logging.getLogger("asyncio").addHandler(self._debug_handler)
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._debug_handler is not None:
+            logging.getLogger("asyncio").removeHandler(self._debug_handler)
+            self._debug_handler = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def record_stall(self, record: StallRecord) -> None:
+        # Вызывается в потоке loop'а (пульс и asyncio debug логируют из него)
+        self.stalls.append(record)
+        metrics.inc("event_loop_stalls_total", source=record.source)
+        log.warning(
+            "Event loop stall",
+            duration=round(record.duration, 3),
+            source=record.source,
+            where=record.where,
+        )
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._heartbeat = time.monotonic()
+            self.lag_last = lag
+
+            metrics.observe("event_loop_lag_seconds", lag)
+            metrics.set_gauge("event_loop_pending_tasks", len(asyncio.all_tasks(loop)))
+            queued, threads = _default_executor_state(loop)
+            metrics.set_gauge("default_executor_queue", queued)
+            metrics.set_gauge("default_executor_threads", threads)
+
+            stack, self._sampled_stack = self._sampled_stack, None
+            if lag >= self.stall_threshold:
+                self.record_stall(
+                    StallRecord(
+                        at=datetime.now(timezone.utc),
+                        duration=lag,
+                        source="watchdog",
+                        where=stack[0] if stack else "unknown (stall ended before sampling)",
+                        stack=stack or [],
+                    )
+                )
+
+    def _watch(self) -> None:
+        """
+        Watchdog thread: sample the loop thread's stack once per stall.
+        """
+        check_every = self.stall_threshold / 2
+        sampled_for = 0.0
+        while not self._stopped.wait(check_every):
+            heartbeat = self._heartbeat
+            overdue = time.monotonic() - heartbeat - self.interval
+            if overdue < self.stall_threshold or sampled_for == heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._sampled_stack = _format_stack(frame)
+                sampled_for = heartbeat
+
+    def health(self) -> LoopHealth:
+        histogram = metrics.histogram("event_loop_lag_seconds")
+        loop = self._loop or asyncio.get_running_loop()
+        queued, threads = _default_executor_state(loop)
+        return LoopHealth(
+            lag_last=self.lag_last,
+            lag_p50=histogram.percentile(0.5) if histogram else 0.0,
+            lag_p99=histogram.percentile(0.99) if histogram else 0.0,
+            lag_max=histogram.max if histogram and histogram.count else 0.0,
+            pending_tasks=len(asyncio.all_tasks(loop)),
+            executor_queue=queued,
+            executor_threads=threads,
+            stalls_total=int(
+                sum(metrics.counter("event_loop_stalls_total", source=source) for source in ("watchdog", "asyncio"))
+            ),
+            recent_stalls=list(self.stalls)[-5:],
+        )
+
+
+loop_monitor = LoopMonitor()
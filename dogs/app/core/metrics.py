@@ -0,0 +1,121 @@
+"""
+Lightweight in-process metrics registry (counters, gauges, histograms).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Tuple
+
+# AICODE-NOTE: Без Prometheus-зависимости: метрики живут в памяти процесса
+# и отдаются админам через /metrics. При необходимости легко выгрузить наружу.
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_RESERVOIR_SIZE = 1024
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+@dataclass(slots=True)
+class Histogram:
+    """
+    Summary of observed values with a bounded reservoir for percentiles.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = float("-inf")
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=_RESERVOIR_SIZE))
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class MetricsRegistry:
+    """
+    Process-wide store for counters, gauges and histograms keyed by name and labels.
+    """
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: object) -> None:
+        series = self._counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: object) -> None:
+        self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: object) -> None:
+        series = self._histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def counter(self, name: str, **labels: object) -> float:
+        return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def gauge(self, name: str, **labels: object) -> float | None:
+        return self._gauges.get(name, {}).get(_label_key(labels))
+
+    def histogram(self, name: str, **labels: object) -> Histogram | None:
+        return self._histograms.get(name, {}).get(_label_key(labels))
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+    def render(self) -> str:
+        """
+        Render all series as plain text lines (one metric per line).
+        """
+        lines: list[str] = []
+        for name, series in sorted(self._counters.items()):
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        for name, series in sorted(self._gauges.items()):
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+        for name, series in sorted(self._histograms.items()):
+            for key, hist in sorted(series.items()):
+                lines.append(
+                    f"{name}{_format_labels(key)} count={hist.count} mean={hist.mean:.3f} "
+                    f"p50={hist.percentile(0.5):.3f} p95={hist.percentile(0.95):.3f} "
+                    f"p99={hist.percentile(0.99):.3f} max={hist.max:.3f}"
+                )
+        return "\n".join(lines)
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f"{k}={v}" for k, v in key) + "}"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,6 @@
+from .service import OCRService, ocr
+
+__all__ = [
+    "OCRService",
+    "ocr",
+]
@@ -0,0 +1,137 @@
+"""
+Text recognition for photos and screenshots in a bounded pool of worker processes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property
+from multiprocessing.context import BaseContext
+from typing import Optional
+
+import structlog
+
+from app.core.config import settings
+from app.core.deadline import budget, stage
+from app.core.metrics import metrics
+from app.core.overload import Overloaded, overload
+from app.core.parsers.exceptions import ExtractionError, UnsupportedContentError
+
+log = structlog.get_logger("OCR")
+
+# AICODE-NOTE: Распознавание — чистый CPU (Pillow + tesseract), поэтому не в event loop
+# и не в to_thread (GIL), а в пуле процессов. Воркеры стартуют от forkserver: он чистый
+# (без потоков и loop основного процесса), а модуль воркера загружен в нём заранее.
+# __main__ не предзагружается: это main.py со всем ботом (см. его импорты).
+_WORKER_MODULE = "app.core.ocr.worker"
+
+
+def _mp_context() -> BaseContext:
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([_WORKER_MODULE])
+        return context
+    return multiprocessing.get_context("spawn")  # Windows
+
+
+class OCRService:
+    """
+    Runs at most ``workers`` recognitions at a time; beyond ``max_pending`` images waiting
+    for a worker the caller gets Overloaded instead of an ever-growing queue.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None) -> None:
+        self._workers = workers
+        self._max_pending = max_pending
+        self.pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @cached_property
+    def workers(self) -> int:
+        # Зафиксировано при первом чтении: по нему созданы семафор и пул
+        return self._workers or settings.OCR_WORKERS
+
+    @property
+    def max_pending(self) -> int:
+        return self._max_pending or settings.OCR_MAX_PENDING
+
+    @cached_property
+    def _slots(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.workers)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Процессы поднимаются при первом изображении, а не на старте бота
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+        return self._pool
+
+    async def recognize(self, data: bytes) -> str:
+        """
+        Text of the image in ``data`` (any format Pillow reads).
+
+        Raises UnsupportedContentError if OCR is not installed, ExtractionError if no text was
+        found, Overloaded when the queue is full or expensive work is shed.
+        """
+        from .worker import OCRFailed, OCRUnavailable, recognize
+
+        overload.check_expensive("OCR", stage="ocr")
+        if self.pending >= self.max_pending:
+            metrics.inc("overload_rejected_total", stage="ocr")
+            raise Overloaded(f"OCR queue is full ({self.pending} images)", overload.retry_after())
+
+        self.pending += 1
+        metrics.set_gauge("ocr_pending", self.pending)
+        started = time.perf_counter()
+        try:
+            async with stage("ocr"), self._slots:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._get_pool(),
+                    recognize,
+                    data,
+                    settings.OCR_LANGUAGES,
+                    settings.OCR_MAX_SIDE,
+                    # Отмена по дедлайну не останавливает воркер — tesseract ограничен тем же бюджетом
+                    budget(settings.OCR_TIMEOUT),
+                )
+        except OCRUnavailable as e:
+            metrics.inc("ocr_images_total", result="unavailable")
+            log.error("OCR is not available", error=str(e))
+            raise UnsupportedContentError(str(e)) from e
+        except OCRFailed as e:
+            metrics.inc("ocr_images_total", result="error")
+            raise ExtractionError(f"Image recognition failed: {e}", "content") from e
+        except BrokenProcessPool as e:
+            # Воркер убит (OOM, сигнал) — следующий вызов поднимет новый пул
+            self._pool = None
+            metrics.inc("ocr_images_total", result="error")
+            log.error("OCR worker crashed", error=str(e))
+            raise ExtractionError("Image recognition failed: worker crashed", "other") from e
+        finally:
+            self.pending -= 1
+            metrics.set_gauge("ocr_pending", self.pending)
+
+        metrics.observe("ocr_cpu_seconds", result.cpu_seconds)
+        metrics.observe("ocr_seconds", time.perf_counter() - started)
+        if len(result.text) < settings.OCR_MIN_CHARS:
+            metrics.inc("ocr_images_total", result="empty")
+            raise ExtractionError("No text found in the image", "content")
+        metrics.inc("ocr_images_total", result="ok")
+        log.info(
+            "Image recognized",
+            chars=len(result.text),
+            cpu_seconds=round(result.cpu_seconds, 3),
+            size=f"{result.width}x{result.height}",
+        )
+        return result.text
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+ocr = OCRService()
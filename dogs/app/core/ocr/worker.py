@@ -0,0 +1,113 @@
+"""
+OCR work executed in the pool's worker processes: Pillow preprocessing and tesseract.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# AICODE-NOTE: Модуль выполняется в процессах пула: без настроек, event loop и логгера.
+# Исключения наружу — только свои, с одной строкой в args: исключения pytesseract
+# и Pillow не всегда переживают pickle на обратном пути в основной процесс.
+
+
+class OCRFailed(Exception):
+    """The image could not be decoded or recognized."""
+
+
+class OCRUnavailable(OCRFailed):
+    """Pillow, pytesseract or the tesseract binary (or a language pack) is missing."""
+
+
+@dataclass(slots=True, frozen=True)
+class OCRResult:
+    text: str
+    cpu_seconds: float  # Воркер + дочерний процесс tesseract
+    width: int  # Размер после предобработки
+    height: int
+
+
+def _cpu_time() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def otsu_threshold(histogram: list[int]) -> int:
+    """
+    Grey level that best separates text from background (Otsu's method) for a 256-bin histogram.
+    """
+    total = sum(histogram)
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+    sum_background = weight_background = 0
+    best_variance, threshold = -1.0, 127
+    for level, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += level * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance, threshold = variance, level
+    return threshold
+
+
+def preprocess(data: bytes, max_side: int) -> "Image.Image":
+    """
+    Decode, downscale to ``max_side`` and binarize: black text on white, as tesseract expects.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        gray = ImageOps.exif_transpose(source).convert("L")
+    if max(gray.size) > max_side:
+        gray.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    gray = ImageOps.autocontrast(gray, cutoff=1)
+
+    histogram = gray.histogram()
+    threshold = otsu_threshold(histogram)
+    # Тёмная тема (светлый текст на тёмном фоне): фон — большинство пикселей, делаем его белым
+    dark_background = sum(histogram[: threshold + 1]) > sum(histogram) / 2
+    table = [255 if (level > threshold) != dark_background else 0 for level in range(256)]
+    return gray.point(table, "1")
+
+
+def recognize(data: bytes, languages: str, max_side: int, timeout: float) -> OCRResult:
+    """
+    Preprocess the image and run tesseract on it; ``timeout`` kills a stuck tesseract process.
+    """
+    started = _cpu_time()
+    try:
+        import pytesseract
+
+        image = preprocess(data, max_side)
+        text = pytesseract.image_to_string(image, lang=languages, timeout=timeout)
+    except ImportError as e:
+        raise OCRUnavailable(f"OCR dependency is not installed: {e.name}") from None
+    except pytesseract.TesseractNotFoundError:
+        raise OCRUnavailable("tesseract binary is not installed") from None
+    except pytesseract.TesseractError as e:
+        # Чаще всего — нет языкового пакета из OCR_LANGUAGES
+        raise OCRUnavailable(f"tesseract failed: {str(e.message).strip()[:200]}") from None
+    except RuntimeError as e:
+        # pytesseract сообщает о таймауте RuntimeError('Tesseract process timeout')
+        raise OCRFailed(str(e)) from None
+    except Exception as e:
+        # Битый или неподдерживаемый файл изображения
+        raise OCRFailed(f"Cannot read image ({type(e).__name__})") from None
+    return OCRResult(
+        text=text.strip(),
+        cpu_seconds=_cpu_time() - started,
+        width=image.width,
+        height=image.height,
+    )
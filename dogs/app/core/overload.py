@@ -0,0 +1,230 @@
+"""
+Overload controller: watches load signals and steps through degradation levels.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Deque, Iterator, Optional
+
+import structlog
+
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import metrics
+from app.core.parsers.base import BaseParser
+
+log = structlog.get_logger("OverloadController")
+
+# AICODE-NOTE: Каждый сигнал делится на свой порог из Settings, давление — максимум
+# из них. Уровень поднимается сразу, как только давление дошло до его порога,
+# а опускается на одну ступень, только если давление держится ниже
+# порога * OVERLOAD_EXIT_RATIO в течение OVERLOAD_COOLDOWN секунд (гистерезис).
+_ENTER_PRESSURE = (1.0, 1.5, 2.0, 3.0)  # Порог входа в уровни 1..4
+_ERROR_WINDOW = 60.0  # Секунд истории исходов LLM для доли ошибок
+_ERROR_MIN_SAMPLES = 10  # Меньше вызовов — долю ошибок не считаем
+_MIN_OUTPUT_TOKENS = 400  # Меньше — модель обрывает шаблон саммари на середине
+
+
+class OverloadLevel(IntEnum):
+    NORMAL = 0
+    SHORT_OUTPUT = 1  # Урезанный бюджет ответа LLM
+    CHEAP_MODEL = 2  # Всё, кроме длинного контекста, — в быстрый тир
+    SKIP_EXPENSIVE = 3  # Дорогие парсеры (yt-dlp) не запускаются
+    REJECT = 4  # Сразу отвечаем «занят, попробуйте через N с»
+
+
+class Overloaded(Exception):
+    """Raised when the current overload level refuses the work; ``retry_after`` is an ETA in seconds."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True, frozen=True)
+class OverloadSignals:
+    llm_in_flight: int  # LLM-вызовы, ждущие ответа провайдера
+    requests_in_flight: int  # Сообщения в обработке
+    loop_lag: float
+    llm_error_rate: float
+
+    def pressure(self) -> float:
+        return max(
+            self.llm_in_flight / settings.OVERLOAD_LLM_IN_FLIGHT,
+            self.requests_in_flight / settings.OVERLOAD_REQUESTS_IN_FLIGHT,
+            self.loop_lag / settings.OVERLOAD_LOOP_LAG,
+            self.llm_error_rate / settings.OVERLOAD_LLM_ERROR_RATE,
+        )
+
+
+class OverloadController:
+    """
+    Tracks in-flight requests and LLM calls, re-evaluates the level every ``interval`` seconds.
+    """
+
+    def __init__(self, interval: float | None = None) -> None:
+        self._interval = interval
+        self.level = OverloadLevel.NORMAL
+        self.level_since = time.monotonic()
+        self.requests_in_flight = 0
+        self.llm_in_flight = 0
+        self._llm_outcomes: Deque[tuple[float, bool]] = deque()
+        # С какого момента давление ниже порога выхода из текущего уровня
+        self._calm_since: Optional[float] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def interval(self) -> float:
+        return self._interval or settings.OVERLOAD_CHECK_INTERVAL
+
+    def start(self) -> None:
+        if not settings.OVERLOAD_ENABLED:
+            log.info("Overload degradation disabled")
+            return
+        if self._task is None or self._task.done():
+            metrics.set_gauge("overload_level", int(self.level))
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.evaluate()
+
+    @contextmanager
+    def track_request(self) -> Iterator[None]:
+        self.requests_in_flight += 1
+        try:
+            yield
+        finally:
+            self.requests_in_flight -= 1
+
+    @contextmanager
+    def track_llm(self) -> Iterator[None]:
+        """
+        Count an LLM call as in flight; an exception counts towards the provider error rate.
+        """
+        self.llm_in_flight += 1
+        ok = False
+        try:
+            yield
+            ok = True
+        except asyncio.CancelledError:
+            # Отмену (пользователь, shutdown) провайдеру в вину не ставим
+            ok = True
+            raise
+        finally:
+            self.llm_in_flight -= 1
+            now = time.monotonic()
+            self._llm_outcomes.append((now, ok))
+            # Окно чистится и здесь: без цикла контроллера (OVERLOAD_ENABLED=false,
+            # пакетный CLI) signals() не вызывается и история росла бы бесконечно
+            self._trim_outcomes(now)
+
+    def _trim_outcomes(self, now: float) -> None:
+        while self._llm_outcomes and now - self._llm_outcomes[0][0] > _ERROR_WINDOW:
+            self._llm_outcomes.popleft()
+
+    def signals(self, now: float | None = None) -> OverloadSignals:
+        now = now if now is not None else time.monotonic()
+        self._trim_outcomes(now)
+        total = len(self._llm_outcomes)
+        errors = sum(1 for _, ok in self._llm_outcomes if not ok)
+        return OverloadSignals(
+            llm_in_flight=self.llm_in_flight,
+            requests_in_flight=self.requests_in_flight,
+            loop_lag=loop_monitor.lag_last,
+            llm_error_rate=errors / total if total >= _ERROR_MIN_SAMPLES else 0.0,
+        )
+
+    def evaluate(self, now: float | None = None) -> OverloadLevel:
+        """
+        Recompute the level from current signals, with hysteresis on the way down.
+        """
+        now = now if now is not None else time.monotonic()
+        signals = self.signals(now)
+        pressure = signals.pressure()
+        metrics.set_gauge("overload_pressure", round(pressure, 3))
+
+        target = OverloadLevel(sum(1 for threshold in _ENTER_PRESSURE if pressure >= threshold))
+        if target > self.level:
+            self._calm_since = None
+            self._set_level(target, now, signals)
+        elif self.level > OverloadLevel.NORMAL:
+            if pressure >= _ENTER_PRESSURE[self.level - 1] * settings.OVERLOAD_EXIT_RATIO:
+                self._calm_since = None
+            elif self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= settings.OVERLOAD_COOLDOWN:
+                # Вниз по одной ступени: следующая снова ждёт свой cooldown
+                self._calm_since = now
+                self._set_level(OverloadLevel(self.level - 1), now, signals)
+        return self.level
+
+    def _set_level(self, level: OverloadLevel, now: float, signals: OverloadSignals) -> None:
+        previous, self.level, self.level_since = self.level, level, now
+        metrics.set_gauge("overload_level", int(level))
+        metrics.inc("overload_transitions_total", level=level.name.lower())
+        log.warning(
+            "Overload level changed",
+            previous=previous.name.lower(),
+            level=level.name.lower(),
+            llm_in_flight=signals.llm_in_flight,
+            requests_in_flight=signals.requests_in_flight,
+            loop_lag=round(signals.loop_lag, 3),
+            llm_error_rate=round(signals.llm_error_rate, 3),
+        )
+
+    def retry_after(self, now: float | None = None) -> int:
+        """
+        Seconds until the controller can step down from its current level at the earliest.
+        """
+        now = now if now is not None else time.monotonic()
+        calm_for = now - self._calm_since if self._calm_since is not None else 0.0
+        return max(5, math.ceil(settings.OVERLOAD_COOLDOWN - calm_for))
+
+    def output_tokens(self, max_output_tokens: int) -> int:
+        """
+        Output budget for an LLM call at the current level.
+        """
+        if self.level < OverloadLevel.SHORT_OUTPUT:
+            return max_output_tokens
+        return max(_MIN_OUTPUT_TOKENS, round(max_output_tokens * settings.OVERLOAD_OUTPUT_FACTOR))
+
+    def check_parser(self, parser: BaseParser) -> None:
+        """
+        Raise Overloaded if ``parser`` is expensive and must be skipped at the current level.
+        """
+        if parser.expensive:
+            self.check_expensive(type(parser).__name__)
+
+    def check_expensive(self, name: str, stage: str = "parser") -> None:
+        """
+        Raise Overloaded if expensive work (``name``: a parser, OCR) must be skipped at the current level.
+        """
+        if self.level >= OverloadLevel.SKIP_EXPENSIVE:
+            metrics.inc("overload_rejected_total", stage=stage)
+            raise Overloaded(f"Overloaded: {name} skipped at level {self.level.name.lower()}", self.retry_after())
+
+    def reset(self) -> None:
+        self.level = OverloadLevel.NORMAL
+        self.level_since = time.monotonic()
+        self._calm_since = None
+        self._llm_outcomes.clear()
+
+
+overload = OverloadController()
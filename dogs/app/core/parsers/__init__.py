@@ -1,11 +1,14 @@
 from .base import BaseParser
-from .exceptions import ExtractionError, ParserError, UnsupportedContentError
+from .exceptions import CircuitOpenError, ExtractionError, ParserError, UnsupportedContentError
+from .guard import ParserGuard, parser_guard
 from .router import (
+    canonical_url,
     detect_content_type,
     is_http_url,
     is_probably_url,
     is_youtube_url,
     select_parser,
+    url_domain,
 )
 from .types import ContentType, ParsedContent
 from .web import WebParser
@@ -17,7 +20,10 @@ __all__ = [
     "ParsedContent",
     "ParserError",
     "ExtractionError",
+    "CircuitOpenError",
     "UnsupportedContentError",
+    "ParserGuard",
+    "parser_guard",
     "YouTubeParser",
     "WebParser",
     "detect_content_type",
@@ -25,6 +31,8 @@ __all__ = [
     "is_probably_url",
     "is_youtube_url",
     "is_http_url",
+    "canonical_url",
+    "url_domain",
 ]
 
 
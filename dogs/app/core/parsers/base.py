@@ -23,6 +23,9 @@ class BaseParser(abc.ABC):
     Base class for all parsers working inside the ETL pipeline.
     """
 
+    # Дорогие парсеры не запускаются на уровне перегрузки SKIP_EXPENSIVE (app.core.overload)
+    expensive: bool = False
+
     def __init__(self) -> None:
         self.log = structlog.get_logger(self.__class__.__name__)
 
@@ -1,3 +1,10 @@
+from typing import Literal
+
+# Why extraction failed: decides how long the failure is cached and whether it counts
+# against the domain's circuit breaker (see app.core.parsers.guard).
+FailureReason = Literal["not_found", "forbidden", "rate_limited", "server", "network", "content", "other"]
+
+
 class ParserError(RuntimeError):
     """Base exception for parser related issues."""
 
@@ -9,4 +16,25 @@ class UnsupportedContentError(ParserError):
 class ExtractionError(ParserError):
     """Raised when the parser fails to extract text from the source."""
 
+    def __init__(self, message: str, reason: FailureReason = "other") -> None:
+        super().__init__(message)
+        self.reason: FailureReason = reason
+
+
+class CircuitOpenError(ExtractionError):
+    """Raised without fetching when the source's domain keeps failing."""
+
 
+def reason_for_status(status: int) -> FailureReason:
+    """
+    Classify an HTTP error status.
+    """
+    if status in (404, 410):
+        return "not_found"
+    if status == 429:
+        return "rate_limited"
+    if status in (401, 402, 403, 451):
+        return "forbidden"
+    if status >= 500:
+        return "server"
+    return "other"
@@ -0,0 +1,195 @@
+"""
+Fail-fast layer in front of the URL parsers: a negative cache of extraction failures
+per canonical URL and a circuit breaker per domain.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+from urllib.parse import urlparse
+
+import structlog
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
+
+from .base import BaseParser
+from .exceptions import CircuitOpenError, ExtractionError, FailureReason
+from .router import canonical_url, url_domain
+from .types import ParsedContent
+
+log = structlog.get_logger("ParserGuard")
+
+# AICODE-NOTE: Домен выключают только ошибки самого сайта (сеть, 5xx, 429, 403).
+# "Нет субтитров" или 404 — свойство конкретной ссылки, а не YouTube целиком.
+_BREAKER_REASONS: frozenset[FailureReason] = frozenset({"forbidden", "rate_limited", "server", "network"})
+
+
+@dataclass(slots=True)
+class _CachedFailure:
+    message: str
+    reason: FailureReason
+
+
+@dataclass(slots=True)
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: closed -> open after ``threshold`` failures, then
+    half-open (one probe request) after ``open_for`` seconds.
+    """
+
+    failures: int = 0
+    state: str = "closed"
+    opened_at: float = 0.0
+    open_for: float = 0.0
+    probing: bool = False
+    last_reason: FailureReason = "other"
+
+    def retry_after(self, now: float) -> Optional[float]:
+        """
+        None if a call may go through (possibly as the half-open probe), otherwise
+        seconds until the next probe.
+        """
+        if self.state == "closed":
+            return None
+        if self.state == "open":
+            remaining = self.opened_at + self.open_for - now
+            if remaining > 0:
+                return remaining
+            self.state = "half_open"
+            metrics.inc("circuit_breaker_transitions_total", state="half_open")
+        if self.probing:
+            # Пробный запрос уже идёт — остальные ждут его результата
+            return 1.0
+        self.probing = True
+        return None
+
+    def record_failure(self, now: float, reason: FailureReason) -> bool:
+        """
+        Count a failure; returns True if the breaker has just opened.
+        """
+        self.probing = False
+        self.failures += 1
+        self.last_reason = reason
+        if self.state == "half_open":
+            self.open_for = min(self.open_for * 2, settings.CIRCUIT_MAX_OPEN_SECONDS)
+        elif self.failures >= settings.CIRCUIT_FAILURE_THRESHOLD:
+            self.open_for = settings.CIRCUIT_OPEN_SECONDS
+        else:
+            return False
+        self.state = "open"
+        self.opened_at = now
+        metrics.inc("circuit_breaker_transitions_total", state="open")
+        return True
+
+
+class ParserGuard:
+    """
+    Wraps ``parser.parse``: known-bad URLs and failing domains fail in microseconds
+    instead of waiting for a fetch timeout or yt-dlp.
+    """
+
+    def __init__(self, maxsize: int | None = None) -> None:
+        self._maxsize = maxsize
+
+    @cached_property
+    def _failures(self) -> TTLCache[_CachedFailure]:
+        return TTLCache(self._maxsize or settings.PARSER_FAILURE_CACHE_SIZE, settings.PARSER_FAILURE_TTL_TRANSIENT)
+
+    @cached_property
+    def _breakers(self) -> TTLCache[CircuitBreaker]:
+        # Состояние домена забывается, если он долго не падал
+        return TTLCache(self._maxsize or settings.PARSER_FAILURE_CACHE_SIZE, settings.CIRCUIT_MAX_OPEN_SECONDS * 2)
+
+    @staticmethod
+    def ttl_for(reason: FailureReason) -> float:
+        if reason in ("not_found", "forbidden"):
+            return settings.PARSER_FAILURE_TTL_PERMANENT
+        if reason == "content":
+            return settings.PARSER_FAILURE_TTL_CONTENT
+        return settings.PARSER_FAILURE_TTL_TRANSIENT
+
+    async def parse(self, parser: BaseParser, url: str) -> ParsedContent:
+        """
+        Parse ``url`` unless it failed recently or its domain's breaker is open.
+        Raises ExtractionError (CircuitOpenError when rejected by the breaker).
+        """
+        if not settings.PARSER_GUARD_ENABLED:
+            return await parser.parse(url)
+
+        key = canonical_url(url)
+        cached = self._failures.get(key)
+        if cached is not None:
+            metrics.inc("parser_fail_fast_total", cause="cached")
+            raise ExtractionError(cached.message, cached.reason)
+
+        try:
+            urlparse(url.strip()).port
+        except ValueError as e:
+            # Ссылку не скачать ни сейчас, ни потом — это свойство самой ссылки
+            error = ExtractionError(f"Invalid URL: {e}", "content")
+            self._failures.set(key, _CachedFailure(str(error), error.reason), ttl=self.ttl_for(error.reason))
+            raise error from e
+
+        domain = url_domain(url)
+        breaker = self._breakers.get(domain)
+        if breaker is not None:
+            retry_after = breaker.retry_after(time.monotonic())
+            if retry_after is not None:
+                metrics.inc("parser_fail_fast_total", cause="circuit_open")
+                raise CircuitOpenError(
+                    f"{domain} is failing repeatedly, next attempt in {retry_after:.0f}s", breaker.last_reason
+                )
+
+        try:
+            parsed = await parser.parse(url)
+        except ExtractionError as e:
+            self._failures.set(key, _CachedFailure(str(e), e.reason), ttl=self.ttl_for(e.reason))
+            if e.reason in _BREAKER_REASONS:
+                self._record_domain_failure(domain, e.reason)
+            else:
+                self._record_domain_success(domain)
+            raise
+        except BaseException:
+            # Отмена или неожиданная ошибка пробного запроса — следующий вызов попробует снова
+            if breaker is not None:
+                breaker.probing = False
+            raise
+        self._record_domain_success(domain)
+        return parsed
+
+    def _record_domain_failure(self, domain: str, reason: FailureReason) -> None:
+        # Перечитываем: пока шёл запрос, параллельный вызов мог создать запись домена
+        breaker = self._breakers.get(domain) or CircuitBreaker()
+        if breaker.record_failure(time.monotonic(), reason):
+            log.warning("Circuit opened", domain=domain, failures=breaker.failures, open_for=breaker.open_for)
+        # set() продлевает жизнь записи: счётчик подряд идущих ошибок не должен истечь раньше домена
+        self._breakers.set(domain, breaker)
+
+    def _record_domain_success(self, domain: str) -> None:
+        breaker = self._breakers.pop(domain)
+        if breaker is not None and breaker.state != "closed":
+            metrics.inc("circuit_breaker_transitions_total", state="closed")
+            log.info("Circuit closed", domain=domain)
+
+    def open_circuits(self) -> dict[str, float]:
+        """
+        Domains whose breaker is not closed -> seconds until the next probe.
+        """
+        now = time.monotonic()
+        return {
+            domain: max(0.0, breaker.opened_at + breaker.open_for - now)
+            for domain, breaker in self._breakers.items()
+            if breaker.state != "closed"
+        }
+
+    def clear(self) -> None:
+        self._failures.clear()
+        self._breakers.clear()
+
+
+parser_guard = ParserGuard()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import re
 from typing import Sequence
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 from .base import BaseParser
 from .exceptions import UnsupportedContentError
@@ -18,6 +18,10 @@ YOUTUBE_DOMAINS = {
 
 _URL_REGEX = re.compile(r"https?://", re.IGNORECASE)
 
+# Параметры, которые не меняют страницу: ссылки из разных мест должны совпадать
+_TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "igshid", "ref_src"}
+_YOUTUBE_ID = re.compile(r"^[\w-]{11}$")
+
 
 def is_probably_url(payload: str) -> bool:
     if not payload:
@@ -45,6 +49,67 @@ def is_http_url(payload: str) -> bool:
     return bool(parsed.netloc)
 
 
+def url_domain(url: str) -> str:
+    """
+    Registrable-looking host of a URL: lowercased, without ``www.``/``m.`` and port.
+    """
+    try:
+        host = (urlparse(url.strip()).hostname or "").lower()
+    except ValueError:
+        return ""
+    if host == "youtu.be" or host.endswith(".youtube.com"):
+        return "youtube.com"
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+    return host
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so that the same page shared in different ways maps to one key.
+
+    YouTube links become ``youtube:<video id>``; for other URLs the scheme and host are
+    lowercased, the fragment, default port and tracking parameters are dropped and the
+    query is sorted.
+    """
+    url = url.strip()
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return url
+    if not parsed.netloc:
+        return url
+
+    if url_domain(url) == "youtube.com":
+        video_id = None
+        if parsed.netloc.lower() == "youtu.be":
+            video_id = parsed.path.strip("/").split("/")[0]
+        elif parsed.path.startswith(("/shorts/", "/live/", "/embed/")):
+            video_id = parsed.path.split("/")[2]
+        else:
+            video_id = dict(parse_qsl(parsed.query)).get("v")
+        if video_id and _YOUTUBE_ID.match(video_id):
+            return f"youtube:{video_id}"
+
+    try:
+        port = parsed.port
+    except ValueError:
+        # Порт не число или вне диапазона — ключом служит netloc как есть
+        host, port = parsed.netloc, None
+    else:
+        host = (parsed.hostname or "").lower()
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parsed.path if parsed.path not in ("", "/") else "/"
+    return urlunparse((parsed.scheme.lower(), host, path, parsed.params, urlencode(query), ""))
+
+
 def detect_content_type(payload: str) -> ContentType:
     """
     Naive router that classifies the incoming payload for downstream services.
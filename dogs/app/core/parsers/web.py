@@ -1,17 +1,36 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Optional
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
 from urllib.parse import urlparse
 
-import httpx
-from newspaper import Article
+from app.core.deadline import budget, stage
 
 from .base import BaseParser
-from .exceptions import ExtractionError, UnsupportedContentError
+from .exceptions import ExtractionError, UnsupportedContentError, reason_for_status
 from .router import is_http_url, is_youtube_url
 from .types import ContentType, ParsedContent
 
+if TYPE_CHECKING:
+    from newspaper import Article
+
+
+@dataclass(slots=True)
+class ConditionalResponse:
+    """
+    Result of a conditional GET: ``status == 304`` means the cached copy is still valid.
+    """
+
+    status: int
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
 
 class WebParser(BaseParser):
     """
@@ -20,6 +39,8 @@ class WebParser(BaseParser):
     AICODE-NOTE: Используем httpx для загрузки HTML с verify=False,
     чтобы обойти корпоративный SSL-перехват. newspaper3k не поддерживает
     отключение SSL проверки напрямую.
+    httpx и newspaper (с nltk) импортируются при первом использовании —
+    они не нужны для старта бота (см. app.core.warmup).
     """
 
     def __init__(self, user_agent: Optional[str] = None, timeout: float = 30.0) -> None:
@@ -41,19 +62,24 @@ class WebParser(BaseParser):
         if not self.can_handle(payload):
             raise UnsupportedContentError("URL is not supported by WebParser")
 
+        import httpx
+
         # Загружаем HTML через httpx с отключенной SSL проверкой
         try:
-            html = await self._fetch_html(payload)
+            async with stage("fetch"):
+                html = await self._fetch_html(payload)
         except httpx.HTTPStatusError as e:
-            raise ExtractionError(f"Failed to fetch article: HTTP {e.response.status_code}") from e
+            status = e.response.status_code
+            raise ExtractionError(f"Failed to fetch article: HTTP {status}", reason_for_status(status)) from e
         except httpx.RequestError as e:
-            raise ExtractionError(f"Failed to fetch article: {e}") from e
+            raise ExtractionError(f"Failed to fetch article: {e}", "network") from e
 
-        article = await asyncio.to_thread(self._parse_html, payload, html)
+        async with stage("extract"):
+            article = await asyncio.to_thread(self._parse_html, payload, html)
         
         text = (article.text or "").strip()
         if not text:
-            raise ExtractionError("Article text is empty after parsing")
+            raise ExtractionError("Article text is empty after parsing", "content")
 
         metadata = {
             "authors": article.authors,
@@ -74,9 +100,11 @@ class WebParser(BaseParser):
         """
         Fetch HTML content with SSL verification disabled for corporate proxy.
         """
+        import httpx
+
         async with httpx.AsyncClient(
             verify=False,
-            timeout=httpx.Timeout(self.timeout, connect=10.0),
+            timeout=httpx.Timeout(budget(self.timeout), connect=budget(10.0)),
             follow_redirects=True,
         ) as client:
             response = await client.get(
@@ -86,10 +114,54 @@ class WebParser(BaseParser):
             response.raise_for_status()
             return response.text
 
+    async def fetch_conditional(
+        self,
+        url: str,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        accept: str = "*/*",
+    ) -> ConditionalResponse:
+        """
+        GET with If-None-Match / If-Modified-Since (used for feeds). Raises ExtractionError.
+        """
+        import httpx
+
+        headers = {"User-Agent": self.user_agent, "Accept": accept}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            async with httpx.AsyncClient(
+                verify=False,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                follow_redirects=True,
+            ) as client:
+                response = await client.get(url, headers=headers)
+                if response.status_code == 304:
+                    return ConditionalResponse(304, b"", etag, last_modified)
+                response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            raise ExtractionError(f"Failed to fetch {url}: HTTP {status}", reason_for_status(status)) from e
+        except httpx.RequestError as e:
+            raise ExtractionError(f"Failed to fetch {url}: {e}", "network") from e
+
+        return ConditionalResponse(
+            status=response.status_code,
+            content=response.content,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+
     def _parse_html(self, url: str, html: str) -> Article:
         """
         Parse pre-fetched HTML with newspaper3k.
         """
+        from newspaper import Article
+
         article = Article(url, browser_user_agent=self.user_agent)
         article.download(input_html=html)
         article.parse()
@@ -3,18 +3,33 @@ from __future__ import annotations
 import asyncio
 import re
 from typing import Optional, Sequence, Tuple
+from urllib.error import HTTPError, URLError
 from urllib.request import urlopen
 
-import yt_dlp
+from app.core.deadline import DeadlineExceeded, budget, stage
 
 from .base import BaseParser
-from .exceptions import ExtractionError, UnsupportedContentError
+from .exceptions import ExtractionError, FailureReason, UnsupportedContentError, reason_for_status
 from .router import is_youtube_url
 from .types import ContentType, ParsedContent
 
 _TIMESTAMP_PATTERN = re.compile(r"\d{2}:\d{2}:\d{2}\.\d{3}")
 
 
+def _classify_ytdlp_error(message: str) -> FailureReason:
+    """
+    Map a yt-dlp error message to a failure reason (yt-dlp has no structured error codes).
+    """
+    lowered = message.lower()
+    if "429" in lowered or "not a bot" in lowered or "sign in to confirm" in lowered:
+        return "rate_limited"
+    if "unavailable" in lowered or "private video" in lowered or "removed" in lowered:
+        return "not_found"
+    if "timed out" in lowered or "connection" in lowered:
+        return "network"
+    return "other"
+
+
 class YouTubeParser(BaseParser):
     """
     Parser that fetches subtitles with yt-dlp and converts them into text.
@@ -24,6 +39,9 @@ class YouTubeParser(BaseParser):
     Статус: ожидаем обновление yt-dlp или альтернативное решение.
     """
 
+    # yt-dlp: тяжёлый поток и несколько запросов к YouTube на ссылку
+    expensive = True
+
     def __init__(
         self,
         preferred_languages: Optional[Sequence[str]] = None,
@@ -46,15 +64,30 @@ class YouTubeParser(BaseParser):
         if not self.can_handle(payload):
             raise UnsupportedContentError("Provided URL is not a YouTube link")
 
-        info = await asyncio.to_thread(self._extract_video_info, payload)
+        try:
+            async with stage("video_info"):
+                info = await asyncio.to_thread(self._extract_video_info, payload, budget(30.0))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # yt_dlp.utils.DownloadError: недоступное видео, блокировка YouTube, сеть
+            raise ExtractionError(f"Failed to fetch video info: {e}", _classify_ytdlp_error(str(e))) from e
         subtitle_url, subtitle_lang = self._resolve_subtitle_url(info)
         if not subtitle_url:
-            raise ExtractionError("Subtitles are not available for this video")
-
-        raw_vtt = await asyncio.to_thread(self._download_subtitle, subtitle_url)
+            raise ExtractionError("Subtitles are not available for this video", "content")
+
+        try:
+            async with stage("subtitles"):
+                raw_vtt = await asyncio.to_thread(
+                    self._download_subtitle, subtitle_url, budget(self.subtitle_timeout)
+                )
+        except HTTPError as e:
+            raise ExtractionError(f"Failed to download subtitles: HTTP {e.code}", reason_for_status(e.code)) from e
+        except (URLError, TimeoutError) as e:
+            raise ExtractionError(f"Failed to download subtitles: {e}", "network") from e
         body = self._vtt_to_text(raw_vtt)
         if not body:
-            raise ExtractionError("Parsed subtitle text is empty")
+            raise ExtractionError("Parsed subtitle text is empty", "content")
 
         metadata = {
             "language": subtitle_lang,
@@ -69,7 +102,10 @@ class YouTubeParser(BaseParser):
             metadata=metadata,
         )
 
-    def _extract_video_info(self, url: str) -> dict:
+    def _extract_video_info(self, url: str, socket_timeout: float) -> dict:
+        # yt_dlp тяжёлый — импортируем при первой ссылке на видео
+        import yt_dlp
+
         ydl_opts = {
             "skip_download": True,
             "quiet": True,
@@ -78,6 +114,7 @@ class YouTubeParser(BaseParser):
             "writeautomaticsub": True,
             "subtitlesformat": "vtt",
             "subtitleslangs": self.preferred_languages,
+            "socket_timeout": socket_timeout,
         }
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             return ydl.extract_info(url, download=False)
@@ -100,8 +137,8 @@ class YouTubeParser(BaseParser):
                     return tracks[variant][0].get("url"), variant
         return None, None
 
-    def _download_subtitle(self, url: str) -> str:
-        with urlopen(url, timeout=self.subtitle_timeout) as response:  # nosec B310
+    def _download_subtitle(self, url: str, timeout: float) -> str:
+        with urlopen(url, timeout=timeout) as response:  # nosec B310
             return response.read().decode("utf-8", errors="ignore")
 
     def _vtt_to_text(self, subtitle: str) -> str:
@@ -0,0 +1,202 @@
+"""
+GCRA (Generic Cell Rate Algorithm) rate limiter with pluggable storage backends.
+"""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import math
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable
+
+import structlog
+
+log = structlog.get_logger("RateLimiter")
+
+# AICODE-NOTE: GCRA хранит на ключ одно число — TAT (theoretical arrival time).
+# Проверка O(1) и не требует списка таймстемпов. Ключ с TAT <= now
+# эквивалентен новому пользователю, поэтому его можно безопасно удалить.
+
+
+@dataclass(slots=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: float
+
+
+class RateLimitBackend(abc.ABC):
+    """
+    Storage for per-key TAT values. Implementations must apply the GCRA step atomically.
+    """
+
+    @abc.abstractmethod
+    async def hit(
+        self,
+        key: Hashable,
+        now: float,
+        emission_interval: float,
+        tolerance: float,
+    ) -> float | None:
+        """
+        Try to consume one slot. Returns None if allowed, otherwise seconds to wait.
+        """
+
+    @abc.abstractmethod
+    async def peek(self, key: Hashable) -> float | None:
+        """
+        Return the stored TAT for the key (None if unknown).
+        """
+
+    @abc.abstractmethod
+    async def evict(self, now: float) -> int:
+        """
+        Drop keys whose TAT is in the past. Returns the number of evicted keys.
+        """
+
+    async def close(self) -> None:
+        return None
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local backend: one float per key in a plain dict.
+    """
+
+    def __init__(self) -> None:
+        self._tat: Dict[Hashable, float] = {}
+
+    async def hit(
+        self,
+        key: Hashable,
+        now: float,
+        emission_interval: float,
+        tolerance: float,
+    ) -> float | None:
+        tat = max(self._tat.get(key, now), now)
+        if tat - now > tolerance:
+            return tat - now - tolerance
+        self._tat[key] = tat + emission_interval
+        return None
+
+    async def peek(self, key: Hashable) -> float | None:
+        return self._tat.get(key)
+
+    async def evict(self, now: float) -> int:
+        stale = [key for key, tat in self._tat.items() if tat <= now]
+        for key in stale:
+            del self._tat[key]
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Backend shared by several bot processes on one host through a local SQLite file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+        )
+        # Один поток — все операции с соединением сериализованы
+        self._lock = asyncio.Lock()
+
+    async def hit(
+        self,
+        key: Hashable,
+        now: float,
+        emission_interval: float,
+        tolerance: float,
+    ) -> float | None:
+        async with self._lock:
+            return await asyncio.to_thread(self._hit_sync, str(key), now, emission_interval, tolerance)
+
+    def _hit_sync(self, key: str, now: float, emission_interval: float, tolerance: float) -> float | None:
+        # BEGIN IMMEDIATE берёт writer lock, что делает read-modify-write атомарным между процессами
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0] if row else now, now)
+            if tat - now > tolerance:
+                return tat - now - tolerance
+            self._conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, tat + emission_interval),
+            )
+            return None
+        finally:
+            self._conn.execute("COMMIT")
+
+    async def peek(self, key: Hashable) -> float | None:
+        async with self._lock:
+            row = await asyncio.to_thread(
+                lambda: self._conn.execute(
+                    "SELECT tat FROM rate_limits WHERE key = ?", (str(key),)
+                ).fetchone()
+            )
+        return row[0] if row else None
+
+    async def evict(self, now: float) -> int:
+        async with self._lock:
+            cursor = await asyncio.to_thread(
+                self._conn.execute, "DELETE FROM rate_limits WHERE tat <= ?", (now,)
+            )
+        return cursor.rowcount
+
+    async def close(self) -> None:
+        self._conn.close()
+
+
+class GCRARateLimiter:
+    """
+    Allows ``max_requests`` per ``period_seconds`` with bursts up to ``max_requests``.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        period_seconds: float,
+        backend: RateLimitBackend | None = None,
+        eviction_interval: float = 300.0,
+    ) -> None:
+        self.max_requests = max_requests
+        self.period_seconds = period_seconds
+        self.emission_interval = period_seconds / max_requests
+        self.tolerance = period_seconds - self.emission_interval
+        self.backend = backend or MemoryRateLimitBackend()
+        self.eviction_interval = eviction_interval
+        self._next_eviction = time.time() + eviction_interval
+
+    async def hit(self, key: Hashable) -> RateLimitResult:
+        now = time.time()
+        if now >= self._next_eviction:
+            await self._evict(now)
+
+        wait = await self.backend.hit(key, now, self.emission_interval, self.tolerance)
+        if wait is not None:
+            return RateLimitResult(allowed=False, retry_after=wait)
+        return RateLimitResult(allowed=True, retry_after=0.0)
+
+    async def remaining(self, key: Hashable, now: float | None = None) -> int:
+        now = now if now is not None else time.time()
+        tat = await self.backend.peek(key)
+        if tat is None or tat <= now:
+            return self.max_requests
+        used = (tat - now) / self.emission_interval
+        return max(0, self.max_requests - math.ceil(used))
+
+    async def _evict(self, now: float) -> None:
+        # Периодическая амортизированная очистка — без отдельной фоновой задачи
+        self._next_eviction = now + self.eviction_interval
+        evicted = await self.backend.evict(now)
+        if evicted:
+            log.debug("Evicted idle rate limit keys", evicted=evicted)
@@ -0,0 +1,96 @@
+"""
+Tenants: several branded bots served by one process, each with its own prompt, model and limits.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, SecretStr, TypeAdapter
+
+from app.core.config import settings
+
+# AICODE-NOTE: Всё тяжёлое общее для тенантов: парсеры, пул соединений LLM, кэши,
+# TokenCounter, БД и event loop. На тенанта — только Bot (своя HTTP-сессия к Bot API
+# и свой лимитер исходящих), настройки и записи в БД с его именем.
+DEFAULT_TENANT = "default"  # Бот из TG_TOKEN и все строки, созданные до появления тенантов
+
+
+class TenantConfig(BaseModel):
+    """
+    One bot of the process. Unset fields fall back to the global Settings.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    name: str = Field(pattern=r"^[a-z0-9_-]{1,32}$")
+    token: SecretStr
+    prompt: Optional[str] = None  # Системный промпт саммари (по умолчанию DEEP_ANALYSIS_PROMPT)
+    model: Optional[str] = None  # Модель провайдера вместо OPENAI_MODEL / ANTHROPIC_MODEL
+    rate_limit_requests: Optional[int] = None
+    rate_limit_period: Optional[int] = None
+
+    @property
+    def bot_id(self) -> int:
+        # Id бота — часть токена до двоеточия, getMe не нужен
+        return int(self.token.get_secret_value().split(":", 1)[0])
+
+
+_tenant_list = TypeAdapter(list[TenantConfig])
+
+
+@cache
+def load_tenants() -> tuple[TenantConfig, ...]:
+    """
+    Tenants from TENANTS_FILE, preceded by the "default" tenant when TG_TOKEN is set.
+    """
+    tenants: list[TenantConfig] = []
+    if settings.TG_TOKEN:
+        tenants.append(TenantConfig(name=DEFAULT_TENANT, token=settings.TG_TOKEN))
+    if settings.TENANTS_FILE:
+        tenants.extend(_tenant_list.validate_json(Path(settings.TENANTS_FILE).read_bytes()))
+
+    if not tenants:
+        raise ValueError("No bots configured: set TG_TOKEN or TENANTS_FILE")
+    names = [tenant.name for tenant in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate tenant names: {names}")
+    if len({tenant.bot_id for tenant in tenants}) != len(tenants):
+        raise ValueError("Two tenants use the same bot token")
+    return tuple(tenants)
+
+
+def get_tenant(name: str) -> Optional[TenantConfig]:
+    return next((tenant for tenant in load_tenants() if tenant.name == name), None)
+
+
+_current: ContextVar[Optional[TenantConfig]] = ContextVar("tenant", default=None)
+
+
+@contextmanager
+def use_tenant(tenant: TenantConfig) -> Iterator[TenantConfig]:
+    """
+    Make ``tenant`` current for the update being handled (and tasks spawned from it).
+    """
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
+
+
+def current_tenant() -> Optional[TenantConfig]:
+    """
+    Tenant of the update being handled; None in background jobs (feed polling, warmup).
+    """
+    return _current.get()
+
+
+def current_tenant_name() -> str:
+    tenant = _current.get()
+    return tenant.name if tenant is not None else DEFAULT_TENANT
+
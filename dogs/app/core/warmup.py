@@ -0,0 +1,55 @@
+"""
+Background warmup of heavy dependencies that are imported lazily.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import time
+
+import structlog
+
+from app.core.metrics import metrics
+
+log = structlog.get_logger("Warmup")
+
+# AICODE-NOTE: Эти модули не импортируются на пути старта (python -m benchmarks.bench_cold_start
+# это проверяет). Прогреваем их после запуска polling, чтобы первая ссылка не платила за импорт.
+HEAVY_MODULES = (
+    "openai",
+    "httpx",
+    "newspaper",
+    "yt_dlp",
+)
+
+
+def _import_all() -> None:
+    for name in HEAVY_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            # Модуль упадёт и при реальном использовании — там ошибка и обработается
+            log.warning("Warmup import failed", module=name, error=str(e))
+            continue
+        metrics.observe("warmup_import_seconds", time.perf_counter() - started)
+
+    # Общий LLM-клиент: создание SDK-клиента и загрузка tiktoken — тоже вне event loop
+    from app.core.llm.service import get_llm_service
+
+    try:
+        get_llm_service()
+    except Exception as e:
+        log.warning("Warmup of LLM service failed", error=str(e))
+
+
+async def warmup(delay: float = 1.0) -> None:
+    """
+    Import heavy modules and build the shared LLM service in a worker thread
+    once the bot is already serving updates.
+    """
+    await asyncio.sleep(delay)
+    started = time.perf_counter()
+    await asyncio.to_thread(_import_all)
+    log.info("Warmup finished", duration=round(time.perf_counter() - started, 2))
@@ -0,0 +1,287 @@
+"""
+Write-behind buffer for SummaryRequest analytics records.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Deque, Literal, Optional
+
+import structlog
+from tortoise import Tortoise, timezone
+from tortoise.transactions import in_transaction
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tenants import current_tenant_name
+
+from .models import SummaryRequest
+from .rollups import RollupRow, aggregate, apply_deltas
+
+log = structlog.get_logger("AnalyticsBuffer")
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest"]
+
+# AICODE-NOTE: Запись аналитики ушла с пути ответа пользователю. Запрос живёт
+# в памяти, пока не завершится, и попадает в БД одной строкой с финальным
+# статусом через пакетный INSERT (вместе с инкрементом почасовых роллапов).
+# Незавершённые записи сохраняются как "processing" только при остановке бота.
+# Упавший пакет возвращается в начало очереди; после ANALYTICS_MAX_ATTEMPTS
+# неудач он пишется по одной строке, и строки, которые БД не принимает при
+# живом соединении, уходят в карантин (лог + метрика), а не держат очередь.
+
+
+@dataclass(slots=True, eq=False)
+class RequestRecord:
+    """
+    In-memory lifecycle of a single SummaryRequest before it is persisted.
+    """
+
+    user_id: int
+    content_type: str
+    source_url: Optional[str] = None
+    status: str = "processing"
+    tokens_used: int = 0
+    error_message: Optional[str] = None
+    model: Optional[str] = None
+    model_tier: Optional[str] = None
+    latency_ms: Optional[int] = None
+    tenant: str = field(default_factory=current_tenant_name)
+    created_at: datetime = field(default_factory=timezone.now)
+    started_at: float = field(default_factory=time.monotonic)
+    flush_attempts: int = 0
+
+    def to_model(self) -> SummaryRequest:
+        return SummaryRequest(
+            user_id=self.user_id,
+            content_type=self.content_type,
+            source_url=self.source_url,
+            status=self.status,
+            tokens_used=self.tokens_used,
+            error_message=self.error_message,
+            model=self.model,
+            model_tier=self.model_tier,
+            latency_ms=self.latency_ms,
+            tenant=self.tenant,
+            created_at=self.created_at,
+        )
+
+    def to_rollup_row(self) -> RollupRow:
+        return RollupRow(
+            created_at=self.created_at,
+            content_type=self.content_type,
+            status=self.status,
+            model=self.model,
+            tokens_used=self.tokens_used,
+            latency_ms=self.latency_ms,
+        )
+
+
+class AnalyticsBuffer:
+    """
+    Bounded in-memory queue of finished request records flushed in batches by a
+    background task on a size or time trigger.
+    """
+
+    def __init__(
+        self,
+        max_size: int | None = None,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        overflow_policy: OverflowPolicy | None = None,
+        max_attempts: int | None = None,
+    ) -> None:
+        self._max_size = max_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._overflow_policy = overflow_policy
+        self._max_attempts = max_attempts
+        self._queue: Deque[RequestRecord] = deque()
+        self._inflight: set[RequestRecord] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size or settings.ANALYTICS_BUFFER_SIZE
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size or settings.ANALYTICS_FLUSH_BATCH
+
+    @property
+    def flush_interval(self) -> float:
+        return self._flush_interval or settings.ANALYTICS_FLUSH_INTERVAL
+
+    @property
+    def overflow_policy(self) -> OverflowPolicy:
+        return self._overflow_policy or settings.ANALYTICS_OVERFLOW_POLICY
+
+    @property
+    def max_attempts(self) -> int:
+        return self._max_attempts or settings.ANALYTICS_MAX_ATTEMPTS
+
+    def start_request(
+        self,
+        user_id: int,
+        content_type: str,
+        source_url: Optional[str] = None,
+    ) -> RequestRecord:
+        """
+        Register a new request. Nothing is written to the DB at this point.
+        """
+        record = RequestRecord(user_id=user_id, content_type=content_type, source_url=source_url)
+        self._inflight.add(record)
+        return record
+
+    def finish_request(
+        self,
+        record: RequestRecord,
+        status: str,
+        tokens_used: int = 0,
+        error_message: Optional[str] = None,
+        model: Optional[str] = None,
+        model_tier: Optional[str] = None,
+    ) -> None:
+        """
+        Set the final status and enqueue the record for a batched insert.
+        """
+        record.status = status
+        record.tokens_used = tokens_used
+        record.model = model
+        record.model_tier = model_tier
+        record.latency_ms = int((time.monotonic() - record.started_at) * 1000)
+        if error_message:
+            record.error_message = error_message
+        self._inflight.discard(record)
+        self._enqueue(record)
+
+    def _enqueue(self, record: RequestRecord) -> None:
+        if len(self._queue) >= self.max_size:
+            metrics.inc("analytics_dropped_total", policy=self.overflow_policy)
+            if self.overflow_policy == "drop_newest":
+                return
+            self._queue.popleft()
+        self._queue.append(record)
+        metrics.set_gauge("analytics_buffer_depth", len(self._queue))
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """
+        Start the background flusher (call from the running event loop).
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write all queued records in batches. Returns the number of rows written.
+        """
+        written = 0
+        async with self._flush_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                started = time.perf_counter()
+                try:
+                    await self._write(batch)
+                except asyncio.CancelledError:
+                    self._queue.extendleft(reversed(batch))
+                    raise
+                except Exception as e:
+                    for record in batch:
+                        record.flush_attempts += 1
+                    log.error("Failed to flush analytics batch", rows=len(batch), error=str(e))
+                    exhausted = max(record.flush_attempts for record in batch) >= self.max_attempts
+                    if not exhausted or not await self._database_alive():
+                        # Возвращаем батч в начало очереди и пробуем на следующем цикле:
+                        # при недоступной БД строки не виноваты и в карантин не идут
+                        self._queue.extendleft(reversed(batch))
+                        break
+                    isolated, failed = await self._write_one_by_one(batch)
+                    written += isolated
+                    if failed:
+                        metrics.inc("analytics_quarantined_total", len(failed))
+                    continue
+                written += len(batch)
+                metrics.observe("analytics_flush_seconds", time.perf_counter() - started)
+                metrics.inc("analytics_rows_written_total", len(batch))
+            metrics.set_gauge("analytics_buffer_depth", len(self._queue))
+        return written
+
+    async def _write(self, batch: list[RequestRecord]) -> None:
+        # Сырые строки и инкремент почасовых роллапов — в одной транзакции
+        async with in_transaction() as connection:
+            await SummaryRequest.bulk_create(
+                [record.to_model() for record in batch],
+                using_db=connection,
+            )
+            await apply_deltas(
+                aggregate(record.to_rollup_row() for record in batch),
+                connection,
+            )
+
+    async def _write_one_by_one(self, batch: list[RequestRecord]) -> tuple[int, list[RequestRecord]]:
+        """
+        Write a repeatedly failing batch row by row, quarantining the rows the
+        database rejects. Returns the number of rows written and the rejected records.
+        """
+        written = 0
+        failed: list[RequestRecord] = []
+        for index, record in enumerate(batch):
+            try:
+                await self._write([record])
+            except asyncio.CancelledError:
+                self._queue.extendleft(reversed(batch[index:]))
+                raise
+            except Exception as e:
+                # Строка целиком уходит в лог, чтобы её можно было разобрать и дозаписать
+                log.error("Analytics record quarantined", error=str(e), **asdict(record))
+                failed.append(record)
+                continue
+            written += 1
+        if written:
+            metrics.inc("analytics_rows_written_total", written)
+        return written, failed
+
+    async def _database_alive(self) -> bool:
+        try:
+            await Tortoise.get_connection("default").execute_query("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+        return True
+
+    async def close(self) -> None:
+        """
+        Stop the flusher and persist everything, including still-running requests.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for record in list(self._inflight):
+            self._inflight.discard(record)
+            self._queue.append(record)
+        written = await self.flush()
+        log.info("Analytics buffer flushed", rows=written, left=len(self._queue))
+
+
+analytics = AnalyticsBuffer()
@@ -0,0 +1,217 @@
+"""
+Streaming CSV export of SummaryRequest rows into gzip-compressed, size-capped parts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import gzip
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+from tortoise import timezone
+
+from .models import SummaryRequest
+
+EXPORT_HEADER = [
+    "id",
+    "user_telegram_id",
+    "user_username",
+    "content_type",
+    "source_url",
+    "status",
+    "tokens_used",
+    "error_message",
+    "created_at",
+]
+# Колонки выбираются с JOIN на users прямо в SQL — без объектов моделей
+EXPORT_COLUMNS = (
+    "id",
+    "user__telegram_id",
+    "user__username",
+    "content_type",
+    "source_url",
+    "status",
+    "tokens_used",
+    "error_message",
+    "created_at",
+)
+EXPORT_STATUSES = ("success", "error", "processing")
+EXPORT_PAGE_SIZE = 2_000
+# AICODE-NOTE: Лимит загрузки документа Bot API — 50 МБ, оставляем запас.
+DEFAULT_MAX_PART_BYTES = 45 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class ExportFilters:
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None  # включительно
+    status: Optional[str] = None
+
+    def describe(self) -> str:
+        parts = []
+        if self.date_from:
+            parts.append(f"с {self.date_from.isoformat()}")
+        if self.date_to:
+            parts.append(f"по {self.date_to.isoformat()}")
+        if self.status:
+            parts.append(f"статус {self.status}")
+        return ", ".join(parts) or "все записи"
+
+
+@dataclass(slots=True)
+class ExportPart:
+    path: Path
+    index: int
+    rows: int
+    size: int
+
+
+def parse_export_args(args: Optional[str]) -> ExportFilters:
+    """
+    Parse ``from=YYYY-MM-DD to=YYYY-MM-DD status=success`` (any order, all optional).
+
+    Raises ValueError on malformed input.
+    """
+    filters = ExportFilters()
+    for token in (args or "").split():
+        key, sep, value = token.partition("=")
+        if not sep:
+            raise ValueError(f"Ожидается key=value, получено: {token}")
+        key = key.lower()
+        if key == "from":
+            filters.date_from = date.fromisoformat(value)
+        elif key == "to":
+            filters.date_to = date.fromisoformat(value)
+        elif key == "status":
+            if value not in EXPORT_STATUSES:
+                raise ValueError(f"Неизвестный статус: {value}")
+            filters.status = value
+        else:
+            raise ValueError(f"Неизвестный параметр: {key}")
+    if filters.date_from and filters.date_to and filters.date_from > filters.date_to:
+        raise ValueError("Дата 'from' позже даты 'to'")
+    return filters
+
+
+def _day_start(day: date) -> datetime:
+    start = datetime.combine(day, time.min)
+    return start.replace(tzinfo=dt_timezone.utc) if timezone.get_use_tz() else start
+
+
+async def iter_export_pages(
+    filters: ExportFilters,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> AsyncIterator[List[Sequence[Any]]]:
+    """
+    Yield formatted rows newest-first in pages using keyset pagination on the primary key.
+    """
+    query = SummaryRequest.all()
+    if filters.date_from:
+        query = query.filter(created_at__gte=_day_start(filters.date_from))
+    if filters.date_to:
+        query = query.filter(created_at__lt=_day_start(filters.date_to + timedelta(days=1)))
+    if filters.status:
+        query = query.filter(status=filters.status)
+
+    last_id: Optional[int] = None
+    while True:
+        page_query = query if last_id is None else query.filter(id__lt=last_id)
+        page = await page_query.order_by("-id").limit(page_size).values_list(*EXPORT_COLUMNS)
+        if not page:
+            return
+        last_id = page[-1][0]
+        yield [format_export_row(row) for row in page]
+
+
+def format_export_row(row: Sequence[Any]) -> list[Any]:
+    """
+    Convert a values_list row (EXPORT_COLUMNS order) into CSV cells.
+    """
+    req_id, telegram_id, username, content_type, source_url, status, tokens, error, created_at = row
+    return [
+        req_id,
+        telegram_id,
+        username or "",
+        content_type,
+        source_url or "",
+        status,
+        tokens,
+        error or "",
+        created_at.isoformat() if created_at else "",
+    ]
+
+
+class _GzipCsvPart:
+    """
+    One gzip-compressed CSV file on disk; written from a worker thread.
+    """
+
+    def __init__(self, directory: str, index: int) -> None:
+        fd, name = tempfile.mkstemp(prefix=f"export_{index:03d}_", suffix=".csv.gz", dir=directory)
+        self.path = Path(name)
+        self.index = index
+        self.rows = 0
+        self._raw = os.fdopen(fd, "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+        # BOM for Excel compatibility
+        self._text = io.TextIOWrapper(self._gzip, encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(EXPORT_HEADER)
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> int:
+        self._writer.writerows(rows)
+        self.rows += len(rows)
+        self._text.flush()
+        return self._raw.tell()
+
+    def close(self) -> ExportPart:
+        self._text.close()  # закрывает gzip-поток и пишет трейлер
+        size = self._raw.tell()
+        self._raw.close()
+        return ExportPart(path=self.path, index=self.index, rows=self.rows, size=size)
+
+
+async def write_export_parts(
+    filters: ExportFilters,
+    directory: str,
+    max_part_bytes: int = DEFAULT_MAX_PART_BYTES,
+    extra_pages: Optional[AsyncIterator[List[Sequence[Any]]]] = None,
+) -> AsyncIterator[ExportPart]:
+    """
+    Stream rows into gzip CSV parts, yielding each part as soon as it is complete.
+
+    ``extra_pages`` (already formatted rows, e.g. from archives) are written after
+    the hot table. Memory use is bounded by one page of rows regardless of table size.
+    """
+
+    async def _pages() -> AsyncIterator[List[Sequence[Any]]]:
+        async for page in iter_export_pages(filters):
+            yield page
+        if extra_pages is not None:
+            async for page in extra_pages:
+                yield page
+
+    part: Optional[_GzipCsvPart] = None
+    index = 0
+    async for page in _pages():
+        if part is None:
+            index += 1
+            part = _GzipCsvPart(directory, index)
+        # Сжатие и запись на диск — в отдельном потоке, event loop не блокируется
+        size = await asyncio.to_thread(part.write_rows, page)
+        # Закрываем часть заранее, если следующая страница может не влезть в лимит
+        next_page_estimate = size / part.rows * len(page)
+        if size + next_page_estimate >= max_part_bytes:
+            yield await asyncio.to_thread(part.close)
+            part = None
+
+    if part is not None:
+        yield await asyncio.to_thread(part.close)
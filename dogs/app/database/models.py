@@ -8,7 +8,7 @@ class User(models.Model):
     telegram_id = fields.BigIntField(unique=True, index=True, description="Unique ID in Telegram")
     username = fields.CharField(max_length=255, null=True, description="Username (@username)")
     full_name = fields.CharField(max_length=255, null=True, description="Full name")
-    created_at = fields.DatetimeField(auto_now_add=True, description="Registration date")
+    created_at = fields.DatetimeField(auto_now_add=True, index=True, description="Registration date")
 
     class Meta:
         table = "users"
@@ -28,11 +28,130 @@ class SummaryRequest(models.Model):
     status = fields.CharField(max_length=50, default="processing", description="Result (success, error, processing)")
     tokens_used = fields.IntField(default=0, description="Number of tokens used (cost)")
     error_message = fields.TextField(null=True, description="Error text (if status is error)")
+    model = fields.CharField(max_length=100, null=True, description="LLM model used")
+    model_tier = fields.CharField(max_length=16, null=True, description="Routing tier (fast, standard, long)")
+    latency_ms = fields.IntField(null=True, description="End-to-end processing time in ms")
+    tenant = fields.CharField(max_length=32, default="default", description="Bot (tenant) that served the request")
     created_at = fields.DatetimeField(auto_now_add=True, description="Request time")
 
     class Meta:
         table = "summary_requests"
+        # AICODE-NOTE: Индексы под оконные запросы /stats (created_at >= ? GROUP BY status)
+        # и выборки по пользователю за период.
+        indexes = (
+            ("created_at", "status"),
+            ("user_id", "created_at"),
+        )
 
     def __str__(self):
         return f"SummaryRequest(id={self.id}, user_id={self.user_id}, status={self.status})"
 
+
+
+class RequestRollup(models.Model):
+    """
+    Hourly analytics rollup: hour x content_type x status x model.
+
+    AICODE-NOTE: Поддерживается инкрементально при сбросе AnalyticsBuffer,
+    история заполняется командой `python -m app.database.rollups backfill`.
+    """
+    id = fields.IntField(pk=True)
+    bucket = fields.DatetimeField(description="Start of the hour bucket")
+    content_type = fields.CharField(max_length=50, description="Content type")
+    status = fields.CharField(max_length=50, description="Request status")
+    model = fields.CharField(max_length=100, default="", description="LLM model ('' if unknown)")
+    requests = fields.IntField(default=0, description="Number of requests")
+    tokens_used = fields.BigIntField(default=0, description="Sum of tokens used")
+    latency_count = fields.IntField(default=0, description="Requests with known latency")
+    latency_sum_ms = fields.BigIntField(default=0, description="Sum of latencies in ms")
+    latency_le_1s = fields.IntField(default=0, description="Latency <= 1s")
+    latency_le_2s = fields.IntField(default=0, description="Latency <= 2s")
+    latency_le_5s = fields.IntField(default=0, description="Latency <= 5s")
+    latency_le_10s = fields.IntField(default=0, description="Latency <= 10s")
+    latency_le_30s = fields.IntField(default=0, description="Latency <= 30s")
+    latency_le_60s = fields.IntField(default=0, description="Latency <= 60s")
+    latency_gt_60s = fields.IntField(default=0, description="Latency > 60s")
+
+    class Meta:
+        table = "request_rollups_hourly"
+        unique_together = (("bucket", "content_type", "status", "model"),)
+
+    def __str__(self):
+        return f"RequestRollup(bucket={self.bucket}, content_type={self.content_type}, status={self.status})"
+
+
+class Feed(models.Model):
+    """
+    RSS/Atom feed, polled once for all of its subscribers.
+
+    AICODE-NOTE: Интервал опроса адаптивный (см. app.core.feeds.poller):
+    сокращается, когда в фиде появляются записи, и растёт на 304/без изменений.
+    """
+    id = fields.IntField(pk=True)
+    url = fields.CharField(max_length=1024, unique=True, description="Feed URL")
+    title = fields.CharField(max_length=255, default="", description="Feed title")
+    etag = fields.CharField(max_length=255, null=True, description="ETag of the last 200 response")
+    last_modified = fields.CharField(max_length=64, null=True, description="Last-Modified of the last 200 response")
+    poll_interval = fields.IntField(description="Current poll interval in seconds")
+    next_poll_at = fields.DatetimeField(index=True, description="When to poll next")
+    last_changed_at = fields.DatetimeField(null=True, description="When new entries last appeared")
+    failures = fields.IntField(default=0, description="Consecutive failed polls")
+    subscribers = fields.IntField(default=0, description="Number of subscriptions")
+    created_at = fields.DatetimeField(auto_now_add=True, description="When the feed was added")
+
+    class Meta:
+        table = "feeds"
+
+    def __str__(self):
+        return f"Feed(id={self.id}, url={self.url})"
+
+
+class FeedEntry(models.Model):
+    """
+    Feed entry, fetched and summarized once regardless of the number of subscribers.
+    """
+    id = fields.IntField(pk=True)
+    feed = fields.ForeignKeyField("models.Feed", related_name="entries", description="Reference to feed")
+    guid = fields.CharField(max_length=512, description="Entry guid/id (or link)")
+    url = fields.TextField(description="Entry link")
+    title = fields.CharField(max_length=512, default="", description="Entry title")
+    status = fields.CharField(
+        max_length=20,
+        default="pending",
+        description="pending, summarized, error, skipped (existed before subscription)",
+    )
+    summary = fields.TextField(null=True, description="LLM summary")
+    tokens_used = fields.IntField(default=0, description="Number of tokens used (cost)")
+    attempts = fields.IntField(default=0, description="Failed summary attempts")
+    retry_at = fields.DatetimeField(null=True, description="Earliest next summary attempt after a failure")
+    published_at = fields.DatetimeField(null=True, description="Publication time from the feed")
+    created_at = fields.DatetimeField(auto_now_add=True, description="When the entry was discovered")
+
+    class Meta:
+        table = "feed_entries"
+        unique_together = (("feed", "guid"),)
+        indexes = (("feed_id", "status"),)
+
+    def __str__(self):
+        return f"FeedEntry(id={self.id}, feed_id={self.feed_id}, status={self.status})"
+
+
+class Subscription(models.Model):
+    """
+    User subscription to a feed with a digest schedule.
+    """
+    id = fields.IntField(pk=True)
+    user = fields.ForeignKeyField("models.User", related_name="subscriptions", description="Reference to user")
+    feed = fields.ForeignKeyField("models.Feed", related_name="subscriptions", description="Reference to feed")
+    schedule = fields.CharField(max_length=16, default="daily", description="Digest schedule (hourly, daily)")
+    last_entry_id = fields.IntField(default=0, description="Last FeedEntry id delivered in a digest")
+    next_digest_at = fields.DatetimeField(index=True, description="When the next digest is due")
+    tenant = fields.CharField(max_length=32, default="default", description="Bot (tenant) that delivers the digest")
+    created_at = fields.DatetimeField(auto_now_add=True, description="Subscription time")
+
+    class Meta:
+        table = "feed_subscriptions"
+        unique_together = (("user", "feed", "tenant"),)
+
+    def __str__(self):
+        return f"Subscription(user_id={self.user_id}, feed_id={self.feed_id}, schedule={self.schedule})"
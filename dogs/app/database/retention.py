@@ -0,0 +1,337 @@
+"""
+Retention job: archive old summary_requests rows into date-partitioned CSV.gz
+files and delete them from the hot table in small batches.
+
+Run once manually:
+    python -m app.database.retention run
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import structlog
+from tortoise import Tortoise, timezone
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+from .db import is_postgres
+from .export import EXPORT_COLUMNS, EXPORT_HEADER, ExportFilters, format_export_row
+from .models import SummaryRequest
+from .rollups import hour_bucket
+
+log = structlog.get_logger("RetentionJob")
+
+# AICODE-NOTE: Архив — по файлу на день: <dir>/summary_requests/YYYY-MM-DD.csv.gz.
+# Дозапись идёт новым gzip-member'ом (валидный gzip), заголовок — только в новом файле.
+# Строки удаляются из БД только после fsync архива. Перед дозаписью в журнал
+# (.pending.json) пишутся id страницы и размеры файлов до неё: если процесс упал
+# до DELETE, следующий прогон обрезает архивы обратно и архивирует страницу заново,
+# так что строки не дублируются.
+_ARCHIVE_SUBDIR = "summary_requests"
+_JOURNAL_NAME = ".pending.json"
+_ARCHIVE_READ_PAGE = 2_000
+_CREATED_AT_INDEX = EXPORT_HEADER.index("created_at")
+_STATUS_INDEX = EXPORT_HEADER.index("status")
+
+
+def archive_root(base_dir: Optional[str] = None) -> Path:
+    return Path(base_dir or settings.RETENTION_ARCHIVE_DIR) / _ARCHIVE_SUBDIR
+
+
+def _partition_path(root: Path, day: date) -> Path:
+    return root / f"{day.isoformat()}.csv.gz"
+
+
+def _fsync_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _append_partitions(root: Path, rows_by_day: Dict[date, List[List[Any]]], ids: List[int]) -> None:
+    """
+    Journal the page, then append formatted rows to their daily partitions and
+    fsync them (worker thread).
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for day in rows_by_day:
+        path = _partition_path(root, day)
+        sizes[path.name] = path.stat().st_size if path.exists() else 0
+    _fsync_write(root / _JOURNAL_NAME, json.dumps({"ids": ids, "sizes": sizes}).encode())
+
+    for day, rows in rows_by_day.items():
+        path = _partition_path(root, day)
+        is_new = not sizes[path.name]
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                with io.TextIOWrapper(gz, encoding="utf-8", newline="") as text:
+                    writer = csv.writer(text)
+                    if is_new:
+                        writer.writerow(EXPORT_HEADER)
+                    writer.writerows(rows)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def _read_journal(root: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((root / _JOURNAL_NAME).read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def _rollback_partitions(root: Path, sizes: Dict[str, int]) -> None:
+    """
+    Cut partitions back to their size before an unfinished append (worker thread).
+    """
+    for name, size in sizes.items():
+        path = root / name
+        if not path.exists():
+            continue
+        if not size:
+            path.unlink()
+            continue
+        with open(path, "r+b") as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _clear_journal(root: Path) -> None:
+    (root / _JOURNAL_NAME).unlink(missing_ok=True)
+
+
+class RetentionJob:
+    """
+    Periodically moves rows older than ``retention_days`` from the hot table to archives.
+    """
+
+    def __init__(
+        self,
+        retention_days: int | None = None,
+        archive_dir: str | None = None,
+        batch_size: int | None = None,
+        interval_hours: float | None = None,
+        batch_pause: float = 0.05,
+    ) -> None:
+        self._retention_days = retention_days
+        self._archive_dir = archive_dir
+        self._batch_size = batch_size
+        self._interval_hours = interval_hours
+        self.batch_pause = batch_pause
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def retention_days(self) -> int:
+        return self._retention_days if self._retention_days is not None else settings.RETENTION_DAYS
+
+    @property
+    def root(self) -> Path:
+        return archive_root(self._archive_dir)
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size or settings.RETENTION_BATCH_SIZE
+
+    @property
+    def interval(self) -> float:
+        return (self._interval_hours or settings.RETENTION_INTERVAL_HOURS) * 3600
+
+    def start(self) -> None:
+        """
+        Schedule the job in the background (no-op if retention is disabled).
+        """
+        if self.retention_days <= 0:
+            log.info("Retention disabled")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self) -> None:
+        # Первый прогон — не сразу после старта, чтобы не мешать прогреву
+        await asyncio.sleep(60)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                log.exception("Retention job failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        """
+        Archive and delete all rows older than the cutoff. Returns archived row count.
+        """
+        started = time.perf_counter()
+        # Граница по целому часу: rollups.backfill не пересобирает частично архивированный час
+        cutoff = hour_bucket(timezone.now() - timedelta(days=self.retention_days))
+        archived = 0
+        await self._recover()
+        while True:
+            page = await (
+                SummaryRequest.filter(created_at__lt=cutoff)
+                .order_by("id")
+                .limit(self.batch_size)
+                .values_list(*EXPORT_COLUMNS)
+            )
+            if not page:
+                break
+
+            rows_by_day: Dict[date, List[List[Any]]] = defaultdict(list)
+            for row in page:
+                rows_by_day[row[_CREATED_AT_INDEX].date()].append(format_export_row(row))
+            ids = [row[0] for row in page]
+            await asyncio.to_thread(_append_partitions, self.root, rows_by_day, ids)
+
+            # Короткие транзакции: писатели не блокируются надолго
+            await SummaryRequest.filter(id__in=ids).delete()
+            await asyncio.to_thread(_clear_journal, self.root)
+            archived += len(page)
+            metrics.inc("retention_archived_rows_total", len(page))
+            await asyncio.sleep(self.batch_pause)
+
+        if archived:
+            await self._vacuum()
+        duration = time.perf_counter() - started
+        metrics.observe("retention_job_seconds", duration)
+        await self._report_table_size()
+        log.info("Retention job finished", archived=archived, duration=round(duration, 2), cutoff=cutoff.isoformat())
+        return archived
+
+    async def _recover(self) -> None:
+        """
+        Finish a page left half-done by a crash between the archive append and the DELETE.
+        """
+        journal = await asyncio.to_thread(_read_journal, self.root)
+        if journal is None:
+            return
+        # DELETE страницы атомарен: строки либо все ещё в таблице, либо все удалены
+        if await SummaryRequest.filter(id__in=journal["ids"]).exists():
+            await asyncio.to_thread(_rollback_partitions, self.root, journal["sizes"])
+            log.warning("Rolled back unfinished archive append", rows=len(journal["ids"]))
+        await asyncio.to_thread(_clear_journal, self.root)
+
+    async def _vacuum(self) -> None:
+        connection = Tortoise.get_connection("default")
+        if is_postgres():
+            await connection.execute_script('VACUUM (ANALYZE) "summary_requests"')
+        else:
+            # auto_vacuum=INCREMENTAL включает миграция 6, без неё incremental_vacuum — no-op
+            await connection.execute_script('PRAGMA incremental_vacuum(1000); ANALYZE "summary_requests"')
+
+    async def _report_table_size(self) -> None:
+        rows = await SummaryRequest.all().count()
+        metrics.set_gauge("summary_requests_hot_rows", rows)
+        connection = Tortoise.get_connection("default")
+        if is_postgres():
+            result = await connection.execute_query_dict(
+                "SELECT pg_total_relation_size('summary_requests') AS size"
+            )
+        else:
+            result = await connection.execute_query_dict(
+                "SELECT page_count * page_size AS size FROM pragma_page_count(), pragma_page_size()"
+            )
+        if result:
+            metrics.set_gauge("summary_requests_hot_bytes", result[0]["size"])
+
+
+async def iter_archive_pages(
+    filters: ExportFilters,
+    archive_dir: Optional[str] = None,
+    page_size: int = _ARCHIVE_READ_PAGE,
+) -> AsyncIterator[List[Sequence[Any]]]:
+    """
+    Yield archived rows (already formatted as export cells) matching the filters,
+    newest partition first. Only partitions inside the date range are opened.
+    """
+    root = archive_root(archive_dir)
+    if not root.exists():
+        return
+
+    for path in sorted(root.glob("*.csv.gz"), reverse=True):
+        try:
+            day = date.fromisoformat(path.name.split(".", 1)[0])
+        except ValueError:
+            continue
+        if filters.date_from and day < filters.date_from:
+            continue
+        if filters.date_to and day > filters.date_to:
+            continue
+
+        reader = await asyncio.to_thread(_PartitionReader, path)
+        try:
+            while page := await asyncio.to_thread(reader.read_page, page_size, filters.status):
+                yield page
+        finally:
+            reader.close()
+
+
+class _PartitionReader:
+    """
+    Sequential reader over one archive partition (all gzip members).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._file = gzip.open(path, "rt", encoding="utf-8", newline="")
+        self._reader = csv.reader(self._file)
+
+    def read_page(self, page_size: int, status: Optional[str]) -> List[List[str]]:
+        page: List[List[str]] = []
+        for row in self._reader:
+            if row == EXPORT_HEADER or (status and row[_STATUS_INDEX] != status):
+                continue
+            page.append(row)
+            if len(page) >= page_size:
+                break
+        return page
+
+    def close(self) -> None:
+        self._file.close()
+
+
+retention_job = RetentionJob()
+
+
+async def _main() -> None:
+    from app.core.logger import setup_logging
+    from app.database.db import close_db, init_db
+
+    parser = argparse.ArgumentParser(description="Archive old summary_requests rows")
+    parser.add_argument("command", choices=("run",))
+    args = parser.parse_args()
+
+    setup_logging()
+    await init_db()
+    try:
+        if args.command == "run":
+            await retention_job.run_once()
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,279 @@
+"""
+Incrementally maintained hourly rollups of SummaryRequest analytics.
+
+Backfill history (safe while the bot runs: each day is rebuilt under a lock that
+holds back concurrent analytics flushes):
+    python -m app.database.rollups backfill
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import structlog
+from tortoise import Tortoise, timezone
+from tortoise.functions import Sum
+from tortoise.transactions import in_transaction
+
+from .db import is_postgres
+from .models import RequestRollup, SummaryRequest
+
+log = structlog.get_logger("Rollups")
+
+# Верхние границы бакетов латентности (сек) -> колонка RequestRollup (кумулятивно, как в Prometheus)
+LATENCY_BUCKETS: Tuple[Tuple[float, str], ...] = (
+    (1, "latency_le_1s"),
+    (2, "latency_le_2s"),
+    (5, "latency_le_5s"),
+    (10, "latency_le_10s"),
+    (30, "latency_le_30s"),
+    (60, "latency_le_60s"),
+)
+_OVERFLOW_BUCKET = "latency_gt_60s"
+_COUNTER_FIELDS = (
+    "requests",
+    "tokens_used",
+    "latency_count",
+    "latency_sum_ms",
+    *(column for _, column in LATENCY_BUCKETS),
+    _OVERFLOW_BUCKET,
+)
+_BACKFILL_PAGE = 5_000
+_BACKFILL_CHUNK = timedelta(days=1)  # Часы, перестраиваемые в одной транзакции
+_KEY_FIELDS = ("bucket", "content_type", "status", "model")
+
+RollupKey = Tuple[datetime, str, str, str]
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+@dataclass(slots=True)
+class RollupRow:
+    """
+    Input for aggregation: the subset of SummaryRequest fields rollups care about.
+    """
+
+    created_at: datetime
+    content_type: str
+    status: str
+    model: Optional[str]
+    tokens_used: int
+    latency_ms: Optional[int]
+
+
+def aggregate(rows: Iterable[RollupRow]) -> Dict[RollupKey, Dict[str, int]]:
+    """
+    Fold rows into per-bucket counter deltas.
+    """
+    deltas: Dict[RollupKey, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(_COUNTER_FIELDS, 0))
+    for row in rows:
+        key = (hour_bucket(row.created_at), row.content_type, row.status, row.model or "")
+        delta = deltas[key]
+        delta["requests"] += 1
+        delta["tokens_used"] += row.tokens_used or 0
+        if row.latency_ms is None:
+            continue
+        delta["latency_count"] += 1
+        delta["latency_sum_ms"] += row.latency_ms
+        seconds = row.latency_ms / 1000
+        for upper, column in LATENCY_BUCKETS:
+            if seconds <= upper:
+                delta[column] += 1
+        if seconds > LATENCY_BUCKETS[-1][0]:
+            delta[_OVERFLOW_BUCKET] += 1
+    return deltas
+
+
+def _upsert_sql(postgres: bool) -> str:
+    table = RequestRollup._meta.db_table
+    columns = (*_KEY_FIELDS, *_COUNTER_FIELDS)
+    names = ", ".join(f'"{name}"' for name in columns)
+    placeholders = ", ".join(f"${n}" if postgres else "?" for n in range(1, len(columns) + 1))
+    key = ", ".join(f'"{name}"' for name in _KEY_FIELDS)
+    increments = ", ".join(f'"{name}" = "{table}"."{name}" + EXCLUDED."{name}"' for name in _COUNTER_FIELDS)
+    return (
+        f'INSERT INTO "{table}" ({names}) VALUES ({placeholders}) '
+        f"ON CONFLICT ({key}) DO UPDATE SET {increments}"
+    )
+
+
+async def apply_deltas(deltas: Dict[RollupKey, Dict[str, int]], connection: Any = None) -> None:
+    """
+    Add counter deltas to the rollup table with one upsert per bucket
+    (INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x).
+
+    AICODE-NOTE: Не UPDATE + INSERT с перехватом IntegrityError: в Postgres ошибка
+    обрывает транзакцию вызывающего, и повторный UPDATE в ней уже не выполнится.
+    """
+    if not deltas:
+        return
+    connection = connection or Tortoise.get_connection("default")
+    bucket_field = RequestRollup._meta.fields_map["bucket"]
+    await connection.execute_many(
+        _upsert_sql(is_postgres()),
+        [
+            [bucket_field.to_db_value(bucket, RequestRollup), content_type, status, model]
+            + [delta[name] for name in _COUNTER_FIELDS]
+            for (bucket, content_type, status, model), delta in deltas.items()
+        ],
+    )
+
+
+async def _lock_rollups(connection: Any) -> None:
+    # Пока перестраиваем, flush аналитики не должен ни записать строки, ни прибавить дельты
+    if is_postgres():
+        await connection.execute_script(f'LOCK TABLE "{RequestRollup._meta.db_table}" IN SHARE ROW EXCLUSIVE MODE')
+    # В SQLite блокировку записи берёт DELETE ниже: писатель в базе один
+
+
+async def _rebuild(since: datetime, until: datetime) -> Tuple[int, int]:
+    """
+    Rebuild buckets in [since, until) from raw rows; returns (rows, buckets).
+    """
+    async with in_transaction() as connection:
+        await _lock_rollups(connection)
+        await RequestRollup.filter(bucket__gte=since, bucket__lt=until).using_db(connection).delete()
+        deltas: Dict[RollupKey, Dict[str, int]] = {}
+        processed = 0
+        last_id = 0
+        while True:
+            # Keyset-пагинация по id — без OFFSET и без загрузки всей таблицы
+            page = await (
+                SummaryRequest.filter(id__gt=last_id, created_at__gte=since, created_at__lt=until)
+                .using_db(connection)
+                .order_by("id")
+                .limit(_BACKFILL_PAGE)
+                .values_list("id", "created_at", "content_type", "status", "model", "tokens_used", "latency_ms")
+            )
+            if not page:
+                break
+            last_id = page[-1][0]
+            processed += len(page)
+            for key, delta in aggregate(RollupRow(*row[1:]) for row in page).items():
+                target = deltas.setdefault(key, dict.fromkeys(_COUNTER_FIELDS, 0))
+                for name, value in delta.items():
+                    target[name] += value
+        await apply_deltas(deltas, connection)
+    return processed, len(deltas)
+
+
+async def backfill(until: Optional[datetime] = None) -> int:
+    """
+    Rebuild rollups for closed hours before ``until`` from raw summary_requests.
+
+    Only hours still covered by the hot table are rebuilt: buckets older than the
+    oldest remaining row (archived by the retention job) are kept as is. Returns the number of processed rows.
+
+    AICODE-NOTE: Чтение сырых строк, удаление и перестройка бакетов — в одной
+    транзакции под блокировкой роллапов, по суткам, чтобы не держать flush аналитики
+    долго. Строка, завершившаяся позже (бакет — по created_at, т.е. старту запроса),
+    попадает в БД после перестройки и прибавляется к бакету обычным flush.
+    """
+    until = hour_bucket(until or timezone.now())
+    oldest = await SummaryRequest.filter(created_at__lt=until).order_by("created_at").first().values_list(
+        "created_at", flat=True
+    )
+    if oldest is None:
+        log.info("Rollups backfill: no raw rows", until=until.isoformat())
+        return 0
+    processed = buckets = 0
+    since = hour_bucket(oldest)
+    while since < until:
+        chunk_end = min(since + _BACKFILL_CHUNK, until)
+        rows, chunk_buckets = await _rebuild(since, chunk_end)
+        processed += rows
+        buckets += chunk_buckets
+        since = chunk_end
+
+    log.info("Rollups backfilled", rows=processed, buckets=buckets, until=until.isoformat())
+    return processed
+
+
+async def window_totals(since: datetime) -> Dict[str, int]:
+    """
+    Totals per status since the hour bucket containing ``since``.
+    """
+    rows = await RequestRollup.filter(bucket__gte=hour_bucket(since)).values_list(
+        "status", "requests", "tokens_used"
+    )
+    totals = {"requests": 0, "success": 0, "error": 0, "tokens_used": 0}
+    for status, requests, tokens in rows:
+        totals["requests"] += requests
+        totals["tokens_used"] += tokens
+        if status in ("success", "error"):
+            totals[status] += requests
+    return totals
+
+
+async def all_time_requests() -> int:
+    """
+    Total number of requests ever recorded, including rows already archived.
+    """
+    # Бакеты не удаляются при архивации, так что сумма по ним покрывает всю историю
+    rows = await RequestRollup.annotate(total=Sum("requests")).values_list("total", flat=True)
+    return int(rows[0] or 0) if rows else 0
+
+
+@dataclass(slots=True)
+class DailyTrend:
+    day: date
+    requests: int = 0
+    success: int = 0
+    error: int = 0
+    tokens_used: int = 0
+    latency_count: int = 0
+    latency_sum_ms: int = 0
+
+    @property
+    def avg_latency_s(self) -> float:
+        return self.latency_sum_ms / self.latency_count / 1000 if self.latency_count else 0.0
+
+
+async def daily_trends(days: int) -> list[DailyTrend]:
+    """
+    Per-day aggregates for the last ``days`` days (oldest first).
+    """
+    since = hour_bucket(timezone.now()) - timedelta(days=days)
+    rows = await RequestRollup.filter(bucket__gte=since).values_list(
+        "bucket", "status", "requests", "tokens_used", "latency_count", "latency_sum_ms"
+    )
+    trends: Dict[date, DailyTrend] = {}
+    for bucket, status, requests, tokens, latency_count, latency_sum in rows:
+        trend = trends.setdefault(bucket.date(), DailyTrend(day=bucket.date()))
+        trend.requests += requests
+        trend.tokens_used += tokens
+        trend.latency_count += latency_count
+        trend.latency_sum_ms += latency_sum
+        if status == "success":
+            trend.success += requests
+        elif status == "error":
+            trend.error += requests
+    return [trends[day] for day in sorted(trends)]
+
+
+async def _main() -> None:
+    from app.core.logger import setup_logging
+    from app.database.db import close_db, init_db
+
+    parser = argparse.ArgumentParser(description="Maintain analytics rollups")
+    parser.add_argument("command", choices=("backfill",))
+    args = parser.parse_args()
+
+    setup_logging()
+    await init_db()
+    try:
+        if args.command == "backfill":
+            await backfill()
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,156 @@
+"""
+Benchmark: import time and cold start of the bot up to the point where it can
+answer /start (handlers and middlewares registered, no network).
+
+Each run is a fresh interpreter. One extra run under ``python -X importtime``
+gives the per-module breakdown; a reference run also imports the lazily loaded
+dependencies eagerly, which is what startup used to cost. The benchmark fails
+(exit code 1) when:
+  * a module from LAZY_MODULES is imported on the startup path, or
+  * the median cold start exceeds ``--budget-ms`` (env COLD_START_BUDGET_MS).
+
+Usage:
+    python -m benchmarks.bench_cold_start [--runs 5] [--budget-ms 8000] [--top 15] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+# Должно совпадать с app.core.warmup.HEAVY_MODULES + их тяжёлые зависимости;
+# PIL и pytesseract нужны только в процессах OCR (app.core.ocr.worker)
+LAZY_MODULES = ("openai", "httpx", "newspaper", "nltk", "yt_dlp", "urllib3", "tiktoken", "PIL", "pytesseract")
+
+# Бюджет зависит от машины: основная часть старта — импорт aiogram.types
+DEFAULT_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "8000"))
+
+_BOOT_SNIPPET = (
+    "import time; _t = time.perf_counter()\n"
+    "import main\n"
+    "from app.bot.main import setup_handlers, setup_middlewares\n"
+    "setup_handlers(); setup_middlewares()\n"
+    "print((time.perf_counter() - _t) * 1000)\n"
+)
+# Прежнее поведение: тяжёлые зависимости грузятся до готовности хендлеров
+_REFERENCE_SNIPPET = _BOOT_SNIPPET.replace(
+    "setup_handlers(); ", "setup_handlers(); import " + ", ".join(("openai", "httpx", "newspaper", "yt_dlp")) + "; "
+)
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Return (module, self_us, cumulative_us, depth) for every importtime line.
+    """
+    modules = []
+    for line in (stderr or "").splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
+
+
+def run_once(importtime: bool = False, snippet: str = _BOOT_SNIPPET) -> Dict[str, object]:
+    env = dict(os.environ)
+    env.setdefault("TG_TOKEN", "0:benchmark")
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env["PYTHONPATH"] = str(_ROOT)
+
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *(("-X", "importtime") if importtime else ()), "-c", snippet],
+        cwd=_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+    modules = _parse_importtime(proc.stderr)
+    return {
+        # Время от первого импорта приложения до готовности хендлеров
+        "boot_ms": float(proc.stdout.strip().splitlines()[-1]),
+        # Включая запуск интерпретатора
+        "process_ms": process_ms,
+        "import_ms": sum(cumulative for _, _, cumulative, depth in modules if depth == 0) / 1000,
+        "modules": modules,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Max median boot time")
+    parser.add_argument("--top", type=int, default=15, help="Show N slowest top-level imports")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output")
+    args = parser.parse_args()
+
+    # Первый прогон компилирует .pyc и даёт разбивку по модулям; -X importtime сам
+    # замедляет импорт, поэтому время старта меряем отдельными прогонами без него
+    profile = run_once(importtime=True)
+    runs = [run_once() for _ in range(args.runs)]
+    reference_ms = statistics.median(run_once(snippet=_REFERENCE_SNIPPET)["boot_ms"] for _ in range(args.runs))
+
+    boot_ms = statistics.median(r["boot_ms"] for r in runs)
+    process_ms = statistics.median(r["process_ms"] for r in runs)
+    import_ms = profile["import_ms"]
+    last_modules = profile["modules"]
+    leaked = sorted({name.split(".")[0] for name, *_ in last_modules} & set(LAZY_MODULES))
+    slowest = sorted(
+        ((name, cumulative / 1000) for name, _, cumulative, depth in last_modules if depth <= 1),
+        key=lambda item: item[1],
+        reverse=True,
+    )[: args.top]
+
+    failures = []
+    if leaked:
+        failures.append(f"lazy modules imported at startup: {', '.join(leaked)}")
+    if boot_ms > args.budget_ms:
+        failures.append(f"median boot {boot_ms:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "runs": args.runs,
+                    "boot_ms": round(boot_ms, 1),
+                    "eager_reference_ms": round(reference_ms, 1),
+                    "process_ms": round(process_ms, 1),
+                    "import_ms": round(import_ms, 1),
+                    "budget_ms": args.budget_ms,
+                    "leaked_modules": leaked,
+                    "slowest_imports": [{"module": name, "ms": round(ms, 1)} for name, ms in slowest],
+                    "failures": failures,
+                },
+                indent=2,
+            )
+        )
+    else:
+        print(f"runs={args.runs} budget={args.budget_ms:.0f} ms")
+        print(f"boot (import -> handlers ready): {boot_ms:>8.1f} ms")
+        print(f"eager imports (reference):       {reference_ms:>8.1f} ms")
+        print(f"process (incl. interpreter):     {process_ms:>8.1f} ms")
+        print(f"imports (-X importtime, 1 run):  {import_ms:>8.1f} ms")
+        print(f"\n{'module':<45} {'cumulative ms':>14}")
+        for name, ms in slowest:
+            print(f"{name:<45} {ms:>14.1f}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
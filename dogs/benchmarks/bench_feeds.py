@@ -0,0 +1,199 @@
+"""
+Feed subscriptions end to end against the local feed server (benchmarks/loadtest/servers.py):
+many users subscribe to the same feeds, the poller runs several rounds while entries are
+published, then digests are sent through a fake Bot API session.
+
+Checks (exit code 1 on failure):
+  * every new entry is summarized exactly once, however many users follow the feed;
+  * polls of unchanged feeds are answered 304 (ETag / If-Modified-Since);
+  * every subscriber gets a digest with the new entries;
+  * a late subscriber (and a user who unsubscribed and subscribed again) gets no old entries.
+
+Usage:
+    python -m benchmarks.bench_feeds [--feeds 5] [--users 200] [--rounds 4] [--publish 2]
+        [--llm-latency fixed:50] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+from benchmarks.loadtest.servers import ServerConfig, start_servers
+
+
+def _configure_env(llm_base_url: str, workdir: str) -> None:
+    # До импорта app.*: db.py читает DATABASE_URL при импорте
+    os.environ.update(
+        {
+            "TG_TOKEN": "42:bench",
+            "OPENAI_API_KEY": "bench",
+            "LLM_PROVIDER": "openai",
+            "OPENAI_BASE_URL": llm_base_url,
+            "DATABASE_URL": f"sqlite://{os.path.join(workdir, 'feeds.sqlite3')}",
+            "RETENTION_DAYS": "0",
+            "LOG_LEVEL": "WARNING",
+            "NO_PROXY": "127.0.0.1,localhost",
+            "TG_GLOBAL_RATE": "1000000",
+            "TG_PRIVATE_CHAT_RATE": "1000000",
+        }
+    )
+
+
+async def _http(method: str, url: str) -> Dict[str, Any]:
+    import aiohttp
+
+    async with aiohttp.ClientSession() as client:
+        async with client.request(method, url) as response:
+            return await response.json()
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    from app.core.logger import setup_logging
+    from app.database.db import close_db, init_db
+
+    setup_logging()
+    await init_db()
+    try:
+        return await _run(args, base_url)
+    finally:
+        await close_db()
+
+
+async def _run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    from aiogram import Bot
+    from tortoise import Tortoise, timezone
+
+    from app.bot.sender import OutboundRateLimiter
+    from app.core.feeds import digest_sender, feed_poller, subscribe, unsubscribe
+    from app.core.tenants import DEFAULT_TENANT
+    from app.database.models import Feed, FeedEntry, Subscription, User
+    from benchmarks.loadtest.fake_telegram import FakeTelegramSession
+
+    await Tortoise.generate_schemas(safe=True)
+
+    await User.bulk_create([User(telegram_id=10_000 + i, full_name=f"user{i}") for i in range(args.users)])
+    users = await User.all().order_by("id")
+    feed_urls = [f"{base_url}/feeds/{n}.xml" for n in range(args.feeds)]
+
+    started = time.perf_counter()
+    for user in users:
+        for url in feed_urls:
+            await subscribe(user, url, "hourly")
+    subscribe_s = time.perf_counter() - started
+    baseline_stats = await _http("GET", f"{base_url}/stats")
+
+    rng = random.Random(args.seed)
+    published = 0
+    idle_polls = 0
+    poll_times = []
+    for round_index in range(args.rounds + 1):
+        # Последний раунд без публикаций — все фиды должны ответить 304
+        changed = rng.sample(range(args.feeds), k=max(1, args.feeds // 2)) if round_index < args.rounds else []
+        for n in changed:
+            await _http("POST", f"{base_url}/feeds/{n}/publish?count={args.publish}")
+            published += args.publish
+        idle_polls += args.feeds - len(changed)
+        await Feed.all().update(next_poll_at=timezone.now())
+        started = time.perf_counter()
+        await feed_poller.run_once()
+        poll_times.append(time.perf_counter() - started)
+
+    stats = await _http("GET", f"{base_url}/stats")
+    summarized = await FeedEntry.filter(status="summarized").count()
+    errors = await FeedEntry.filter(status="error").count()
+
+    session = FakeTelegramSession()
+    session.middleware(OutboundRateLimiter())
+    bot = Bot(token="42:bench", session=session)
+    await Subscription.all().update(next_digest_at=timezone.now())
+    started = time.perf_counter()
+    digest_messages = await digest_sender.send_due({DEFAULT_TENANT: bot})
+    digest_s = time.perf_counter() - started
+    intervals = await Feed.all().order_by("id").values_list("poll_interval", flat=True)
+
+    # Поздние подписки: у фидов уже есть история, но первый дайджест должен быть пустым
+    late_user = await User.create(telegram_id=9_999, full_name="late")
+    for url in feed_urls:
+        await subscribe(late_user, url, "hourly")
+    await unsubscribe(users[0], feed_urls[0])
+    await subscribe(users[0], feed_urls[0], "hourly")
+    await Subscription.filter(user_id__in=[late_user.id, users[0].id]).update(next_digest_at=timezone.now())
+    late_digest_messages = await digest_sender.send_due({DEFAULT_TENANT: bot})
+
+    llm_requests = stats["requests"] - baseline_stats["requests"]
+    return {
+        "users": args.users,
+        "feeds": args.feeds,
+        "subscriptions": args.users * args.feeds,
+        "subscribe_s": round(subscribe_s, 3),
+        "entries_published": published,
+        "entries_summarized": summarized,
+        "entries_failed": errors,
+        "llm_requests": llm_requests,
+        "feed_fetch_200": stats["feed_200"] - baseline_stats["feed_200"],
+        "feed_fetch_304": stats["feed_304"] - baseline_stats["feed_304"],
+        "expected_304_at_least": idle_polls,
+        "poll_round_ms": [round(value * 1000, 1) for value in poll_times],
+        "digest_messages": digest_messages,
+        "digest_s": round(digest_s, 3),
+        "late_digest_messages": late_digest_messages,
+        "poll_intervals_s": list(intervals),
+    }
+
+
+def _check(result: Dict[str, Any]) -> list[str]:
+    problems = []
+    if result["entries_summarized"] + result["entries_failed"] != result["entries_published"]:
+        problems.append("not every published entry was processed exactly once")
+    if result["llm_requests"] != result["entries_summarized"] + result["entries_failed"]:
+        problems.append("LLM calls do not match unique entries (de-duplication broken)")
+    if result["feed_fetch_304"] < result["expected_304_at_least"]:
+        problems.append("unchanged feeds were re-downloaded instead of 304")
+    if result["entries_summarized"] and result["digest_messages"] < result["users"]:
+        problems.append("some subscribers did not get a digest")
+    if result["late_digest_messages"]:
+        problems.append("a late or repeated subscription got old entries in its first digest")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeds", type=int, default=5)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=4, help="Poll rounds with new entries")
+    parser.add_argument("--publish", type=int, default=2, help="Entries per changed feed per round")
+    parser.add_argument("--llm-latency", default="fixed:50")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    process, port = start_servers(ServerConfig(llm_latency=args.llm_latency, seed=args.seed))
+    base_url = f"http://127.0.0.1:{port}"
+    _configure_env(f"{base_url}/v1", tempfile.mkdtemp(prefix="bench_feeds_"))
+    try:
+        result = asyncio.run(run(args, base_url))
+    finally:
+        process.terminate()
+        process.join(5)
+
+    problems = _check(result)
+    if args.json:
+        print(json.dumps({**result, "problems": problems}, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key}: {value}")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
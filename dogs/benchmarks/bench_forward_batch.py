@@ -0,0 +1,184 @@
+"""
+Forwarded-message bursts through the real dispatcher: each user forwards a burst of channel
+posts at once, as when asking "what's going on" in several channels.
+
+Reports LLM calls, SummaryRequest rows, rate limiter checks and Bot API calls per burst.
+Run once with the default settings and once with ``--no-batch`` to compare. With batching,
+a burst must produce exactly one LLM call and one SummaryRequest. A flooding user who forwards
+``--flood`` posts in one unbroken stream must not get more summaries than the rate limit allows
+(exit code 1 otherwise).
+
+Usage:
+    python -m benchmarks.bench_forward_batch [--users 20] [--burst 15] [--window 0.5]
+        [--flood 300] [--no-batch] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+from benchmarks.loadtest.servers import ServerConfig, start_servers
+
+
+def _configure_env(args: argparse.Namespace, llm_base_url: str, workdir: str) -> None:
+    # До импорта app.*: настройки читаются при импорте
+    os.environ.update(
+        {
+            "TG_TOKEN": "42:bench",
+            "OPENAI_API_KEY": "bench",
+            "LLM_PROVIDER": "openai",
+            "OPENAI_BASE_URL": llm_base_url,
+            "DATABASE_URL": f"sqlite://{os.path.join(workdir, 'forwards.sqlite3')}",
+            "RETENTION_DAYS": "0",
+            "FEEDS_ENABLED": "false",
+            "LOG_LEVEL": "WARNING",
+            "NO_PROXY": "127.0.0.1,localhost",
+            "TG_GLOBAL_RATE": "1000000",
+            "TG_PRIVATE_CHAT_RATE": "1000000",
+            "FORWARD_BATCH_ENABLED": "false" if args.no_batch else "true",
+            "FORWARD_BATCH_WINDOW": str(args.window),
+        }
+    )
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    from app.core.logger import setup_logging
+    from app.database.db import close_db, init_db
+
+    setup_logging()
+    await init_db()
+    try:
+        return await _run(args, base_url)
+    finally:
+        await close_db()
+
+
+async def _run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    import aiohttp
+    from tortoise import Tortoise
+
+    from app.bot.handlers.message import forward_batcher
+    from app.bot.main import bot, dp, setup_handlers, setup_middlewares
+    from app.bot.sender import OutboundRateLimiter
+    from app.core.config import settings
+    from app.core.metrics import metrics
+    from app.database.analytics import analytics
+    from app.database.models import SummaryRequest
+    from benchmarks.loadtest.fake_telegram import FakeTelegramSession, make_update
+
+    session = FakeTelegramSession()
+    session.middleware(OutboundRateLimiter())
+    bot.session = session
+    await Tortoise.generate_schemas(safe=True)
+    analytics.start()
+    setup_handlers()
+    setup_middlewares()
+    await bot.me()
+
+    update_ids = iter(range(1, 10**9))
+
+    async def burst(user_id: int) -> None:
+        updates = []
+        for post in range(args.burst):
+            channel = f"Channel {post % 3}"
+            text = f"Пост {post} из канала {channel}: " + "новости рынка и обновления продукта " * 20
+            # Клиент Telegram шлёт пересланные подряд, апдейты обрабатываются конкурентно
+            update = make_update(next(update_ids), user_id, text, [], forward_from=channel)
+            updates.append(asyncio.create_task(dp.feed_update(bot, update)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*updates)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(burst(10_000 + user) for user in range(args.users)))
+    # Пачки уходят по таймеру тишины; close() дожидается уже запущенных
+    await asyncio.sleep(args.window * 1.5)
+    await forward_batcher.close()
+    elapsed = time.perf_counter() - started
+
+    async def llm_requests() -> int:
+        async with aiohttp.ClientSession() as client:
+            async with client.get(f"{base_url}/stats") as response:
+                return (await response.json())["requests"]
+
+    burst_llm_requests = await llm_requests()
+    burst_checks = metrics.counter("rate_limit_checks_total", result="allowed") + metrics.counter(
+        "rate_limit_checks_total", result="limited"
+    )
+    burst_limited = metrics.counter("rate_limit_checks_total", result="limited")
+    burst_api_calls, burst_send_message = session.total_calls, session.calls["SendMessage"]
+
+    # Непрерывный поток пересланных: каждые FORWARD_BATCH_MAX_SIZE сообщений снова списывают лимит
+    flood = []
+    for post in range(args.flood):
+        update = make_update(next(update_ids), 99_999, f"Флуд {post}: " + "текст " * 50, [], forward_from="Spam")
+        flood.append(asyncio.create_task(dp.feed_update(bot, update)))
+        await asyncio.sleep(min(0.01, args.window / 5))
+    await asyncio.gather(*flood)
+    await asyncio.sleep(args.window * 1.5)
+    await forward_batcher.close()
+    flood_llm_requests = await llm_requests() - burst_llm_requests
+    await analytics.close()
+
+    bursts = args.users
+    rows = await SummaryRequest.exclude(user__telegram_id=99_999).count()
+    return {
+        "batching": not args.no_batch,
+        "bursts": bursts,
+        "messages_per_burst": args.burst,
+        "duration_s": round(elapsed, 3),
+        "llm_requests_per_burst": round(burst_llm_requests / bursts, 2),
+        "summary_requests_per_burst": round(rows / bursts, 2),
+        "rate_limit_checks_per_burst": round(burst_checks / bursts, 2),
+        "rate_limited_per_burst": round(burst_limited / bursts, 2),
+        "bot_api_calls_per_burst": round(burst_api_calls / bursts, 2),
+        "send_message_per_burst": round(burst_send_message / bursts, 2),
+        "flood_messages": args.flood,
+        "flood_llm_requests": flood_llm_requests,
+        "flood_llm_requests_allowed": settings.RATE_LIMIT_REQUESTS,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--burst", type=int, default=15, help="Forwarded messages per user")
+    parser.add_argument("--window", type=float, default=0.5, help="FORWARD_BATCH_WINDOW, seconds")
+    parser.add_argument("--flood", type=int, default=300, help="Forwards in one unbroken stream from one user")
+    parser.add_argument("--llm-latency", default="fixed:50")
+    parser.add_argument("--no-batch", action="store_true", help="Run with FORWARD_BATCH_ENABLED=false")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    process, port = start_servers(ServerConfig(llm_latency=args.llm_latency))
+    base_url = f"http://127.0.0.1:{port}"
+    _configure_env(args, f"{base_url}/v1", tempfile.mkdtemp(prefix="bench_forwards_"))
+    try:
+        result = asyncio.run(run(args, base_url))
+    finally:
+        process.terminate()
+        process.join(5)
+
+    problems = []
+    if not args.no_batch and (result["llm_requests_per_burst"] != 1 or result["summary_requests_per_burst"] != 1):
+        problems.append("a burst was not summarized as exactly one request")
+    if result["flood_llm_requests"] > result["flood_llm_requests_allowed"]:
+        problems.append("a stream of forwards got past the rate limit")
+    if args.json:
+        print(json.dumps({**result, "problems": problems}, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key}: {value}")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
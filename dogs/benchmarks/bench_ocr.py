@@ -0,0 +1,226 @@
+"""
+OCR throughput: synthetic screenshots (light and dark theme) recognized through OCRService.
+
+For each pool size reports images per second, latency per image, CPU seconds per image
+(worker + tesseract), the worst event-loop stall while the pool is busy and word recall
+against the rendered text. ``--inline`` adds a reference run that recognizes in the event
+loop thread, the way a naive handler would. Exit code 1 if the loop stalls longer than
+``--max-lag-ms`` with the pool or recall drops below ``--min-recall``; exit code 2 if
+tesseract is not installed.
+
+Usage:
+    python -m benchmarks.bench_ocr [--images 24] [--workers 1,2,4] [--inline] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+_SENTENCES = (
+    "The city council said that the new transport plan would be ready by the end of the year.",
+    "Researchers found that the model was able to predict demand with a much higher accuracy.",
+    "It is not clear how the market will react when the policy comes into force next month.",
+    "Most of the users who took part in the survey said they would like to see more of it.",
+    "The company has been working on this project for more than three years in a row.",
+    "According to the report, the growth of the network was driven by the rise in mobile use.",
+)
+
+
+def _configure_env(args: argparse.Namespace) -> None:
+    # До импорта app.*: настройки читаются при импорте
+    os.environ.update(
+        {
+            "TG_TOKEN": "42:bench",
+            "OPENAI_API_KEY": "bench",
+            "LOG_LEVEL": "WARNING",
+            "OCR_LANGUAGES": args.languages,
+            "OCR_MAX_PENDING": str(args.images),
+            "OCR_MIN_CHARS": "1",
+        }
+    )
+
+
+def render_screenshot(index: int, width: int = 1600, lines: int = 14) -> Tuple[bytes, str]:
+    """
+    JPEG of a text screenshot and the text drawn on it; every third image uses a dark theme.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(index)
+    text_lines = [rng.choice(_SENTENCES) for _ in range(lines)]
+    dark = index % 3 == 2
+    font = ImageFont.load_default(size=30)
+    image = Image.new("RGB", (width, 60 + lines * 48), (30, 30, 34) if dark else (250, 250, 250))
+    draw = ImageDraw.Draw(image)
+    for number, line in enumerate(text_lines):
+        draw.text((40, 30 + number * 48), line, font=font, fill=(225, 225, 225) if dark else (20, 20, 20))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue(), "\n".join(text_lines)
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z]{3,}", text.lower())
+
+
+def recall(expected: str, recognized: str) -> float:
+    found = set(_words(recognized))
+    words = _words(expected)
+    return sum(1 for word in words if word in found) / max(1, len(words))
+
+
+class _LagProbe:
+    """
+    Worst delay of a 5 ms ticker: how long the event loop could not run other handlers.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, time.perf_counter() - started - self.interval)
+
+    def __enter__(self) -> "_LagProbe":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        assert self._task is not None
+        self._task.cancel()
+
+
+def _summary(
+    label: str, images: List[Tuple[bytes, str]], texts: List[str], latencies: List[float], elapsed: float, lag: float
+) -> Dict[str, Any]:
+    from app.core.metrics import metrics
+
+    cpu = metrics.histogram("ocr_cpu_seconds")
+    ordered = sorted(latencies)
+    return {
+        "mode": label,
+        "images_per_s": round(len(images) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(statistics.median(ordered) * 1000, 1),
+            "p95": round(ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))] * 1000, 1),
+        },
+        "cpu_s_per_image": round(cpu.mean(), 3) if cpu else None,
+        "max_loop_lag_ms": round(lag * 1000, 1),
+        "recall": round(statistics.fmean(recall(expected, text) for (_, expected), text in zip(images, texts)), 3),
+    }
+
+
+async def run_pool(images: List[Tuple[bytes, str]], workers: int) -> Dict[str, Any]:
+    from app.core.metrics import metrics
+    from app.core.ocr import OCRService
+
+    metrics.reset()
+    service = OCRService(workers=workers)
+    try:
+        # Подъём процессов пула не входит в замер пропускной способности
+        await service.recognize(images[0][0])
+        metrics.reset()
+
+        async def timed(data: bytes) -> Tuple[str, float]:
+            started = time.perf_counter()
+            text = await service.recognize(data)
+            return text, time.perf_counter() - started
+
+        with _LagProbe() as probe:
+            started = time.perf_counter()
+            results = await asyncio.gather(*(timed(data) for data, _ in images))
+            elapsed = time.perf_counter() - started
+    finally:
+        service.close()
+    return _summary(
+        f"pool:{workers}", images, [text for text, _ in results], [latency for _, latency in results], elapsed,
+        probe.max_lag,
+    )
+
+
+async def run_inline(images: List[Tuple[bytes, str]], languages: str) -> Dict[str, Any]:
+    from app.core.config import settings
+    from app.core.metrics import metrics
+    from app.core.ocr.worker import recognize
+
+    metrics.reset()
+    texts, latencies = [], []
+    with _LagProbe() as probe:
+        started = time.perf_counter()
+        for data, _ in images:
+            t0 = time.perf_counter()
+            # Как сделал бы наивный хендлер: распознавание прямо в event loop
+            result = recognize(data, languages, settings.OCR_MAX_SIDE, settings.OCR_TIMEOUT)
+            metrics.observe("ocr_cpu_seconds", result.cpu_seconds)
+            texts.append(result.text)
+            latencies.append(time.perf_counter() - t0)
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - started
+    return _summary("inline", images, texts, latencies, elapsed, probe.max_lag)
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from app.core.logger import setup_logging
+
+    setup_logging()
+    images = [render_screenshot(index) for index in range(args.images)]
+    results = [await run_pool(images, workers) for workers in args.workers]
+    if args.inline:
+        results.append(await run_inline(images, args.languages))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument(
+        "--workers", type=lambda value: [int(n) for n in value.split(",")], default=[1, 2, 4], help="Pool sizes"
+    )
+    parser.add_argument("--languages", default="eng", help="OCR_LANGUAGES (the screenshots are in English)")
+    parser.add_argument("--inline", action="store_true", help="Also recognize in the event loop thread")
+    parser.add_argument("--max-lag-ms", type=float, default=50.0)
+    parser.add_argument("--min-recall", type=float, default=0.8)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if shutil.which("tesseract") is None:
+        print("tesseract is not installed (apt install tesseract-ocr / brew install tesseract)", file=sys.stderr)
+        sys.exit(2)
+    _configure_env(args)
+    results = asyncio.run(run(args))
+
+    failures = [
+        f"{result['mode']}: loop lag {result['max_loop_lag_ms']} ms"
+        for result in results
+        if result["mode"] != "inline" and result["max_loop_lag_ms"] > args.max_lag_ms
+    ] + [
+        f"{result['mode']}: recall {result['recall']}" for result in results if result["recall"] < args.min_recall
+    ]
+    if args.json:
+        print(json.dumps({"cpus": os.cpu_count(), "results": results, "failures": failures}, indent=2))
+    else:
+        print(f"cpus: {os.cpu_count()}, images: {args.images}")
+        for result in results:
+            print(json.dumps(result))
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Traffic spike through the real dispatcher with a slow LLM: article links from distinct users
+arrive faster than the provider answers.
+
+Reports the overload level timeline, how many messages got an immediate "busy" reply and how
+fast, latency of the messages that were processed, output tokens per summary and the time to
+step back down to normal. Run once with the default settings and once with ``--no-overload``
+to compare. With the controller enabled the spike must reach the reject level, get "busy"
+replies, and return to normal without flapping (exit code 1 otherwise).
+
+Usage:
+    python -m benchmarks.bench_overload [--spike 120] [--ramp 2.0] [--capacity 10]
+        [--llm-latency fixed:1500] [--no-overload] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.loadtest.servers import ServerConfig, start_servers
+
+
+def _configure_env(args: argparse.Namespace, llm_base_url: str, workdir: str) -> None:
+    # До импорта app.*: настройки читаются при импорте
+    os.environ.update(
+        {
+            "TG_TOKEN": "42:bench",
+            "OPENAI_API_KEY": "bench",
+            "LLM_PROVIDER": "openai",
+            "OPENAI_BASE_URL": llm_base_url,
+            "DATABASE_URL": f"sqlite://{os.path.join(workdir, 'overload.sqlite3')}",
+            "RETENTION_DAYS": "0",
+            "FEEDS_ENABLED": "false",
+            "LOG_LEVEL": "ERROR",
+            "NO_PROXY": "127.0.0.1,localhost",
+            "TG_GLOBAL_RATE": "1000000",
+            "TG_PRIVATE_CHAT_RATE": "1000000",
+            "RATE_LIMIT_REQUESTS": str(10**9),
+            "OVERLOAD_ENABLED": "false" if args.no_overload else "true",
+            "OVERLOAD_CHECK_INTERVAL": "0.1",
+            "OVERLOAD_REQUESTS_IN_FLIGHT": str(args.capacity),
+            "OVERLOAD_LLM_IN_FLIGHT": str(args.capacity),
+            "OVERLOAD_COOLDOWN": str(args.cooldown),
+        }
+    )
+
+
+def _ms(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        "p50": round(statistics.median(ordered) * 1000, 1),
+        "p95": round(ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))] * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1),
+    }
+
+
+async def run(args: argparse.Namespace, fixtures_url: str) -> Dict[str, Any]:
+    from app.core.logger import setup_logging
+    from app.database.db import close_db, init_db
+
+    setup_logging()
+    await init_db()
+    try:
+        return await _run(args, fixtures_url)
+    finally:
+        await close_db()
+
+
+async def _run(args: argparse.Namespace, fixtures_url: str) -> Dict[str, Any]:
+    from tortoise import Tortoise
+
+    from app.bot.main import bot, dp, setup_handlers, setup_middlewares
+    from app.bot.sender import OutboundRateLimiter
+    from app.core.metrics import metrics
+    from app.core.overload import OverloadLevel, overload
+    from app.core.warmup import _import_all
+    from app.database.analytics import analytics
+    from app.database.models import SummaryRequest
+    from benchmarks.loadtest.fake_telegram import FakeTelegramSession, make_update
+
+    session = FakeTelegramSession()
+    session.middleware(OutboundRateLimiter())
+    bot.session = session
+    await Tortoise.generate_schemas(safe=True)
+    analytics.start()
+    setup_handlers()
+    setup_middlewares()
+    await bot.me()
+    # Ленивые импорты (newspaper, openai) блокируют loop — прогреваем до всплеска, как в проде
+    await asyncio.to_thread(_import_all)
+    overload.start()
+
+    timeline: List[Tuple[float, int]] = []
+    started = time.perf_counter()
+
+    async def sample() -> None:
+        while True:
+            level = int(overload.level)
+            if not timeline or timeline[-1][1] != level:
+                timeline.append((round(time.perf_counter() - started, 2), level))
+            await asyncio.sleep(0.02)
+
+    # (уровень при поступлении, длительность обработки апдейта)
+    handled: List[Tuple[int, float]] = []
+
+    async def send(index: int) -> None:
+        url = f"{fixtures_url}/articles/{index}.html"
+        update = make_update(index + 1, 20_000 + index, url, [url])
+        level = int(overload.level)
+        t0 = time.perf_counter()
+        await dp.feed_update(bot, update)
+        handled.append((level, time.perf_counter() - t0))
+
+    sampler = asyncio.create_task(sample())
+    tasks = []
+    for index in range(args.spike):
+        tasks.append(asyncio.create_task(send(index)))
+        await asyncio.sleep(args.ramp / args.spike)
+    await asyncio.gather(*tasks)
+    spike_done = time.perf_counter()
+
+    # Возврат к норме: по одной ступени за OVERLOAD_COOLDOWN
+    recovery_s = None
+    deadline = spike_done + args.cooldown * 6 + 5
+    while time.perf_counter() < deadline:
+        if overload.level == OverloadLevel.NORMAL:
+            recovery_s = round(time.perf_counter() - spike_done, 2)
+            break
+        await asyncio.sleep(0.05)
+    sampler.cancel()
+    await overload.stop()
+    await analytics.close()
+
+    rejected = [latency for level, latency in handled if level >= OverloadLevel.REJECT]
+    processed = [latency for level, latency in handled if level < OverloadLevel.REJECT]
+    tokens = await SummaryRequest.filter(status="success").values_list("tokens_used", flat=True)
+    transitions = {
+        level.name.lower(): int(metrics.counter("overload_transitions_total", level=level.name.lower()))
+        for level in OverloadLevel
+    }
+    return {
+        "overload": not args.no_overload,
+        "messages": args.spike,
+        "spike_duration_s": round(spike_done - started, 2),
+        "max_level": max((level for _, level in timeline), default=0),
+        "level_timeline": timeline,
+        "transitions": transitions,
+        "busy_replies": int(metrics.counter("overload_rejected_total", stage="request")),
+        "busy_reply_ms": _ms(rejected),
+        "processed_ms": _ms(processed),
+        "summaries": len(tokens),
+        "tokens_per_summary": round(statistics.fmean(tokens), 1) if tokens else 0,
+        "recovery_s": recovery_s,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spike", type=int, default=120, help="Messages in the spike")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds over which the spike arrives")
+    parser.add_argument("--capacity", type=int, default=10, help="OVERLOAD_REQUESTS_IN_FLIGHT / _LLM_IN_FLIGHT")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="OVERLOAD_COOLDOWN, seconds")
+    parser.add_argument("--llm-latency", default="fixed:1500")
+    parser.add_argument("--no-overload", action="store_true", help="Run with OVERLOAD_ENABLED=false")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    process, port = start_servers(ServerConfig(llm_latency=args.llm_latency))
+    base_url = f"http://127.0.0.1:{port}"
+    _configure_env(args, f"{base_url}/v1", tempfile.mkdtemp(prefix="bench_overload_"))
+    try:
+        result = asyncio.run(run(args, base_url))
+    finally:
+        process.terminate()
+        process.join(5)
+
+    # Гистерезис: за один всплеск каждый уровень входится не больше одного раза
+    failed = not args.no_overload and (
+        result["max_level"] < 4
+        or result["busy_replies"] == 0
+        or result["recovery_s"] is None
+        or any(count > 2 for count in result["transitions"].values())
+    )
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key}: {value}")
+        if failed:
+            print("FAIL: the spike did not degrade to 'busy' replies and back to normal without flapping")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
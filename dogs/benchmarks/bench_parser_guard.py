@@ -0,0 +1,155 @@
+"""
+Negative cache and circuit breaker in front of WebParser, against the local fixture server.
+
+Scenarios:
+  * repeat   — the same paywalled link (slow 403) requested again and again;
+  * outage   — distinct links on a domain answering slow 503s; after
+               CIRCUIT_FAILURE_THRESHOLD failures the rest must fail fast;
+  * isolation — another domain (``localhost``) keeps working while the first is cut off;
+  * recovery — after CIRCUIT_OPEN_SECONDS a half-open probe to a healthy page closes the circuit.
+
+Exit code 1 if repeated failures still hit the server with the guard enabled.
+
+Usage:
+    python -m benchmarks.bench_parser_guard [--requests 30] [--delay-ms 300] [--no-guard] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.loadtest.servers import ServerConfig, start_servers
+
+
+def _configure_env(args: argparse.Namespace) -> None:
+    # До импорта app.*: настройки читаются при импорте
+    os.environ.update(
+        {
+            "TG_TOKEN": "42:bench",
+            "OPENAI_API_KEY": "bench",
+            "LOG_LEVEL": "WARNING",
+            "NO_PROXY": "127.0.0.1,localhost",
+            "PARSER_GUARD_ENABLED": "false" if args.no_guard else "true",
+            "CIRCUIT_FAILURE_THRESHOLD": str(args.threshold),
+            "CIRCUIT_OPEN_SECONDS": str(args.open_seconds),
+        }
+    )
+
+
+def _ms(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    return {
+        "first": round(samples[0] * 1000, 2),
+        "p50_rest": round(statistics.median(samples[1:] or samples) * 1000, 3),
+        "max_rest": round(max(samples[1:] or samples) * 1000, 3),
+    }
+
+
+async def _stats(base_url: str) -> Dict[str, int]:
+    import aiohttp
+
+    async with aiohttp.ClientSession() as client:
+        async with client.get(f"{base_url}/stats") as response:
+            return await response.json()
+
+
+async def run(args: argparse.Namespace, port: int) -> Dict[str, Any]:
+    from app.core.logger import setup_logging
+    from app.core.metrics import metrics
+    from app.core.parsers import CircuitOpenError, ExtractionError, WebParser, parser_guard
+
+    setup_logging()
+    web = WebParser()
+    failing = f"http://127.0.0.1:{port}"
+    healthy = f"http://localhost:{port}"
+
+    async def timed(url: str) -> tuple[float, str]:
+        started = time.perf_counter()
+        try:
+            await parser_guard.parse(web, url)
+            outcome = "ok"
+        except CircuitOpenError:
+            outcome = "circuit_open"
+        except ExtractionError:
+            outcome = "error"
+        return time.perf_counter() - started, outcome
+
+    # repeat: один и тот же платный материал
+    before = (await _stats(failing))["fail_hits"]
+    repeat = [await timed(f"{failing}/fail/403/paywalled?delay={args.delay_ms}") for _ in range(args.requests)]
+    repeat_hits = (await _stats(failing))["fail_hits"] - before
+
+    # outage: разные ссылки на падающем сайте
+    before = (await _stats(failing))["fail_hits"]
+    outage = [await timed(f"{failing}/fail/503/page{n}?delay={args.delay_ms}") for n in range(args.requests)]
+    outage_hits = (await _stats(failing))["fail_hits"] - before
+
+    isolation = await timed(f"{healthy}/articles/1.html")
+
+    # recovery: после паузы одна проба на живую страницу закрывает домен
+    await asyncio.sleep(args.open_seconds + 0.1)
+    recovery = await timed(f"{failing}/articles/2.html")
+    after_recovery = await timed(f"{failing}/articles/3.html")
+
+    return {
+        "guard": not args.no_guard,
+        "delay_ms": args.delay_ms,
+        "repeat_latency_ms": _ms([latency for latency, _ in repeat]),
+        "repeat_server_hits": repeat_hits,
+        "outage_latency_ms": _ms([latency for latency, _ in outage]),
+        "outage_outcomes": {o: sum(1 for _, x in outage if x == o) for o in ("error", "circuit_open")},
+        "outage_server_hits": outage_hits,
+        "isolation_other_domain": isolation[1],
+        "recovery_probe": recovery[1],
+        "after_recovery": after_recovery[1],
+        "open_circuits": parser_guard.open_circuits(),
+        "fail_fast": {
+            cause: metrics.counter("parser_fail_fast_total", cause=cause) for cause in ("cached", "circuit_open")
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30, help="Requests per scenario")
+    parser.add_argument("--delay-ms", type=int, default=300, help="How long a failing page takes to answer")
+    parser.add_argument("--threshold", type=int, default=5, help="CIRCUIT_FAILURE_THRESHOLD")
+    parser.add_argument("--open-seconds", type=float, default=1.0, help="CIRCUIT_OPEN_SECONDS")
+    parser.add_argument("--no-guard", action="store_true", help="Run with PARSER_GUARD_ENABLED=false")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    process, port = start_servers(ServerConfig())
+    _configure_env(args)
+    try:
+        result = asyncio.run(run(args, port))
+    finally:
+        process.terminate()
+        process.join(5)
+
+    failed = not args.no_guard and (
+        result["repeat_server_hits"] != 1
+        or result["outage_server_hits"] > args.threshold
+        or result["isolation_other_domain"] != "ok"
+        or result["after_recovery"] != "ok"
+    )
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key}: {value}")
+        if failed:
+            print("FAIL: known-bad links or a failing domain still reached the server")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Multi-bot tenancy: the same article traffic served by one bot and by N bots in one process.
+
+Each configuration runs in a fresh interpreter (through the real dispatcher, fake Bot API,
+local LLM stub). Reports resident memory after the traffic, the memory cost of every extra
+bot, how many LLM connection pools and summarizers were built, and per-tenant analytics
+rows with the model that served them. Exit code 1 if a request is tagged with the wrong
+tenant, a tenant's model is not used, or an extra bot costs more than ``--budget-kb``.
+
+Usage:
+    python -m benchmarks.bench_tenants [--tenants 5] [--messages 60] [--budget-kb 2048] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from benchmarks.loadtest.servers import ServerConfig, start_servers
+
+_ROOT = Path(__file__).resolve().parent.parent
+_MODEL_PREFIX = "tenant-model-"
+
+
+def _rss_kb() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _configure_env(tenants: int, llm_base_url: str, workdir: str) -> None:
+    # До импорта app.*: настройки читаются при импорте
+    tenants_file = os.path.join(workdir, "tenants.json")
+    with open(tenants_file, "w") as f:
+        json.dump(
+            [
+                {
+                    "name": f"t{n}",
+                    "token": f"{100 + n}:bench",
+                    "prompt": f"You are the summarizer of tenant t{n}.",
+                    # Половина тенантов со своей моделью, остальные — на модели по умолчанию
+                    **({"model": f"{_MODEL_PREFIX}{n}"} if n % 2 else {}),
+                    "rate_limit_requests": 10**9,
+                }
+                for n in range(1, tenants)
+            ],
+            f,
+        )
+    os.environ.update(
+        {
+            "TG_TOKEN": "42:bench",
+            "TENANTS_FILE": tenants_file,
+            "OPENAI_API_KEY": "bench",
+            "LLM_PROVIDER": "openai",
+            "OPENAI_BASE_URL": llm_base_url,
+            "DATABASE_URL": f"sqlite://{os.path.join(workdir, 'tenants.sqlite3')}",
+            "RETENTION_DAYS": "0",
+            "FEEDS_ENABLED": "false",
+            "OVERLOAD_ENABLED": "false",
+            "LOG_LEVEL": "ERROR",
+            "NO_PROXY": "127.0.0.1,localhost",
+            "TG_GLOBAL_RATE": "1000000",
+            "TG_PRIVATE_CHAT_RATE": "1000000",
+            "RATE_LIMIT_REQUESTS": str(10**9),
+        }
+    )
+
+
+async def child(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.core.logger import setup_logging
+    from app.database.db import close_db, init_db
+
+    setup_logging()
+    await init_db()
+    try:
+        return await _child(args)
+    finally:
+        await close_db()
+
+
+async def _child(args: argparse.Namespace) -> Dict[str, Any]:
+    from tortoise import Tortoise
+
+    from app.bot.main import bots, dp, setup_handlers, setup_middlewares
+    from app.bot.sender import OutboundRateLimiter
+    from app.core.llm.client import _create_insecure_http_client
+    from app.core.llm.service import _summarizer
+    from app.core.warmup import _import_all
+    from app.database.analytics import analytics
+    from app.database.models import SummaryRequest
+    from benchmarks.loadtest.fake_telegram import FakeTelegramSession, make_update
+
+    await Tortoise.generate_schemas(safe=True)
+    analytics.start()
+    setup_handlers()
+    setup_middlewares()
+    for bot in bots.values():
+        session = FakeTelegramSession()
+        session.middleware(OutboundRateLimiter())
+        bot.session = session
+        await bot.me()
+    await asyncio.to_thread(_import_all)
+
+    # Одинаковый трафик при любом числе ботов: сообщения раскладываются по кругу
+    names = list(bots)
+    for start in range(0, args.messages, args.concurrency):
+        batch = []
+        for index in range(start, min(start + args.concurrency, args.messages)):
+            url = f"{args.fixtures_url}/articles/{index}.html"
+            update = make_update(index + 1, 30_000 + index, url, [url])
+            batch.append(dp.feed_update(bots[names[index % len(names)]], update))
+        await asyncio.gather(*batch)
+    await analytics.close()
+
+    rows = await SummaryRequest.filter(status="success").values_list("tenant", "model")
+    per_tenant: Dict[str, Dict[str, int]] = {}
+    for tenant, model in rows:
+        models = per_tenant.setdefault(tenant, {})
+        models[model] = models.get(model, 0) + 1
+    return {
+        "tenants": len(bots),
+        "rss_kb": _rss_kb(),
+        "http_pools": _create_insecure_http_client.cache_info().currsize,
+        "summarizers": _summarizer.cache_info().currsize,
+        "summaries": len(rows),
+        "per_tenant": per_tenant,
+    }
+
+
+def _run_child(tenants: int, args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_tenants", "--child",
+            "--tenants", str(tenants),
+            "--messages", str(args.messages),
+            "--concurrency", str(args.concurrency),
+            "--base-url", base_url,
+        ],
+        cwd=_ROOT,
+        env={**os.environ, "PYTHONPATH": str(_ROOT)},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"child run with {tenants} tenants failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _check(result: Dict[str, Any]) -> list[str]:
+    problems = []
+    for tenant, models in result["per_tenant"].items():
+        n = int(tenant[1:]) if tenant != "default" else 0
+        expected = f"{_MODEL_PREFIX}{n}" if n % 2 else None
+        if expected and set(models) != {expected}:
+            problems.append(f"{tenant}: expected model {expected}, got {sorted(models)}")
+        if not expected and any(model.startswith(_MODEL_PREFIX) for model in models):
+            problems.append(f"{tenant}: served by another tenant's model {sorted(models)}")
+    if len(result["per_tenant"]) != result["tenants"]:
+        problems.append(f"analytics rows for {len(result['per_tenant'])} of {result['tenants']} tenants")
+    if result["http_pools"] != 1:
+        problems.append(f"{result['http_pools']} LLM connection pools instead of one")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=5, help="Bots in the multi-tenant run")
+    parser.add_argument("--messages", type=int, default=60, help="Article links per run")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--budget-kb", type=int, default=2048, help="Max extra RSS per additional bot")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _configure_env(args.tenants, f"{args.base_url}/v1", tempfile.mkdtemp(prefix="bench_tenants_"))
+        args.fixtures_url = args.base_url
+        print(json.dumps(asyncio.run(child(args))))
+        return
+
+    process, port = start_servers(ServerConfig(llm_latency="fixed:50"))
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        single = _run_child(1, args, base_url)
+        multi = _run_child(args.tenants, args, base_url)
+    finally:
+        process.terminate()
+        process.join(5)
+
+    extra_kb = round((multi["rss_kb"] - single["rss_kb"]) / max(1, args.tenants - 1))
+    problems = _check(multi)
+    if extra_kb > args.budget_kb:
+        problems.append(f"{extra_kb} KB per extra bot exceeds budget {args.budget_kb} KB")
+    result = {
+        "single_rss_mb": round(single["rss_kb"] / 1024, 1),
+        "multi_rss_mb": round(multi["rss_kb"] / 1024, 1),
+        "tenants": args.tenants,
+        "rss_per_extra_bot_kb": extra_kb,
+        "http_pools": multi["http_pools"],
+        "summarizers": multi["summarizers"],
+        "summaries": {"single": single["summaries"], "multi": multi["summaries"]},
+        "per_tenant": multi["per_tenant"],
+        "problems": problems,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for key, value in result.items():
+            print(f"{key}: {value}")
+        if problems:
+            print("FAIL: tenants are not isolated or an extra bot costs too much memory")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Microbenchmark: ThrottlingMiddleware overhead per update.
+
+Usage:
+    python -m benchmarks.bench_throttling [--updates 200000] [--users 50000] [--backend memory|sqlite]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("TG_TOKEN", "0:benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from aiogram.types import Chat, Message, User  # noqa: E402
+
+from app.bot.middlewares.throttling import ThrottlingMiddleware  # noqa: E402
+from app.core.ratelimit import MemoryRateLimitBackend, SQLiteRateLimitBackend  # noqa: E402
+
+
+def _make_messages(users: int) -> list[Message]:
+    now = datetime.now()
+    return [
+        Message(
+            message_id=i,
+            date=now,
+            chat=Chat(id=i, type="private"),
+            from_user=User(id=i, is_bot=False, first_name="u"),
+            text="hello",
+        )
+        for i in range(1, users + 1)
+    ]
+
+
+async def _handler(event: Message, data: dict) -> None:
+    return None
+
+
+async def run(updates: int, users: int, backend_name: str) -> None:
+    if backend_name == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(), "ratelimit.sqlite3")
+        backend = SQLiteRateLimitBackend(path)
+    else:
+        backend = MemoryRateLimitBackend()
+
+    # Большой лимит, чтобы мерить именно накладные расходы, а не ответ "слишком много запросов"
+    middleware = ThrottlingMiddleware(max_requests=10**9, period_seconds=60, backend=backend)
+    messages = _make_messages(users)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for i in range(updates):
+        await middleware(_handler, messages[i % users], {})
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"backend={backend_name} updates={updates} users={users}")
+    print(f"overhead_per_update_us={elapsed / updates * 1e6:.2f}")
+    print(f"throughput_updates_per_s={updates / elapsed:,.0f}")
+    print(f"peak_traced_memory_kb={peak / 1024:.0f}")
+    await backend.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="memory")
+    args = parser.parse_args()
+    asyncio.run(run(args.updates, args.users, args.backend))
+
+
+if __name__ == "__main__":
+    main()
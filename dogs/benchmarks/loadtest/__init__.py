@@ -0,0 +1,3 @@
+"""
+Offline end-to-end load test (fake Bot API, stub LLM, fixture web server).
+"""
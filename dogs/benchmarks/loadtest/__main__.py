@@ -0,0 +1,391 @@
+"""
+Offline end-to-end load test: synthetic updates go through the real dispatcher
+(app/bot/main.py: middlewares, handlers, parsers, LLM client, analytics) while
+Telegram, the LLM API and the web are replaced by local fakes.
+
+Usage:
+    python -m benchmarks.loadtest [--requests 300] [--concurrency 20] [--users 100]
+        [--mix text=0.3,article=0.5,video=0.1,multi=0.1,followup=0]
+        [--llm-latency lognormal:800,0.4] [--llm-429 0.05]
+        [--tg-latency-ms 30] [--telegram-limits] [--json] [--output result.json]
+
+The LLM stub answers ``stream=true`` requests with SSE chunks. A ``followup``
+request replies to the user's last summary with a question; users without one
+get an article summary first (timed as ``article``). Compare two versions by
+diffing the JSON written with ``--output``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.loadtest.servers import ServerConfig, start_servers
+
+_MIX_KINDS = ("text", "article", "video", "multi", "followup")
+_QUESTIONS = (
+    "What did it say about the transport plan?",
+    "Что там про рынок и рост сети?",
+    "How accurate was the model according to the researchers?",
+)
+
+
+class _QueryCounter(logging.Handler):
+    """
+    Counts SQL statements via Tortoise's ``tortoise.db_client`` debug log (no formatting).
+    """
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+
+
+def _parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in _MIX_KINDS:
+            raise argparse.ArgumentTypeError(f"Unknown workload kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1] * 1000, 1),
+        "mean": round(statistics.fmean(ordered) * 1000, 1),
+    }
+
+
+def _configure_env(args: argparse.Namespace, llm_base_url: str, workdir: str) -> None:
+    # Окружение должно быть готово до импорта app.*: db.py читает DATABASE_URL при импорте
+    os.environ.update(
+        {
+            "TG_TOKEN": "42:loadtest",
+            "OPENAI_API_KEY": "loadtest",
+            "LLM_PROVIDER": "openai",
+            "OPENAI_BASE_URL": llm_base_url,
+            "DATABASE_URL": f"sqlite://{os.path.join(workdir, 'loadtest.sqlite3')}",
+            "RATE_LIMIT_SQLITE_PATH": os.path.join(workdir, "ratelimit.sqlite3"),
+            "RETENTION_DAYS": "0",
+            "LOG_LEVEL": args.log_level,
+            "LOG_FORMAT": "console",
+            "NO_PROXY": "127.0.0.1,localhost",
+        }
+    )
+    # Меряем бота, а не пользовательский лимит (иначе большинство запросов отсечётся)
+    os.environ.setdefault("RATE_LIMIT_REQUESTS", str(10**9))
+    if not args.telegram_limits:
+        os.environ["TG_GLOBAL_RATE"] = "1000000"
+        os.environ["TG_PRIVATE_CHAT_RATE"] = "1000000"
+        os.environ["TG_GROUP_CHAT_RATE"] = "1000000"
+
+
+def _build_workload(args: argparse.Namespace, fixtures_url: str) -> List[Tuple[str, str, List[str]]]:
+    """
+    Return (kind, text, urls) per request, deterministic for a given seed.
+    """
+    rng = random.Random(args.seed)
+    kinds = list(args.mix)
+    weights = [args.mix[kind] for kind in kinds]
+    workload = []
+    for i in range(args.requests):
+        kind = rng.choices(kinds, weights)[0]
+        n = rng.randrange(args.articles)
+        if kind == "article":
+            urls = [f"{fixtures_url}/articles/{n}.html"]
+            text = urls[0]
+        elif kind == "video":
+            urls = [f"https://www.youtube.com/watch?v=fixture{n}"]
+            text = urls[0]
+        elif kind == "followup":
+            urls = [f"{fixtures_url}/articles/{n}.html"]  # если саммари ещё не было
+            text = rng.choice(_QUESTIONS)
+        elif kind == "multi":
+            urls = [f"{fixtures_url}/articles/{(n + k) % args.articles}.html" for k in range(3)]
+            text = "Сравни: " + " ".join(urls)
+        else:
+            urls = []
+            words = " ".join(rng.choice(("рынок", "данные", "модель", "город", "сеть")) for _ in range(300))
+            text = f"Заметка {i}. {words}"
+        workload.append((kind, text, urls))
+    return workload
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args: argparse.Namespace, fixtures_url: str) -> Dict[str, Any]:
+    from tortoise import Tortoise
+
+    from app.bot.main import bot, dp, setup_handlers, setup_middlewares, shutdown_middlewares
+    from app.bot.sender import OutboundRateLimiter
+    from app.core.logger import setup_logging
+    from app.core.loop_monitor import loop_monitor
+    from app.core.metrics import metrics
+    from app.core.parsers.youtube import YouTubeParser
+    from app.database.analytics import analytics
+    from app.database.db import close_db, init_db
+    from app.database.models import SummaryRequest
+    from benchmarks.loadtest.fake_telegram import FakeTelegramSession, make_update
+
+    import structlog
+
+    setup_logging()
+    # stdout занят результатом (--json), логи бота — в stderr
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(file=sys.stderr))
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(sys.stderr)
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+
+    # AICODE-NOTE: Метаданные видео yt-dlp берёт только с youtube.com — это единственный
+    # подменённый шаг; субтитры качаются настоящим кодом с локального сервера.
+    def _fixture_video_info(self: YouTubeParser, url: str, socket_timeout: float) -> dict:
+        index = int(url.rsplit("fixture", 1)[1])
+        return {
+            "title": f"Fixture video {index}",
+            "duration": 600,
+            "uploader": "loadtest",
+            "subtitles": {"en": [{"url": f"{fixtures_url}/subs/{index}.vtt"}]},
+        }
+
+    YouTubeParser._extract_video_info = _fixture_video_info  # type: ignore[method-assign]
+
+    session = FakeTelegramSession(latency_ms=args.tg_latency_ms, jitter_ms=args.tg_latency_ms / 2, seed=args.seed)
+    session.middleware(OutboundRateLimiter())
+    bot.session = session
+
+    await init_db()
+    await Tortoise.generate_schemas(safe=True)
+    analytics.start()
+    loop_monitor.start()
+    setup_handlers()
+    setup_middlewares()
+    await bot.me()
+
+    query_counter = _QueryCounter()
+    db_logger = logging.getLogger("tortoise.db_client")
+    db_logger.addHandler(query_counter)
+    db_logger.setLevel(logging.DEBUG)
+    db_logger.propagate = False
+
+    workload = _build_workload(args, fixtures_url)
+    update_ids = iter(range(1, 10**9))
+
+    async def feed(text: str, urls: List[str], user_id: int, reply_to: int | None = None) -> None:
+        await dp.feed_update(bot, make_update(next(update_ids), user_id, text, urls, reply_to))
+
+    # Прогрев: ленивые импорты, соединения, кэш пользователей — вне статистики
+    for kind, text, urls in workload[: args.warmup]:
+        await feed(text if kind != "followup" else urls[0], urls, 1_000_000)
+    await analytics.flush()
+    session.calls.clear()
+    metrics.reset()
+    query_counter.count = 0
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    failures: Counter[str] = Counter()
+    queue: asyncio.Queue[Tuple[int, Tuple[str, str, List[str]]]] = asyncio.Queue()
+    for index, item in enumerate(workload):
+        queue.put_nowait((index, item))
+
+    async def worker() -> None:
+        while True:
+            try:
+                index, (kind, text, urls) = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            user_id = 1 + index % args.users
+            if kind != "followup":
+                await timed(kind, text, urls, user_id)
+                continue
+            if user_id not in session.last_message_id:
+                await timed("article", urls[0], urls, user_id)
+            await timed(kind, text, [], user_id, session.last_message_id.get(user_id))
+
+    async def timed(kind: str, text: str, urls: List[str], user_id: int, reply_to: int | None = None) -> None:
+        started = time.perf_counter()
+        try:
+            await feed(text, urls, user_id, reply_to)
+        except Exception as e:
+            failures[type(e).__name__] += 1
+        latencies[kind].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    # Запросы, записанные write-behind буфером, учитываются в DB ops
+    await analytics.flush()
+    db_ops = query_counter.count
+    db_logger.removeHandler(query_counter)
+    statuses = await _status_counts(SummaryRequest)
+    tokens = await _tokens_by_content_type(SummaryRequest)
+
+    all_latencies = [value for samples in latencies.values() for value in samples]
+    lag = metrics.histogram("event_loop_lag_seconds")
+    api_calls = session.total_calls
+
+    await loop_monitor.stop()
+    await shutdown_middlewares()
+    await analytics.close()
+    await close_db()
+
+    requests = len(all_latencies)
+    return {
+        "requests": requests,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency_ms": _percentiles(all_latencies),
+        "latency_ms_by_kind": {kind: _percentiles(samples) for kind, samples in sorted(latencies.items())},
+        # По элементам: сообщение с несколькими ссылками даёт несколько записей
+        "item_outcomes": statuses,
+        "handler_exceptions": dict(failures),
+        "tokens_per_item_by_content_type": tokens,
+        "db_ops_total": db_ops,
+        "db_ops_per_request": round(db_ops / requests, 2) if requests else 0,
+        "bot_api_calls_total": api_calls,
+        "bot_api_calls_per_request": round(api_calls / requests, 2) if requests else 0,
+        "bot_api_calls_by_method": dict(sorted(session.calls.items())),
+        "loop_lag_ms": {
+            "p99": round(lag.percentile(0.99) * 1000, 1) if lag else 0.0,
+            "max": round(lag.max * 1000, 1) if lag and lag.count else 0.0,
+        },
+    }
+
+
+async def _status_counts(model: Any) -> Dict[str, int]:
+    # Только строки нагрузки: прогрев идёт от отдельного пользователя
+    rows = await model.filter(user__telegram_id__lt=1_000_000).values_list("status", flat=True)
+    return dict(Counter(rows))
+
+
+async def _tokens_by_content_type(model: Any) -> Dict[str, float]:
+    rows = await model.filter(user__telegram_id__lt=1_000_000, status="success").values_list(
+        "content_type", "tokens_used"
+    )
+    grouped: Dict[str, List[int]] = defaultdict(list)
+    for content_type, tokens_used in rows:
+        grouped[content_type].append(tokens_used)
+    return {content_type: round(statistics.fmean(values), 1) for content_type, values in sorted(grouped.items())}
+
+
+async def _fetch_llm_stats(base_url: str) -> Dict[str, int]:
+    import aiohttp
+
+    async with aiohttp.ClientSession() as client:
+        async with client.get(f"{base_url}/stats") as response:
+            return await response.json()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100, help="Distinct synthetic users")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("text=0.3,article=0.5,video=0.1,multi=0.1"))
+    parser.add_argument("--articles", type=int, default=20, help="Distinct fixture articles/videos")
+    parser.add_argument("--warmup", type=int, default=5, help="Sequential requests excluded from stats")
+    parser.add_argument("--llm-latency", default="lognormal:800,0.4", help="fixed:MS | uniform:A,B | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--llm-429", type=float, default=0.0, help="Share of LLM calls answered with 429")
+    parser.add_argument("--llm-tokens", type=int, default=250, help="Completion tokens per answer")
+    parser.add_argument("--tg-latency-ms", type=float, default=30.0, help="Simulated Bot API round trip")
+    parser.add_argument("--telegram-limits", action="store_true", help="Keep real outbound flood limits")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable result")
+    parser.add_argument("--output", type=Path, help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    config = ServerConfig(
+        llm_latency=args.llm_latency,
+        llm_rate_limit_share=args.llm_429,
+        completion_tokens=args.llm_tokens,
+        article_count=args.articles,
+        seed=args.seed,
+    )
+    process, port = start_servers(config)
+    base_url = f"http://127.0.0.1:{port}"
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    _configure_env(args, f"{base_url}/v1", workdir)
+
+    try:
+        results = asyncio.run(run(args, base_url))
+        results["llm_stub"] = asyncio.run(_fetch_llm_stats(base_url))
+    finally:
+        process.terminate()
+        process.join(5)
+
+    report = {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("json", "output", "log_level")
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+        return
+
+    r = results
+    print(f"requests={r['requests']} concurrency={args.concurrency} duration={r['duration_s']}s rev={report['meta']['git_revision']}")
+    print(f"throughput: {r['throughput_rps']} req/s")
+    print(f"latency ms: {r['latency_ms']}")
+    for kind, stats in r["latency_ms_by_kind"].items():
+        print(f"  {kind:<8} {stats}")
+    print(f"item outcomes: {r['item_outcomes']} exceptions: {r['handler_exceptions']}")
+    print(f"tokens/item: {r['tokens_per_item_by_content_type']}")
+    print(f"db ops/request: {r['db_ops_per_request']} (total {r['db_ops_total']})")
+    print(f"bot api calls/request: {r['bot_api_calls_per_request']} {r['bot_api_calls_by_method']}")
+    print(f"llm stub: {r['llm_stub']}")
+    print(f"loop lag ms: {r['loop_lag_ms']}")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
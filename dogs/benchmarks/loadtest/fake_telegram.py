@@ -0,0 +1,118 @@
+"""
+In-memory Bot API session and synthetic updates for driving the real dispatcher.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncGenerator, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetMe, SendMessage, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Chat, Message, MessageEntity, MessageOriginChannel, Update, User
+
+BOT_USER = User(id=42, is_bot=True, first_name="LoadTest", username="loadtest_bot")
+
+
+class FakeTelegramSession(BaseSession):
+    """
+    Answers Bot API calls locally. Session middlewares (OutboundRateLimiter) still run.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 1) -> None:
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls: Counter[str] = Counter()
+        # Последнее сообщение бота в чате — цель реплая для уточняющих вопросов
+        self.last_message_id: dict[int, int] = {}
+        self._rng = random.Random(seed)
+        self._message_id = 0
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: Optional[int] = None,
+    ) -> TelegramType:
+        self.calls[type(method).__name__] += 1
+        if self.latency_ms or self.jitter_ms:
+            await asyncio.sleep(max(0.0, self.latency_ms + self._rng.uniform(-1, 1) * self.jitter_ms) / 1000)
+
+        if isinstance(method, GetMe):
+            return BOT_USER  # type: ignore[return-value]
+        if isinstance(method, SendMessage):
+            self._message_id += 1
+            self.last_message_id[int(method.chat_id)] = self._message_id
+            return Message(  # type: ignore[return-value]
+                message_id=self._message_id,
+                date=datetime.now(),
+                chat=Chat(id=int(method.chat_id), type="private"),
+                from_user=BOT_USER,
+                text=method.text,
+            )
+        # setMessageReaction, sendChatAction и прочие методы возвращают True
+        return True  # type: ignore[return-value]
+
+    async def stream_content(self, url: str, *args: Any, **kwargs: Any) -> AsyncGenerator[bytes, None]:
+        raise NotImplementedError("File downloads are not simulated")
+        yield b""  # pragma: no cover
+
+    async def close(self) -> None:
+        return None
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+def make_update(
+    update_id: int,
+    user_id: int,
+    text: str,
+    urls: list[str],
+    reply_to: Optional[int] = None,
+    forward_from: Optional[str] = None,
+) -> Update:
+    """
+    Private-chat text message; URL entities are set the way Telegram does it.
+    ``reply_to`` makes it a reply to the bot's message with that id;
+    ``forward_from`` makes it a post forwarded from the channel with that title.
+    """
+    entities = []
+    for url in urls:
+        offset = text.index(url)
+        # Все URL в нагрузке ASCII — длина в UTF-16 совпадает с len()
+        prefix_utf16 = len(text[:offset].encode("utf-16-le")) // 2
+        entities.append(MessageEntity(type="url", offset=prefix_utf16, length=len(url)))
+    chat = Chat(id=user_id, type="private")
+    reply_to_message = None
+    if reply_to is not None:
+        reply_to_message = Message(message_id=reply_to, date=datetime.now(), chat=chat, from_user=BOT_USER, text="…")
+    forward_origin = None
+    if forward_from is not None:
+        forward_origin = MessageOriginChannel(
+            type="channel",
+            date=datetime.now(),
+            chat=Chat(id=-1_000_000_000_000 - zlib.crc32(forward_from.encode()), type="channel", title=forward_from),
+            message_id=update_id,
+        )
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=chat,
+            from_user=User(id=user_id, is_bot=False, first_name=f"user{user_id}"),
+            text=text,
+            entities=entities or None,
+            reply_to_message=reply_to_message,
+            forward_origin=forward_origin,
+        ),
+    )
@@ -0,0 +1,315 @@
+"""
+Local servers for the load test, run in a child process so their CPU time does
+not distort the bot's event loop:
+
+* an OpenAI-compatible ``/v1/chat/completions`` stub with configurable latency,
+  SSE streaming and 429 injection;
+* a fixture server with synthetic articles (``/articles/<n>.html``) and
+  subtitles (``/subs/<n>.vtt``);
+* RSS feeds (``/feeds/<n>.xml``) honouring ETag / If-Modified-Since, with
+  ``POST /feeds/<n>/publish?count=k`` to add entries;
+* failing pages ``/fail/<status>/<name>?delay=ms`` answering with that HTTP status
+  after a delay (paywalls, overloaded sites).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import multiprocessing
+import random
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from email.utils import formatdate
+from typing import Any, Dict, Tuple
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+_WORDS = (
+    "система данные модель запрос ответ город время работа рынок проект развитие "
+    "исследование технология решение результат процесс компания пользователь сеть "
+    "energy market policy research network model signal growth climate science"
+).split()
+# newspaper выделяет основной текст по доле стоп-слов (язык по умолчанию — en)
+_SENTENCES = (
+    "The city council said that the new transport plan would be ready by the end of the year",
+    "Researchers found that the model was able to predict demand with a much higher accuracy",
+    "It is not clear how the market will react when the policy comes into force next month",
+    "Most of the users who took part in the survey said they would like to see more of it",
+    "The company has been working on this project for more than three years in a row",
+    "According to the report, the growth of the network was driven by the rise in mobile use",
+)
+
+
+@dataclass(slots=True)
+class LatencyModel:
+    """
+    Latency distribution in milliseconds: ``fixed:800``, ``uniform:200,1500``
+    or ``lognormal:800,0.5`` (median, sigma).
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value]
+        if kind == "fixed" and len(values) == 1:
+            return cls(kind, values[0])
+        if kind in ("uniform", "lognormal") and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"Bad latency spec: {spec!r}")
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Return a latency in seconds.
+        """
+        if self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        else:
+            ms = self.a
+        return max(0.0, ms) / 1000
+
+
+@dataclass(slots=True)
+class ServerConfig:
+    llm_latency: str = "lognormal:800,0.4"
+    llm_rate_limit_share: float = 0.0  # Доля запросов, получающих 429
+    llm_retry_after_ms: int = 100
+    completion_tokens: int = 250
+    article_count: int = 20
+    feed_initial_entries: int = 5
+    seed: int = 1
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def article_html(index: int) -> str:
+    rng = random.Random(index)
+    paragraphs = "\n".join(
+        "<p>" + ". ".join(rng.choice(_SENTENCES) for _ in range(rng.randint(3, 8))) + ".</p>"
+        for _ in range(4 + index % 12)
+    )
+    return (
+        f"<html><head><title>Fixture article {index}</title></head><body>"
+        f"<article><h1>Fixture article {index}</h1>{paragraphs}</article></body></html>"
+    )
+
+
+def subtitles_vtt(index: int) -> str:
+    rng = random.Random(10_000 + index)
+    cues = []
+    for cue in range(60 + index % 120):
+        start, end = cue * 4, cue * 4 + 4
+        cues.append(
+            f"{cue + 1}\n00:{start // 60:02d}:{start % 60:02d}.000 --> "
+            f"00:{end // 60:02d}:{end % 60:02d}.000\n{_text(rng, 12)}"
+        )
+    return "WEBVTT\n\n" + "\n\n".join(cues) + "\n"
+
+
+class StubLLM:
+    """
+    Minimal OpenAI chat-completions implementation with injected latency and 429s.
+    """
+
+    def __init__(self, config: ServerConfig) -> None:
+        self.config = config
+        self.latency = LatencyModel.parse(config.llm_latency)
+        self.rng = random.Random(config.seed)
+        self.stats: Dict[str, int] = {"requests": 0, "rate_limited": 0, "streamed": 0, "completed": 0}
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats["requests"] += 1
+        if self.rng.random() < self.config.llm_rate_limit_share:
+            self.stats["rate_limited"] += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after-ms": str(self.config.llm_retry_after_ms)},
+            )
+
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+        completion_tokens = min(body.get("max_tokens") or self.config.completion_tokens, self.config.completion_tokens)
+        text = "<b>Кратко</b>\n" + _text(self.rng, completion_tokens)
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_chars // 4 + completion_tokens,
+        }
+        model = body.get("model", "stub-model")
+        delay = self.latency.sample(self.rng)
+
+        if body.get("stream"):
+            self.stats["streamed"] += 1
+            return await self._stream(request, model, text, delay)
+
+        await asyncio.sleep(delay)
+        self.stats["completed"] += 1
+        return web.json_response(
+            {
+                "id": f"chatcmpl-stub-{self.stats['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+                ],
+                "usage": usage,
+            }
+        )
+
+    async def _stream(self, request: web.Request, model: str, text: str, delay: float) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        words = text.split(" ")
+        chunks = [" ".join(words[i : i + 8]) + " " for i in range(0, len(words), 8)]
+        # Первая часть задержки — «time to first token», остальное размазано по чанкам
+        await asyncio.sleep(delay * 0.3)
+        for chunk in chunks:
+            payload = {
+                "id": "chatcmpl-stub-stream",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode())
+            await asyncio.sleep(delay * 0.7 / len(chunks))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        self.stats["completed"] += 1
+        return response
+
+
+class FeedStub:
+    """
+    RSS 2.0 feeds whose entries grow on ``publish``; answers 304 to matching validators.
+    """
+
+    def __init__(self, config: ServerConfig) -> None:
+        self.config = config
+        self.started = time.time()
+        self.entries: Dict[int, int] = defaultdict(lambda: config.feed_initial_entries)
+        self.modified: Dict[int, float] = {}
+        self.stats: Dict[str, int] = {"feed_200": 0, "feed_304": 0}
+
+    def _validators(self, index: int) -> Tuple[str, str]:
+        etag = f'"feed-{index}-{self.entries[index]}"'
+        return etag, formatdate(self.modified.get(index, self.started), usegmt=True)
+
+    def _render(self, index: int) -> str:
+        count = self.entries[index]
+        items = []
+        for k in range(count - 1, max(-1, count - 21), -1):
+            article = (index * 7 + k) % self.config.article_count
+            items.append(
+                f"<item><title>Feed {index} post {k}</title>"
+                f"<link>/articles/{article}.html</link>"
+                f'<guid isPermaLink="false">feed-{index}-{k}</guid>'
+                f"<description>{escape(article_html(article)[:200])}</description></item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Fixture feed {index}</title><link>/</link>{''.join(items)}</channel></rss>"
+        )
+
+    async def feed(self, request: web.Request) -> web.Response:
+        index = int(request.match_info["index"])
+        etag, last_modified = self._validators(index)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match == etag or (if_none_match is None and request.headers.get("If-Modified-Since") == last_modified):
+            self.stats["feed_304"] += 1
+            return web.Response(status=304, headers={"ETag": etag, "Last-Modified": last_modified})
+        self.stats["feed_200"] += 1
+        return web.Response(
+            text=self._render(index),
+            content_type="application/rss+xml",
+            headers={"ETag": etag, "Last-Modified": last_modified},
+        )
+
+    async def publish(self, request: web.Request) -> web.Response:
+        index = int(request.match_info["index"])
+        self.entries[index] += int(request.query.get("count", "1"))
+        self.modified[index] = time.time()
+        return web.json_response({"entries": self.entries[index]})
+
+
+def build_app(config: ServerConfig) -> web.Application:
+    stub = StubLLM(config)
+    feeds = FeedStub(config)
+    articles = {index: article_html(index) for index in range(config.article_count)}
+    subtitles = {index: subtitles_vtt(index) for index in range(config.article_count)}
+
+    async def article(request: web.Request) -> web.Response:
+        index = int(request.match_info["index"]) % config.article_count
+        return web.Response(text=articles[index], content_type="text/html")
+
+    async def subtitle(request: web.Request) -> web.Response:
+        index = int(request.match_info["index"]) % config.article_count
+        return web.Response(text=subtitles[index], content_type="text/vtt")
+
+    failures = {"fail_hits": 0}
+
+    async def fail(request: web.Request) -> web.Response:
+        failures["fail_hits"] += 1
+        await asyncio.sleep(int(request.query.get("delay", "0")) / 1000)
+        return web.Response(status=int(request.match_info["status"]), text="failure fixture")
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", stub.chat_completions)
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({**stub.stats, **feeds.stats, **failures})
+
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/feeds/{index:\\d+}.xml", feeds.feed)
+    app.router.add_post("/feeds/{index:\\d+}/publish", feeds.publish)
+    app.router.add_get("/articles/{index:\\d+}.html", article)
+    app.router.add_get("/subs/{index:\\d+}.vtt", subtitle)
+    app.router.add_get("/fail/{status:\\d{3}}/{name}", fail)
+    return app
+
+
+def serve(config: Dict[str, Any], ready: Any) -> None:
+    """
+    Child-process entry point: bind to a free port and report it through ``ready``.
+    """
+
+    async def main() -> None:
+        runner = web.AppRunner(build_app(ServerConfig(**config)), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        ready.send(port)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def config_dict(config: ServerConfig) -> Dict[str, Any]:
+    return asdict(config)
+
+
+def start_servers(config: ServerConfig) -> Tuple[multiprocessing.Process, int]:
+    """
+    Start the servers in a spawned child process; returns (process, port).
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=serve, args=(config_dict(config), sender), daemon=True)
+    process.start()
+    if not receiver.poll(30):
+        process.terminate()
+        raise RuntimeError("Stub servers did not start")
+    return process, receiver.recv()
@@ -9,19 +9,35 @@ from typing import Optional
 
 import structlog
 
-from app.bot.main import bot, dp, setup_handlers, setup_middlewares
-from app.core.logger import setup_logging
-from app.database.db import close_db, init_db
+# AICODE-NOTE: Воркеры OCR (forkserver) исполняют этот файл заново как __mp_main__,
+# поэтому бот, aiogram, Tortoise и LLM-стек импортируются только при реальном запуске.
+if __name__ == "__main__":
+    from app.bot.main import bots, dp, setup_handlers, setup_middlewares, shutdown_middlewares
+    from app.core.feeds import digest_sender, feed_poller
+    from app.core.logger import setup_logging
+    from app.core.ocr import ocr
+    from app.core.loop_monitor import loop_monitor
+    from app.core.overload import overload
+    from app.core.warmup import warmup
+    from app.database.analytics import analytics
+    from app.database.db import close_db, init_db
+    from app.database.retention import retention_job
 
 log: Optional[structlog.stdlib.BoundLogger] = None
+warmup_task: Optional[asyncio.Task[None]] = None
 
 
 async def on_startup() -> None:
     """
     Actions to perform on bot startup.
     """
+    loop_monitor.start()
+    overload.start()
+
     log.info("Initializing database...")
     await init_db()
+    analytics.start()
+    retention_job.start()
     log.info("Database initialized")
 
     log.info("Setting up handlers and middlewares...")
@@ -29,12 +45,25 @@ async def on_startup() -> None:
     setup_middlewares()
     log.info("Handlers and middlewares configured")
 
-    bot_info = await bot.get_me()
-    log.info(
-        "Bot started",
-        username=bot_info.username,
-        bot_id=bot_info.id,
-    )
+    # AICODE-NOTE: bot.me() кэширует идентичность бота — хендлеры берут username
+    # из кэша и не делают getMe на каждое сообщение.
+    for tenant, bot in bots.items():
+        bot_info = await bot.me()
+        log.info(
+            "Bot started",
+            tenant=tenant,
+            username=bot_info.username,
+            bot_id=bot_info.id,
+        )
+
+    # Опрос RSS/Atom-подписок и рассылка дайджестов
+    feed_poller.start()
+    digest_sender.start(bots)
+
+    # AICODE-NOTE: Парсеры и LLM SDK импортируются лениво; прогреваем их в фоне,
+    # когда бот уже отвечает на /start.
+    global warmup_task
+    warmup_task = asyncio.create_task(warmup())
 
 
 async def on_shutdown() -> None:
@@ -42,8 +71,19 @@ async def on_shutdown() -> None:
     Actions to perform on bot shutdown.
     """
     log.info("Shutting down...")
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await digest_sender.stop()
+    await feed_poller.stop()
+    await retention_job.stop()
+    await shutdown_middlewares()
+    ocr.close()
+    await overload.stop()
+    await loop_monitor.stop()
+    await analytics.close()
     await close_db()
-    await bot.session.close()
+    for bot in bots.values():
+        await bot.session.close()
     log.info("Shutdown complete")
 
 
@@ -65,9 +105,10 @@ async def main() -> None:
 
     # Start polling
     # AICODE-NOTE: Используем polling для dev-среды. В продакшене рекомендуется webhook.
+    # Один Dispatcher опрашивает всех ботов (тенантов) процесса.
     try:
         await dp.start_polling(
-            bot,
+            *bots.values(),
             allowed_updates=dp.resolve_used_update_types(),
         )
     except asyncio.CancelledError:
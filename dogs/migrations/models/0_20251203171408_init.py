@@ -2,8 +2,37 @@ from tortoise import BaseDBAsyncClient
 
 RUN_IN_TRANSACTION = True
 
+POSTGRES_UPGRADE = """
+        CREATE TABLE IF NOT EXISTS "users" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "telegram_id" BIGINT NOT NULL UNIQUE,
+    "username" VARCHAR(255),
+    "full_name" VARCHAR(255),
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_users_telegra_ab91e9" ON "users" ("telegram_id");
+CREATE TABLE IF NOT EXISTS "summary_requests" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "content_type" VARCHAR(50) NOT NULL,
+    "source_url" TEXT,
+    "status" VARCHAR(50) NOT NULL DEFAULT 'processing',
+    "tokens_used" INT NOT NULL DEFAULT 0,
+    "error_message" TEXT,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "user_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "aerich" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "version" VARCHAR(255) NOT NULL,
+    "app" VARCHAR(100) NOT NULL,
+    "content" JSONB NOT NULL
+);"""
+
 
 async def upgrade(db: BaseDBAsyncClient) -> str:
+    # AICODE-NOTE: Миграции поддерживают оба бэкенда — SQLite и PostgreSQL.
+    if db.capabilities.dialect == "postgres":
+        return POSTGRES_UPGRADE
     return """
         CREATE TABLE IF NOT EXISTS "users" (
     "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL /* Internal identifier */,
@@ -0,0 +1,53 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+POSTGRES_UPGRADE = """
+        CREATE INDEX IF NOT EXISTS "idx_summary_req_user_id_4e0f63" ON "summary_requests" ("user_id", "created_at");
+        CREATE INDEX IF NOT EXISTS "idx_summary_req_created_716049" ON "summary_requests" ("created_at", "status");
+        CREATE INDEX IF NOT EXISTS "idx_users_created_43d91f" ON "users" ("created_at");"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # AICODE-NOTE: Миграции поддерживают оба бэкенда — SQLite и PostgreSQL.
+    if db.capabilities.dialect == "postgres":
+        return POSTGRES_UPGRADE
+    return """
+        CREATE INDEX "idx_summary_req_user_id_4e0f63" ON "summary_requests" ("user_id", "created_at");
+        CREATE INDEX "idx_summary_req_created_716049" ON "summary_requests" ("created_at", "status");
+        CREATE INDEX "idx_users_created_43d91f" ON "users" ("created_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_users_created_43d91f";
+        DROP INDEX IF EXISTS "idx_summary_req_created_716049";
+        DROP INDEX IF EXISTS "idx_summary_req_user_id_4e0f63";"""
+
+
+MODELS_STATE = (
+    "eJztWVtz2jgU/isaP9GZbIaSkGT7tCQhLdsGdsDZ7TTT8QhbGA22RCV5E6bLf6+ObOMbEJ"
+    "MmGdrum31uPvo+Xc6Rv1oh90ggD0dRGGKxGJIvEZHKeoO+WgyHRD9ssDhAFp7PMz0IFB4H"
+    "xkXGto6IjY0Sj6US2IXYExxIokUeka6gc0U5A69rCIQEmQsiCVOU+QijJBRKQqFGh+Fgoa"
+    "grXx1CWI+7Oq62fXSEiFGtcBT3iZoSoePcftZiyjxyTyS83lquIFgRz8Fm4FJhFUlLW91a"
+    "kSTCoR6Ic0afIcJ85kwoCbwCmrGpkTtqMTeyHlNXxhDGM3ZcHkQhy4znCzXlbGVNmUnCJ4"
+    "wI+J6WKREBniwKgoSCFOJ4cJlJPKqcj0cmOAqAFfCOE8hkluP0B7Yz6tqOY1UZuzHRV8iy"
+    "KBxrAEusJHFdzmAC6OylAcSHrH5rvT4+PT47Ojk+0yYm85XkdBlnk2EVOxrE+ra1NHqscG"
+    "xhmMpw1p9TegrEqFUQv5hisR7ysl8JfD2EMvgp1NvQTwUZ/Nka+A78L+JkEWSHGgseqWis"
+    "g2KhZ3egHxS5VwdoQgPyqiYrIb53AsJ8NdWv7eYWCv7uDC/edYaNdtPE5nptx4u/n2haRg"
+    "UsZaxIHgmXOJEIqpzYOtn1nBS9HsVIMtufm5CRyRQFlM1QgwsTAk30AzBRk4MtmNvdjzYE"
+    "CaX8EuSxblx3Pprw4SLRfBj036bmOW4uPgzOy5zEu9kOayTzeLnVYc0Fd4mUgNyOpAyJ1H"
+    "aoISMXIhwgIgQXByiLuCerQ/EZYdLRR8ouh0TJ6+HT4qkoae7IQ98cD4hPUJwygpRRw+Wy"
+    "7tJ4mkMjA9xMBCfUkwD7a06JzTtSxXGfN6UuJGt2INSgExSvXkRlvA72dFcqVlxFXi61Rt"
+    "GQbDjBC54lYrzE9TB92KPTPCmtUZpWjfWgh+oNWLBIJtM2knrX3ZHduf6rwNRlx+6CplVg"
+    "KZU2Tkqb1yoI+qdnv0Pwij4N+l0DtF7GvjBfzOzsTxbkhCPFHcbvHOzlSs9UmuJX4D9XV9"
+    "fcB3MeL7cHPormCRGE6TJBcdgCX7Bghq5kMltbL6eJFMG+4oJQn70nC4N5T2eEdeZrME66"
+    "xJskzI+N9TKdW6k0m7QC3626uvyU01BoAIiKS6fO6KJz2bUM4GPszu6w8JwC8qDhLV6SrG"
+    "yrqrAVliWY6dPHS0YBOedJWNPCp+RsbtxhQN/TrdsaAl/g0GBdsz+v+jzckf8a7bVOnAiG"
+    "A0Q9QEuPak+aa5VQtnaDPqf+5lq16Pg0+/RzXm30LhFlqym6E/q/t1pHR6et5tHJWfv49L"
+    "R91lzRUFVt4+O89xYoKZzE1VoWVo95rhCyuZHL++xzBXuT5Ikaf6QpP6pla7XbNXo2bbWx"
+    "aTO6IvAT/WFnV+QLTvsM/RXcYKSJ7gXeP1Zn8BR70ZD4FECGdwTp/ZLdQaV43VxcZZMl/w"
+    "eidEwlnlfvhyQw0G6uaqv/Pn7O+nb5nFVphwjqTtfVpYlma2WKM5uHStMUxyoM/xeWDwD0"
+    "wnXkv7rbSBZe3YMz57LPv2bqQ/z8ByYsqh0QTsx/QnRfN+tc2WurjegaXakcif/BVRH+cz"
+    "Tob/3HuK4Ioa5C/6GA7tMpUxvtLeACGNvviMvXwaWiAQKcr7vCeskrluU3p7+kJA=="
+)
@@ -0,0 +1,101 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+POSTGRES_UPGRADE = """
+        CREATE TABLE IF NOT EXISTS "request_rollups_hourly" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "bucket" TIMESTAMPTZ NOT NULL,
+    "content_type" VARCHAR(50) NOT NULL,
+    "status" VARCHAR(50) NOT NULL,
+    "model" VARCHAR(100) NOT NULL,
+    "requests" INT NOT NULL,
+    "tokens_used" BIGINT NOT NULL,
+    "latency_count" INT NOT NULL,
+    "latency_sum_ms" BIGINT NOT NULL,
+    "latency_le_1s" INT NOT NULL,
+    "latency_le_2s" INT NOT NULL,
+    "latency_le_5s" INT NOT NULL,
+    "latency_le_10s" INT NOT NULL,
+    "latency_le_30s" INT NOT NULL,
+    "latency_le_60s" INT NOT NULL,
+    "latency_gt_60s" INT NOT NULL,
+    CONSTRAINT "uid_request_rol_bucket_bf87aa" UNIQUE ("bucket", "content_type", "status", "model")
+);
+        ALTER TABLE "summary_requests" ADD "model" VARCHAR(100);
+        ALTER TABLE "summary_requests" ADD "latency_ms" INT;"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # AICODE-NOTE: Миграции поддерживают оба бэкенда — SQLite и PostgreSQL.
+    if db.capabilities.dialect == "postgres":
+        return POSTGRES_UPGRADE
+    return """
+        CREATE TABLE IF NOT EXISTS "request_rollups_hourly" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "bucket" TIMESTAMP NOT NULL /* Start of the hour bucket */,
+    "content_type" VARCHAR(50) NOT NULL /* Content type */,
+    "status" VARCHAR(50) NOT NULL /* Request status */,
+    "model" VARCHAR(100) NOT NULL /* LLM model ('' if unknown) */,
+    "requests" INT NOT NULL /* Number of requests */,
+    "tokens_used" BIGINT NOT NULL /* Sum of tokens used */,
+    "latency_count" INT NOT NULL /* Requests with known latency */,
+    "latency_sum_ms" BIGINT NOT NULL /* Sum of latencies in ms */,
+    "latency_le_1s" INT NOT NULL /* Latency <= 1s */,
+    "latency_le_2s" INT NOT NULL /* Latency <= 2s */,
+    "latency_le_5s" INT NOT NULL /* Latency <= 5s */,
+    "latency_le_10s" INT NOT NULL /* Latency <= 10s */,
+    "latency_le_30s" INT NOT NULL /* Latency <= 30s */,
+    "latency_le_60s" INT NOT NULL /* Latency <= 60s */,
+    "latency_gt_60s" INT NOT NULL /* Latency > 60s */,
+    CONSTRAINT "uid_request_rol_bucket_bf87aa" UNIQUE ("bucket", "content_type", "status", "model")
+) /* Hourly analytics rollup: hour x content_type x status x model. */;
+        ALTER TABLE "summary_requests" ADD "model" VARCHAR(100) /* LLM model used */;
+        ALTER TABLE "summary_requests" ADD "latency_ms" INT /* End-to-end processing time in ms */;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "summary_requests" DROP COLUMN "model";
+        ALTER TABLE "summary_requests" DROP COLUMN "latency_ms";
+        DROP TABLE IF EXISTS "request_rollups_hourly";"""
+
+
+MODELS_STATE = (
+    "eJztm21zmzgQgP+Khi91ZpKM35N27m7OSZzW17zcOO5dp2mHyiAcxiBcIS7x9PzfTxLCCI"
+    "OJcRMbN/eFwdKuWB6t3nbxd831TOT4h330LUA+7XuOE0y0N+C7hqGL2E22wD7Q4GQSV/MC"
+    "CoeO0CChqE6ErK/feQFxpkJn6FMCDcqkLOj4iBWZyDeIPaG2h7nuOyELIIbOlNqGD8JG3g"
+    "DeCHgAhocpwlSn0wliP30KaeCzG2HGIX+G6RnsITYe/Xhzn/Fn3OmdXp91D66uB9034HNQ"
+    "bdYsfm0gcW0q1xa/Nqvivi2ux+JaF9eqIiNKmjVxtYAiaoorVBoSCg1DuTfjJmSjQ1FiKC"
+    "2gsFFLaegYxA9t1JQKpJS3QCcidRJYFiL7DMHcPGlxXVGrKrXyTY4Uy1RUQ8V6Kx8GVNQM"
+    "pTlToR3WvgZfJ1N652Fw4ALmkYcmZG4IfXQonQ8MoTG2bMf5KpwjwDbzTZ16I0TvEGEucn"
+    "urDQNjjCivVt2B/w79gd8Jh9C+fGG3NjbRA/K5Lv85GeuWjRwzMWhskyuJ8rAxVtbD9FwI"
+    "cicd6obnBC6OhcP3mEvbWFg0QhgRSBFvnpKAjxgcOI4catEgCl8rFglNVHRMZMHA4eOOa4"
+    "cGxGWarjP/1m+6A13XUmMy0lDGlSxiuPh4Zqb64u1H3ISDeq151DxutJvHTESYOS85moWP"
+    "jsGEigLP1UCbiXrWhaGEYBxDjfspCfaM8aG2i7LpxloLhE2pdhjdLPKO6OYBjwpi4vHEtj"
+    "5y7YZCQoFnAeal4VwVv8bjHZFDedC77N4MOpd/Cqf2/W+OINgZdHlNXZROF0or7T1e7rGZ"
+    "O5zg542Av3uDd4D/BJ+ur7oCsufTERFPjOUGnzRuEwyop2PvXoemSioqjoqYaNzpi0My2f"
+    "Wnd5Bkd/ui3kLnM1wl6u7T0FgQGbvCWHPhg+4gPKJ37GermtPlf3X6p+86/UqrutCNV7Km"
+    "LqpmCezxzLcq8Fij1KjlPgbE5m4fdri4FGA9V9gcak0rCPri4jLcRoHKq1fAtkCAx2yQ47"
+    "11mNeqq0BnUkupi7okdrlPzfDypUu1qvL4gv1U7KsF0V8F7hARvnyo9m5qAY8BU2+MsK8H"
+    "PsrYDp3Yo6WYFxTLS/omcMUqLewFkb0rk35drzcaR/Vqo33cah4dtY6rc+Tpqjz2J723HH"
+    "/C99P94TBa2Jgy0AHO2Ect7Y6UXnk7RE7vPri36R0QEw6Q5m9nDETs/MDV3YypJm8YpHXL"
+    "C16OhNBkG/nAxsAtNu9saTQ4SK8VWQNSeuXtlIvQVPDLr6C2pTVAoVVfk3J9dyjXt0+5tS"
+    "bl1u5Qbm2fcq267pRR3R3O0tatgm6sC7qxQ6AbJQDdXhd0e4dAt7cNekTXBB0rlh/0b5vl"
+    "zKPw1lgJGfMCHve/h8TUUzVe3Vsmm65y6+5iCcRwJIDxN+LGyQwZ2wG7kEzlCUTLyKEtSO"
+    "znJdH8UFZXT/CPp88uRcCFoAlBPsKUkQcQyKaiYACozJM8e+mM2VotZKRVFjIlt5pBEHdP"
+    "HVIls8KkbjV2bCZ6mARRhL68iOSK9kG0PieLRehmk3PU8nzLiwu9g8rUC2gwZI1CwrzbYT"
+    "cUPdB9YNkOWitw+QyReS8gBtIDkhExHjBjl0TnE1pr9Yj09mdPfQlLgWPjMah4RDQBLHbD"
+    "e2LFPshLgHU/DhK5r4h15bLzcS+R/7q4vnobiSt9c3pxfbKT2RJtQjwD+T4nV7BT+shncq"
+    "DiBwZvYR8gQjyyD+IWSzI6ckPOux9vjiP7SsgZVAzPX3VoPPXGVjiC7jInYLuiIjNSSrHM"
+    "k1KXGytmIFCxreg7IdsPx0FJZ6UNpxU31BVxXrFAuuX5k4nROS0rxv/o4e4HgvubGgDYPK"
+    "DeAcKmMucD/tXMGoH+J5t8kmeKIl8FJTV36Mug6PuFyKwVoLNXNa+xM5XesiNfB0nHzv04"
+    "SDk5rjjiFI3NrfJrdbOFCJsbEFvo+US3wSNhKpyS5J2Gfe4RZI/wezQVzHvMIsgsz2As4y"
+    "AfZDO7zXoW+VZUGjstgffzuIXqcgwFA4BouA53bk47Z11ttp1wleiEjCBV1DnLQ1P8hX4k"
+    "HjVgCEYEuoL1ihGotM7jMaeXEUBihiOCoQNsk9Nib1WS8BGVXZY5Qed+/ZNUfJp5+jmDd7"
+    "0zvgmKXLQQ/Q1/88BHj7gvcCpQdcp8MPgg7QSV3yOT1wpK1FutFY4HTGrp8UDUJcFb7MF6"
+    "UfIJpTKjP+cxusjQUvDerZPBU8xFfTSyOWT+G3DzXuTpoEAucJUPgU+k5vn7PnIE2uW72n"
+    "R27+fc386ec1faQcQ27rL2pbImd2cKY5nHtqbL/9X0/8ayXH/7+oedNuTAW3XhVFTKnHxc"
+    "HfHzL5h8UBUgLMV/QrrPEh2WKfE04T9urq9ys+hZmxDboOBf4NhlWmVWpp0Dl8PIz4IsJj"
+    "wWNg28gZNtfxE0+w9RBh4r"
+)
@@ -0,0 +1,60 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+POSTGRES_UPGRADE = """
+        ALTER TABLE "summary_requests" ADD "model_tier" VARCHAR(16);"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # AICODE-NOTE: Миграции поддерживают оба бэкенда — SQLite и PostgreSQL.
+    if db.capabilities.dialect == "postgres":
+        return POSTGRES_UPGRADE
+    return """
+        ALTER TABLE "summary_requests" ADD "model_tier" VARCHAR(16) /* Routing tier (fast, standard, long) */;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "summary_requests" DROP COLUMN "model_tier";"""
+
+
+MODELS_STATE = (
+    "eJztW21v2zYQ/iuEvtQBksDvSYttmJM4rde8DI67FU0LlZYoR4hEuRS1xOjy30dSkkW9WJ"
+    "HUxJabfRFo8o46PXdHHu/o74rt6Mhy98fom4dcOnYsy5srb8B3BUMbsUY2wS5Q4HweDfMO"
+    "CqeW4CA+qUoEraveOB6xFoJn6lICNcqoDGi5iHXpyNWIOaemgznvO0ELIIbWgpqaC/xJ3g"
+    "A+CbgHmoMpwlSlizliP10KqeeyhhBjn79DdzT2EhPPfny6z/gzHoyOL0+GexeXk+Eb8Nlr"
+    "dlsGf3aQeHalZ48/u03R7ovnoXi2xbMp0Yiebks8DSCR6uIJpYkEQ0eT2no0RTDpVPRo0g"
+    "zIn9SQJjoE0Us7LWkASf09MAiROvIMA5FdBsFSvEDitsTWlEaDLzmQJJOhmkrSG/lgQIlN"
+    "k6bTJbT90dfg63xBbxwM9mzALHJfh8wMoYv2A+MDU6jdGqZlfRXG4WGT2aZKnRmiN4gwE7"
+    "m+VqaedosoH5bNgf/27YG3hEEoX76wpol1dI9czst/zm9Vw0SWHnMaU+dMot+fjPWNMD0V"
+    "hNxIp6rmWJ6NI2L/O5bUJhYSzRBGBFLEp6fE4x6DPcsKXC10Iv+zIhJfRIlHRwb0LO53nN"
+    "sXIOpTVJXZt3o1nKiqkvLJkEPyq6CLwcX9mYnqiq+fcRH22q3uQfew0+8eMhIh5rLn4MF/"
+    "dQSMzyjguZgoD2KcqdCnEBhHoEZ6igN7wvChpo2y0Y24EgjrAdt+2EjiHaKbB3jYESEeLW"
+    "zVIVeuKCQUOAZgVuqvVdFnPK6IHJQno/Ph1WRw/qcwatf9ZgkEB5MhH2mL3kWit9Hf4f0O"
+    "W7n9BX45Cfh7NHkH+E/w6fJiKEB2XDoj4o0R3eSTwmWCHnVU7NypUJeRCrvDLkYaKT3pkn"
+    "HVH99Akq32JF9C+QyuGqn72BcWhMIW8DUb3qsWwjN6w372mjkq/2swPn43GDd6zYQaL4KR"
+    "thh6iMEerXxFAY84ag11EMeASNzNg+1vLiWwXjKsD2pFKQn02dm5H0aBxqtXwDSAh2+Zk+"
+    "OdKpi3mkVAZ1QrURdjcdiDODXDyldu1TLL4xv2U2HfLAn9hWdPEeHbhyzvujbwCGDq3CLs"
+    "qp6LMsKhI3O2EuYEY32RvvJssUsLeUEob2GkX7fbnc5Bu9npH/a6Bwe9w+YS8vRQHvZHo7"
+    "cc/pjtp/VhMbSwtmBAezgjjlqpjhRffRUSLO8uuDPpDRALDgjE34wPhNi5nq3aGUtNnhuk"
+    "eesLfOAJvsgmcoGJgV1u3dmQN1hIbZXZA1J89VXKmS8q+OVX0NrQHiCh1a6Icnt7UG5vHu"
+    "VeRZR724Nyb/Mot5pVl4zm9uAcyLpRoDtVge5sEdCdGgDdrwp0f4uA7m8a6BmtCHTEWH+g"
+    "f1svzjwLb9xKKWPewfP+d5DoamrEaTuraNNDdttO9kAMZwIw/kVcuKBCxiJgG5JFcAJRMm"
+    "poCYrdvCKa69Oq8gn+8fLZuUi4EDQnyEWYMuQBBMFUYTIANJZFnp10xazSDBlllUSl5FrR"
+    "COLmqUIqVVYY1bXCjs1E9YsgEtGXF1FcUT6I2ZfIYpG6Wecatbre8uJS76CxcDzqTdmkkD"
+    "DrtliDonu6CwzTQpUSl8+QmXc8oiHVIxkZ4wkTdkV2PsZVSSOBtT976UtICiwT34KGQ8QU"
+    "wGANromCOsgrgA0/TmK1rxDrxvng406s/nV2efE2JJd0c3x2ebSV1RJlThwNuS5HrqRSxs"
+    "hldKDhehqfYRcgQhyyC6IZa+IduSnn7c83R5l9KeUMGprjFnWNpw5shSGoNjMCFhWVWZFS"
+    "jHVelIZcWLECgYZphPeETNf3g5quSmsuK65JFVFdsUS55fmLiUIklZp+8FYK8SVXnWEfs8"
+    "iIHwa4rKBhQJdFRcwNsM7OTbvAciruAK1+EVUkL6BImugnFREemLOKLY+esn+gyrKulQjr"
+    "e9TZQ1iXNl/Ary9VqLg82S4QP9yVuZ4V59yiK1rhRZJQrAKgs0/VL7G1CKxlS65pBYade0"
+    "tLOsIX9DiJY33hViU1G4iwtQGxiIvvOGs8m6fyWnG802CfOgSZM/weLQTmI8wXaC0ruAoS"
+    "Uh+CabYb64fQtsLeyGgJvFsmkGSTY1AwABD1t+fB1fHgZKg8bCZvKJSQkS0MlbM6R8g/6E"
+    "cSgxMGwYxAW2BdMBWY5nk8+fcyMnlMcEQwtICpc7QMsy55PBqoLHOBzr2GFWd8mnX6ObOo"
+    "oxMeBIUmWgr9NV8+4d4j2iUOCzJPnY8KHwI5QeP3UORKZ4N2r1fgcMCoVp4OxFgceIO9WC"
+    "2LfIypztCf8mRpKGgt8N6uk8FTrEVjNDM5yPw34OK9yNNBiaJskRvZRwHn6fsxsgS0q6Pa"
+    "dJn154xvH54zKh0gYmo3WXFpMJIbmcKI5rHQdPXfy/4PLOv1/7t/2GkjcLyiG6fEUucqcH"
+    "GIn3/D5E5VAuGA/CdE91nS9MHdhDTCf1xdXuReZ8gKQkyNgn+BZdZplymMdg64HIz8clSy"
+    "8pQIGvgER5u+mvXwH5vnnDQ="
+)
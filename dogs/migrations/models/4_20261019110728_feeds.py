@@ -0,0 +1,159 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+POSTGRES_UPGRADE = """
+        CREATE TABLE IF NOT EXISTS "feeds" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "url" VARCHAR(1024) NOT NULL UNIQUE,
+    "title" VARCHAR(255) NOT NULL,
+    "etag" VARCHAR(255),
+    "last_modified" VARCHAR(64),
+    "poll_interval" INT NOT NULL,
+    "next_poll_at" TIMESTAMPTZ NOT NULL,
+    "last_changed_at" TIMESTAMPTZ,
+    "failures" INT NOT NULL,
+    "subscribers" INT NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_feeds_next_po_a0d6b4" ON "feeds" ("next_poll_at");
+        CREATE TABLE IF NOT EXISTS "feed_entries" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "guid" VARCHAR(512) NOT NULL,
+    "url" TEXT NOT NULL,
+    "title" VARCHAR(512) NOT NULL,
+    "status" VARCHAR(20) NOT NULL,
+    "summary" TEXT,
+    "tokens_used" INT NOT NULL,
+    "published_at" TIMESTAMPTZ,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "feed_id" INT NOT NULL REFERENCES "feeds" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_feed_entrie_feed_id_cd2665" UNIQUE ("feed_id", "guid")
+);
+CREATE INDEX IF NOT EXISTS "idx_feed_entrie_feed_id_ae575e" ON "feed_entries" ("feed_id", "status");
+        CREATE TABLE IF NOT EXISTS "feed_subscriptions" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "schedule" VARCHAR(16) NOT NULL,
+    "last_entry_id" INT NOT NULL,
+    "next_digest_at" TIMESTAMPTZ NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "feed_id" INT NOT NULL REFERENCES "feeds" ("id") ON DELETE CASCADE,
+    "user_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_feed_subscr_user_id_d8c145" UNIQUE ("user_id", "feed_id")
+);
+CREATE INDEX IF NOT EXISTS "idx_feed_subscr_next_di_4f6843" ON "feed_subscriptions" ("next_digest_at");"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # AICODE-NOTE: Миграции поддерживают оба бэкенда — SQLite и PostgreSQL.
+    if db.capabilities.dialect == "postgres":
+        return POSTGRES_UPGRADE
+    return """
+        CREATE TABLE IF NOT EXISTS "feeds" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "url" VARCHAR(1024) NOT NULL UNIQUE /* Feed URL */,
+    "title" VARCHAR(255) NOT NULL /* Feed title */,
+    "etag" VARCHAR(255) /* ETag of the last 200 response */,
+    "last_modified" VARCHAR(64) /* Last-Modified of the last 200 response */,
+    "poll_interval" INT NOT NULL /* Current poll interval in seconds */,
+    "next_poll_at" TIMESTAMP NOT NULL /* When to poll next */,
+    "last_changed_at" TIMESTAMP /* When new entries last appeared */,
+    "failures" INT NOT NULL /* Consecutive failed polls */,
+    "subscribers" INT NOT NULL /* Number of subscriptions */,
+    "created_at" TIMESTAMP NOT NULL /* When the feed was added */
+) /* RSS\/Atom feed, polled once for all of its subscribers. */;
+CREATE INDEX IF NOT EXISTS "idx_feeds_next_po_a0d6b4" ON "feeds" ("next_poll_at");
+        CREATE TABLE IF NOT EXISTS "feed_entries" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "guid" VARCHAR(512) NOT NULL /* Entry guid\/id (or link) */,
+    "url" TEXT NOT NULL /* Entry link */,
+    "title" VARCHAR(512) NOT NULL /* Entry title */,
+    "status" VARCHAR(20) NOT NULL /* pending, summarized, error, skipped (existed before subscription) */,
+    "summary" TEXT /* LLM summary */,
+    "tokens_used" INT NOT NULL /* Number of tokens used (cost) */,
+    "published_at" TIMESTAMP /* Publication time from the feed */,
+    "created_at" TIMESTAMP NOT NULL /* When the entry was discovered */,
+    "feed_id" INT NOT NULL REFERENCES "feeds" ("id") ON DELETE CASCADE /* Reference to feed */,
+    CONSTRAINT "uid_feed_entrie_feed_id_cd2665" UNIQUE ("feed_id", "guid")
+) /* Feed entry, fetched and summarized once regardless of the number of subscribers. */;
+CREATE INDEX IF NOT EXISTS "idx_feed_entrie_feed_id_ae575e" ON "feed_entries" ("feed_id", "status");
+        CREATE TABLE IF NOT EXISTS "feed_subscriptions" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "schedule" VARCHAR(16) NOT NULL /* Digest schedule (hourly, daily) */,
+    "last_entry_id" INT NOT NULL /* Last FeedEntry id delivered in a digest */,
+    "next_digest_at" TIMESTAMP NOT NULL /* When the next digest is due */,
+    "created_at" TIMESTAMP NOT NULL /* Subscription time */,
+    "feed_id" INT NOT NULL REFERENCES "feeds" ("id") ON DELETE CASCADE /* Reference to feed */,
+    "user_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE /* Reference to user */,
+    CONSTRAINT "uid_feed_subscr_user_id_d8c145" UNIQUE ("user_id", "feed_id")
+) /* User subscription to a feed with a digest schedule. */;
+CREATE INDEX IF NOT EXISTS "idx_feed_subscr_next_di_4f6843" ON "feed_subscriptions" ("next_digest_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "feed_subscriptions";
+        DROP TABLE IF EXISTS "feeds";
+        DROP TABLE IF EXISTS "feed_entries";"""
+
+
+MODELS_STATE = (
+    "eJztXWtz2zYW/SsYfak8Izt628ns7qzsKI1bPzqSsu006bAQCUoYU6RKgnG03fz3xYsi+J"
+    "BM0npQtr7IEIgLXhwAFxcHF/LflZljIMs7+4CQUXkH/q7YcIZoIpJfAxU4n4e5LIPAscUL"
+    "mrQEz4Fjj7hQJzTThJaHaJaBPN3Fc4IdmxUdDIdvesSZASZTA3PHspABHFtHwHRcAC0LOC"
+    "bAxAOeP2aSY+R6Z6xuw9Fp5dieFK/mi/3F7l1f3b/vn97dj/rvwBe/3m5csM+WwT7bTZ7u"
+    "8HSdp0WOSI+5QAvxT1MpxHPaDVEUKBJtJW0qb7hQ6hZvHvP0W1BVqtLPAAX9THdcdMYxPu"
+    "MNdU/e0ZaExYQ+UNGHf7bfKi/vhC8XUm2zBkI5WUdLVVo8bvI/7baitkh3QNgqCYCptGoc"
+    "5rRR8uVC+DwOj3iDbNeF1PACJJrWCGvsyDQIwaS6t+rtNzzZCJvfOgdKK8S7deWxkUiLkm"
+    "/5+PNt/JePNOJMEJkil47Cz3/QbGwb6Bvygq/zB83EyIpOJMznD8/XyGLO865t8oEXZEN7"
+    "rOmO5c/ssPB8QaaOvSyNbcJyJ8hGLiR8nhLXZ/PL9i1LzsNgyglNwyJCRUXGQCb0LTZLmb"
+    "RQIMyraBqdHdqwP9K0SmIGBxLKbJRZumOz2U9V9XjrJ0yF02ajfd6+aHXbtDcrXM1lzvl3"
+    "8eoQGCHI4bkbVb7z55BAUYJjHILqu1YS1aspdNNhlcVjuFKF47gGKO4a2Aqzs+DT4CZu7F"
+    "bAO4PfNAvZEzKlXxv1ZnsNmv/pDa4+9gZVVuyE1e9QKy1s95181pQPGeghyAQTWiwHzEuB"
+    "zQAdZIRIh+vKEtZKEaCXiuaFutnpZECalloJNH8WxRkROMkDc1C+EMpysOYCucB47o/ghK"
+    "3C1FoCC3oENOt14CJvTtEtD/JMM436NJjWmWKmV3dBQrDMfXFDlT29lcputFO6WexOd7XV"
+    "6SZsDvNxNPoy5H6FKSZ+5cKZkHt6Dd2UCSrQI1e+6yKbcNcVBFrTBPAQxVu407taZEPsbf"
+    "SNaBxISJLQv6ewETxD6fjHZWPwG1L4LEhspjM2sfL+OkU2II7oC9aMbOCvQXZ0fdsfjnq3"
+    "v7CaZp73l8Xx64367EmT5y5iudVubJIsKwG/Xo8+AvYV/H5/1+fgOh6ZuPyNYbnR7xWmE/"
+    "SJo9nOowYNFdcgO8hKmkF9Cu0JMgr0fYr4Brp/R8aRd7+NHgGdjy5GnjCMdOeFoCtM++sa"
+    "CybEls/qy257VZHdmd16XpvLFjndJ/grAkxjuhSyKb8nW6swEzmQjkmVF+w7f0aVZL6GVJ"
+    "k/2RPWuosYHAUsW1RyN2va5qwac/MYcwQeoQeoCchqziq01ca9bS2kFT4Q8yYXjIR1Y8yM"
+    "+aDQCCxjDPWHR+gaWuSJsicTq0FywFxKwQ8/D5AFOd7JoaGQp31a0aJEI2OATER9Tx0xn8"
+    "dEOZe4MDccGwmjFs714tANlapeMHpsKDpNZ9XgTD6aNWfxHGjDCW8hezd7U2L0reD1l0Nz"
+    "PbmvKXPhaY6f8ytMYlGjABF9Sr9C26DrwGwGXfzfgKl30YS20EKeF+xI7fiakc7+b+MFKf"
+    "Tu50rQvRMfG5U/YnSveKwJvtYjkPieKHPkgHfFAfN+ScC6mrMJyu+OnCzCm7GBDZiqb7AB"
+    "qo4LLGw/nBQhZzqNZgZ2hpZaSc/wZ1FfKpV4H9Fd8w6I961CzmB+/m6v/9so4gkFWFZve7"
+    "+dRLyhm/u7H4PiCvZXN/eXr4GGF6AX5uG3MralGc+BdCixQ6jnyDYYUjkRl2I1ZaGsAeS6"
+    "jkuzHvB8ThfOKvqGPaouGCPTcVFk81bIBjXrWUj7+mrOvp7oJK79Io8RUkRKTdPf3AJF1R"
+    "IaIucB2Z7me2lnJSvdmZjUIXAWQmXAVAZVne5As479DRMXc39sYW9aiLqIyx4OI/sL01zn"
+    "+0PANAOm68yWZMbrY2RfM33F93mcvzKwpztfUWZO/oWRWBGKPtx5ZmXoQ4lSn4sWpFc2YX"
+    "cTLGEU7yTYH6iDhCf2z2jBMb+mGkGq+Xo28PCxXkVl0WwXPi65D3XIUSgoAIgIZ7o3vOq9"
+    "71e+r2Zht0mKDRAF1SMDx7L8eSWFGIsWqK0jx1xRVHN5WU+bOnS7u8hGk33kZQFV01oQrH"
+    "tAVPIOsErAN0DxJdT48TFEv4qNBk1wNZKk2POqSw+NVYI7ZdRnOxEg200EtK6MOFXDL41E"
+    "0GonPSCzHYnA5Tm6UgNSwlBlRTJetBHGf6aE6XZAL0Dq0jfpPKiJmFo1AlW+Gql1rw9fRa"
+    "GWUntzPRhq9K2uVGcoaCMZGvynMCrgdMbDghkrNoYeOpODD7DpYWLL+nM1oTn29QfEzb06"
+    "HBQCM5gmCbbzSGzuktgM+ymPsxdKHZCjNyTQJQE/z21V2IxX5uXHpmRWCiouV2qq9UooCw"
+    "Jlc9N+Weikzmo6qZOkkw6C8yvk3nHnBITq7h9ssbjkwHopUGImm9F2XE9Q/eEHgE3g2w90"
+    "khfjSxv1LKDTUmsC+ROwSz81T6CRKnIIjJ2q7+55urXE6CWeHD43OvRnMWI0F9Jvm81W67"
+    "xZb3UvOu3z885FfQl58tE67C+vf2TwR8Z+sj8sipatLyjQvp3iR63sjoRceTtEmncPPGIy"
+    "BdzgAKn+fuZAgJ3nz7RZWvDPmmmQlC0v8HImCJVZvDC2wSyf3dnTbLCQ1sizBiTkytspN0"
+    "JV8I9/gsae1gAFrWZBlJuHg3Jz/yh3CqLcORyUO/tHuVEvajLqh4Oz1HWvQLeKAt06IKBb"
+    "JQC6WxTo7gEB3d030BNSEOhQsPxA/2u3OOe4yLDNI7RIaH7KCVo8dP+J6PLEpYGnD88+eX"
+    "TXr8qxI0wo77qw/RAEBp5w9ouFh/sWSp6YFawj9WCF7oc5H8VPUY9nJ/s8Owk6Kxejq8js"
+    "kGg0IBanxXlMz/vomARVcehcA7y2YpxjNwvlGD8bURjHburPKvDQnXxhKgm5Mi8BtBeWl2"
+    "gANgC1bpjHJzFGIDAe+1mE+WV8oUDRq/wR6UO7zM/u+tBGBAYce8DwM543vagjxdcXODiM"
+    "LOhSt2Ow4DFYcHvGljl/+QBWJA4H4MDH3Xs05tLZfl405idZzWFjnTUaUxly6dGYcZOxAY"
+    "SP8a4RhPe1WecXiuRxYSV1ux4pUVu3YZfXkzT1uP3p7fotj45w0ZyuatS7p2hT/1hWFZzc"
+    "g+oyIvMkuVkvVMPTv9n5OeboBPe4a+CzOmOUQq/jinflE699iay4OL/L5XX1Bv/VxcmB6s"
+    "LxiT+mlUKXjm6LJgjd3dSAiS1U7Gb45sPoHN/VkZbzdnhUqsx3M4dcU35JnF/KZ1XwH5tm"
+    "PZGxD3Z9XfMwQhsrc9fRkecVuNE8QB4tB6qer7MalreZwxpLMjuOF2d3vCfjA0Gb0UFAva"
+    "I8FikhWGaj1GfKcgsEqtgMLvVgT8yDklqlHccA7/DuvggCzhEbuf3IX66SRnDajvkJxJdS"
+    "ZYZ9QD0jthlguoKqCT3qFbFtqUH3TTVgOQVXgG2ciIjT7bTIyCePxJ8RErkrS2Qbp8Q5Rb"
+    "ahLL7i8n7+8Mjj7z4+/9bHkfo+MrPbmWBHZnbHzOx+eEPeCSlsYdA5qzlC1qDnEIMjCsHE"
+    "hTOOdUYqMClz/Ic9AuJr9s8FbPbPBQyGlonLwuMR2WWpBnrtnamo4Gbs9DZZ1Ov3zAkKhm"
+    "gu9Hd8U4TNHp7OsVlQZcq8Vfgk9QTVfwcqF/tFu238HxqTvljLi3xEqMzQf2BkaaBoKfA+"
+    "rJ3BJmzRAE0wA5kHxjD1XuXuIEcE9av9VfPnu7gZL5/nAy5+SP1CodumT99DLtanlRSvXj"
+    "5Z69fDsMxTjv3qaPCjW16ucPmvdK8mJ15Wt0MRKfMZenaIt+9usEmVA2FZ/AWiu5VDDhnZ"
+    "kUT4p+H93dpgkDQXDusE/A9YuEyrTGa014DLwFh/mBc/t4u5XKyCy33fQvv+f0D2t7k="
+)
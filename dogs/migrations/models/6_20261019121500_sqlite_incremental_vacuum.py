@@ -0,0 +1,91 @@
+from tortoise import BaseDBAsyncClient
+
+# VACUUM нельзя выполнить внутри транзакции
+RUN_IN_TRANSACTION = False
+
+# AICODE-NOTE: PRAGMA incremental_vacuum в задаче retention освобождает место только
+# при auto_vacuum=INCREMENTAL. Режим существующей базы меняется лишь полным VACUUM,
+# поэтому миграция делает его один раз (на большой базе это займёт время и
+# потребует свободного места размером с файл БД). В PostgreSQL делать нечего.
+SQLITE_UPGRADE = """
+        PRAGMA auto_vacuum = INCREMENTAL;
+        VACUUM;"""
+
+SQLITE_DOWNGRADE = """
+        PRAGMA auto_vacuum = NONE;
+        VACUUM;"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "postgres":
+        return ""
+    return SQLITE_UPGRADE
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "postgres":
+        return ""
+    return SQLITE_DOWNGRADE
+
+
+MODELS_STATE = (
+    "eJztXWtz2zYW/SsYfak8Izt628ns7qzsOI1bPzqSsu006bAQCUoYU6RKgrG13fz3xYsi+J"
+    "BM0npQkb7YEIgLXhwAFxcHF9LflaljIMs7+4CQUXkH/q7YcIpoIpJfAxU4m4W5LIPAkcUL"
+    "mrQEz4Ejj7hQJzTThJaHaJaBPN3FM4IdmxXtDwZvesSZAiZTAzPHspABHFtHwHRcAC0LOC"
+    "bAxAOeP2KSI+R6Z6xuw9Fp5dgeF6/mi/3F7t1cPby/Pr1/GF6/A1/8ertxwf62DPa33eTp"
+    "Dk/XeVrkiPSIC7QQ/2sqhXhOuyGKAkWiraRN5Q0XSt3izSOefguqSlX6GaCgn+mOi844xm"
+    "e8oe7JO9qSsJjQByr68L/tt8rLO+HLhVTbrIFQTtbRUpUWj5v8X7utqC3SHRC2SgJgKq0a"
+    "hTltlHy5ED6PwyPeINt1ITW8AImmNcIaOzINQjCp7q16+w1PNsLmt86B0grxbl15bCTSou"
+    "RbPv58G//lI404Y0QmyKWj8PMfNBvbBnpGXvBx9qiZGFnRiYT5/OH5GpnPeN6NTT7wgmxo"
+    "jzTdsfypHRaezcnEsRelsU1Y7hjZyIWEz1Pi+mx+2b5lyXkYTDmhaVhEqKjIGMiEvsVmKZ"
+    "MWCoR5FU2js0MbXA81rZKYwYGEMhtllu7YbPZTVT3e+jFT4bTZaJ+3L1rdNu3NCldzkXP+"
+    "Tbw6BEYIcnjuh5Vv/DkkUJTgGIeg+q6VRPVqAt10WGXxGK5U4TiuAYrbBrbC7Cz41L+NG7"
+    "sl8E7hs2Yhe0wm9GOj3myvQPM/vf7Vx16/yoqdsPodaqWF7b6Xz5ryIQM9BJlgQovlgHkh"
+    "sB6gg4wQ6XBdWcBaKQL0QtG8UDc7nQxI01JLgebPojgjAsd5YA7KF0JZDtZcIBcYz9dDOG"
+    "arMLWWwIIeAc16HbjIm1F0y4M800yjPg2mdaaY6eVdkBAsc1/cUmVP76Sya+2Ubha7011u"
+    "dboJm8N8HI2+DLlfYYqJX7pwJuReXkPXZYIK9MiV77rIJtx1BYHWNAE8RPEW7vS2FtkQex"
+    "s9E40DCUkS+vcUNoKnKB3/uGwMfkMKnwWJ9XTGOlbeXyfIBsQRfcGakQ38FcgOb+6uB8Pe"
+    "3S+spqnn/WVx/HrDa/akyXPnsdxqNzZJFpWAX2+GHwH7CH5/uL/m4DoeGbv8jWG54e8Vph"
+    "P0iaPZzpMGDRXXIDvISppBfQLtMTIK9H2K+Bq6f0vGkXe/jZ4AnY8uRp4wjHTnhaArTPth"
+    "jQUTYstn9WW3varI9sxuPa/NZYuc7hP8FQGmMV0K2ZTfka1VmIkcSMekygv2vT+lSjJfQ6"
+    "rMn+wIa91FDI4Cli0quZ01bX1Wjbl5jDkCT9AD1ARkNWcV2mrjwbbm0grviXmTC0bCujFm"
+    "xnxUaASWMYL64xN0DS3yRNmTidUgOWAupeCHn/vIghzv5NBQyNNrWtG8RCOjj0xEfU8dMZ"
+    "/HRDmXuDA3HBsJoxbO9eLQDZSqvmP02FB0ms6ywZl8NG1O4znQhmPeQvZu9qbE6FvC6y+G"
+    "5mpyX1PmwsscP+dXmMS8RgEi+oR+hLZB14HpFLr4vwFT76IxbaGFPC/YkdrxNSOd/d/EC1"
+    "Lo3c+VoHvHPjYqf8ToXvFYE3ytRyDxPVHmyAFviwPm/ZKAdTlnE5TfHjlZhDdjAxswVd9g"
+    "A1QdF1jYfjwpQs50Gs0M7AwttZSe4c+ivlQq8T6ku+YtEO8bhZzB/Prd3vVvw4gnFGBZve"
+    "v9dhLxhm4f7n8MiivYX90+XB4CDS9AL8zDb2RsSzOeA+lQYotQz5BtMKRyIi7FaspCWQPI"
+    "dR2XZj3i2YwunFX0jD2qLhgh03FRZPNWyAY161lI+/pyzr6e6CSu/TyPEVJESk3T394BRd"
+    "USGiLnEdme5ntpZyVL3ZmY1D5wFkJlwFQGVZ3uQLOO/TUTFzN/ZGFvUoi6iMvuDyP7C9Nc"
+    "5/tDwDQDputMF2TG4TGyh0xf8X0e568M7OnOV5SZk//OSKwIRR/uPLMy9KFEqc9FC9Ir67"
+    "C7CZYwincS7A/UQcJj+2c055jfUI0g1Xw1G7j/WC+jsmi2C58W3Ic65CgUFABEhDPdG1z1"
+    "3l9Xvi1nYTdJivURBdUjfcey/FklhRiLFqitIsdcUVRzeVlPmzh0uzvPRpN95GUBVdOaE6"
+    "x7QFTyDrBKwDOg+BJq/PgYoh/FRoMmuBpJUux11aWHxirBnTLqs50IkO0mAlqXRpyq4ZdG"
+    "Imi1kx6Q2Y5E4PIcXakBKWGosiIZL9oI4z9TwnQ7oBcgdembdB7UREytGoEqX43UuleHr6"
+    "JQS6m9uRoMNfpWV6ozFLSRDA3+UxgVcDrlYcGMFRtBD53JwQfY9DCxZf25nNAc+foj4uZe"
+    "HQ4KgRlMkwTbeSQ2t0lshv2Ux9kLpfbI0RsQ6JKAn+e2KmzGgXn5sSmZlYKKy5Waar0Syo"
+    "JA2dy0XxY6qbOcTuok6aS94PwKuXfcOQGhursHWywuObBeCJSYyWa0HdcTVH/4AWAT+PYj"
+    "neTF+NJGPQvotNSKQP4E7NJPzRNopIrsA2On6rt9nm4lMXqJx/vPjQ78aYwYzYX022az1T"
+    "pv1lvdi077/LxzUV9Anny0CvvLmx8Z/JGxn+wPi6Jl63MKtG+n+FFLuyMhV94OkebdA0+Y"
+    "TAA3OECqv5s5EGDn+VNtmhb8s2IaJGXLC7ycCUJlFi+MbTDNZ3d2NBsspDXyrAEJufJ2yq"
+    "1QFfzjn6CxozVAQatZEOXm/qDc3D3KnYIod/YH5c7uUW7Ui5qM+v7gLHXdKdCtokC39gjo"
+    "VgmA7hYFurtHQHd3DfSYFAQ6FCw/0P/aLs45LjJs8ggtEpqfcoIWD91/Ibo8cWng5cOzTx"
+    "7d9aty7AgTyrsubD8EgYHHnP1i4eG+hZInZgXrSD1YofthzkcFp6h0dEA6Wo+nKLs8RQm6"
+    "LRe3q8hskXI0IBbnxnmM0Pvo6ARVcfxcA7y2YuxjNwv5GD8lUbjHbuoXLPAgnnwBKwm5Mi"
+    "8GtBcW12kANgC1c5hHKjFuIDAju1mO+bV8oUDRS/0R6X271s9u/dBGBKYce8DwM548fU+H"
+    "i3JBymEJQ4lt2kGZzNnVlw4BVaHwCe1ySIIZ6PEBkGv+RexhK8slg9byOwatxBWDA4zlHE"
+    "R8LKnbMX7zGL+5uVWP+eP5AFYk9gfgYNux8wDZxf7ndQGyn2Q1+4111gBZZcilB8jGTcYa"
+    "ED6GIEcQ3hV/wu94yRPcSiqDEilRW8WhyBtjmhoB8TKDcscDVlw0o6sa3WZRtOlGRVYVBF"
+    "OA6iJI9iTJnxSq4eWvUf0cc3SCq/U18FmdMUqhw7h1X/nEa18gK77LYJvL63Km5eBCF0F1"
+    "7vjEH9FKoUtHt0UThG4za8DEFip2WX/9kY2O7+pIy3lhPypV5uuyA64pv7fPvyeBVcG//5"
+    "v1RMY+2PYN2v2INq3MXEdHnlfgknkfebQcqHq+zmpYXDAPayzJ7DjeZd7ynowPBG1KBwH1"
+    "ivJYpIRgmY3SNVOWWyBQxWZwzwp7Yh6U1CptOSx7i1+nIOKyc4Srbj4Ym6ukEZy2Y34B8Y"
+    "VUmWHvU8+IbQaYrqBqQo96RWxbatB9Uw1YTsEVYBNHUyLgIC1Y9cUohVdEqW7LEtnGKXFO"
+    "kW0oi6/4PoX8Eavri5Q/sIMIumP9yn5vYLLYuR3PIXZGNomd8/EI4siQb8bQHRnyLTPku+"
+    "FveSeksLZB5yznalmDXkPQDikEYxdOOdYZKdmkzPG3rATEN+x3N2z2uxsGQ8vEZeFTieyy"
+    "VAO98jphVHA9dnqTbPbNe+aMBkM0F/pbvkTFZg9P53BdVZkyb9k+ST1B9d+BysW+7HETP9"
+    "Fk0hdreZGPCJUZ+g+MtA4ULQXe+7UzWIct6qMxZiDzACWm3kHuDnJcLjjYL/x/vYub8XsZ"
+    "8gEXDxb4TqHbpE/fQy7WJ5UUr14+WenXw7DMS4798usRR7e8XPdHWPywnHhZ3Q5FpMyxDN"
+    "kh3ry7wSZVDoRl8e8Q3Y0cNskImyTCPw0e7lcG5aS5cFgn4H/AwmVaZTKjvQJcBkbEM0sc"
+    "qsbPT2MuF6vgctcXNL/9H9XytZ4="
+)
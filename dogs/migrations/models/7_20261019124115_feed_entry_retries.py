@@ -0,0 +1,85 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+POSTGRES_UPGRADE = """
+        ALTER TABLE "feed_entries" ADD "attempts" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "feed_entries" ADD "retry_at" TIMESTAMPTZ;"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "postgres":
+        return POSTGRES_UPGRADE
+    return """
+        ALTER TABLE "feed_entries" ADD "attempts" INT NOT NULL DEFAULT 0 /* Failed summary attempts */;
+        ALTER TABLE "feed_entries" ADD "retry_at" TIMESTAMP /* Earliest next summary attempt after a failure */;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "feed_entries" DROP COLUMN "retry_at";
+        ALTER TABLE "feed_entries" DROP COLUMN "attempts";"""
+
+
+MODELS_STATE = (
+    "eJztXWtz2zYW/SsYfak8Izt628ns7qztyI1bPzq2su006bAQCUoYU6RKgnG03fz3xYsi+J"
+    "BM0hJFRfqS0CAueHkAXFyce0H9XZs6BrK8kyuEjNo78HfNhlNELyLlDVCDs1lYygoIHFm8"
+    "oklr8BI48ogLdUILTWh5iBYZyNNdPCPYsVnVh8fHN+fEmQIm0wAzx7KQARxbR8B0XAAtCz"
+    "gmwMQDnj9ikiPkeiesbcPRaePYHhdv5rP92T6/vrx/Pzi+ux8O3oHPfrPbOmP/dgz2b7fN"
+    "r3v8usmvRYm4HnGBDuL/mkolXtJtiapAkegq16byhDOlbfHkEb9+C+pKU/oJoKCf6I6LTj"
+    "jGJ/xF3aN39E3CakIfqOjD/+2+VR7eCx8upLpmA4Ryso2OqrS43eb/dbuK2uK6B8K3kgCY"
+    "yluNwpIuSj5cCJ/G4RFPkO91JjU8A4lXa4Ut9uQ1CMGkunea3Tf8shW+fucUKG8hnq0rt4"
+    "3Etaj5lo8/38Z/+UgjzhiRCXLpKPz0By3GtoG+Ii/4c/akmRhZ0YmE+fzh5RqZz3jZtU2u"
+    "eEU2tEea7lj+1A4rz+Zk4tiL2tgmrHSMbORCwucpcX02v2zfsuQ8DKac0DSsIlRUZAxkQt"
+    "9is5RJCwXCspqm0dmhPQ6GmlZLzOBAQpmNskh3bDb7qaoef/sxU+G43eqeds86/S7tzRpX"
+    "c1Fy+k08OgRGCHJ47oa1b/w+JFDU4BiHoPqulUT1cgLddFhl9RiuVOE4rgGKZQNbY3YWfH"
+    "y4iRu7JfBO4VfNQvaYTOifrWa7uwLN/5w/XH44f6izakesfYdaaWG77+S9trzJQA9BJpjQ"
+    "ajlgXgisB+igIEQ6XFcWsNaKAL1QNC/U7V4vA9K01lKg+b0ozojAcR6Yg/qFUJaDNRfIBc"
+    "bzYAjHbBWm1hJY0COg3WwCF3kzim51kGeaadSnwbTNFDO9vAsSglXuixuq7PGtVHatndLP"
+    "Ynf6y61OP2FzmI+j0Ych9wtMMfFLF86E3Mtr6LpMUIEeufRdF9mEu64g0JpeAA9RvIU7Xd"
+    "YiG2Jvo69E40BCkoT+PYWN4ClKxz8uG4PfkMInwcV6OmMdK++vE2QD4oi+YK+RDfwVyA6v"
+    "bwePw/PbX1hLU8/7y+L4nQ8H7E6bl85jpfV+bJIsGgG/Xg8/APYn+P3+bsDBdTwydvkTw3"
+    "rD32tMJ+gTR7OdZw0aKq5BcVCUNIP6BNpjZBTo+xTxNXR/ScaRd7+NngGdjy5GnjCMdOeF"
+    "oCtM+36NBRNiy2ftZbe9qkh5ZreZ1+ayRU73Cf6CANOYLoVsym/J1irMRA6kY1LVBfvOn1"
+    "Ilma8hVeZ3toS17iIGRwHLFpUsZ01bn1Vjbh5jjsAz9AA1AVnNWY2+tXFvW3NphXfEvMkF"
+    "I2HdGDNjPik0AisYQf3pGbqGFrmj7MnEapAcMBdS8OrnB2RBjndyaCjk6YA2NK/QyHhAJq"
+    "K+p46Yz2OinEtcWBqOjYRRC+d6cegelaa+Y/TYUHTazrLBmbw1bU/jJdCGY/6G7NnsSYnR"
+    "t4TXXwzN1eS+psyFlzl+zq8wiXmDAkT0Cf0T2gZdB6ZT6OL/Bky9i8b0DS3kecGO1I6vGe"
+    "ns/yYekELvfqoF3Tv2sVH7I0b3itua4Gs9AonviToHDrgsDpj3SwLW5ZxNUL88crIIb8YG"
+    "NmCqvsEGqDsusLD9dFSEnOm12hnYGVprKT3D70V9qVTifUh3zSUQ7xuFnMH8+t3e4LdhxB"
+    "MKsKzfnv92FPGGbu7vfgyqK9hf3txf7AMNL0AvzMNvZGxLM54D6VCiRKhnyDYYUjkRl2IN"
+    "ZaFsAOS6jkuLnvBsRhfOOvqKPaouGCHTcVFk81bIBrWbWUj75nLOvpnoJK79PI8RUkQqTd"
+    "Pf3AJF1QoaIucJ2Z7me2mxkqXuTExqFzgLoTJgKoO6TnegWcf+mokLSAiazkgehkgVqS7U"
+    "V4J/k6MdqEqXj7KL6FJUgBxS5XaH7x5A16KbOcJDHfEeANAkdApAICnd/aO/Z/7Iwt6kEF"
+    "sYl92dQfEL01znlAxgmgHTdaYL/nD/RsE+M8acWuGUsYE93fmCMofBvjPeOBIVC8merEGx"
+    "UKLSqQgFGc11LMIJYj6KdxLsK7onwWP7ZzTnmF9TjSDVfDUBv/tYL2OPabELnxd0ozrkKB"
+    "QUAETE/vX88fL8/aD2bXngY5M89AOioHrkwbEsf1ZL4aKjFRqr+GhXVNVcXtfTJo7vWvNs"
+    "zPQHXhdQNa05wboHRCPvAGsEfAUUX0KNHx9D9E+xt6cXXI0kD/265tKz0ZV8aplo3U3kpP"
+    "cTOeRLk7zVjGcjkSfeS8+B7kaS3nmJrrSAlMxv2ZBM0W6FKdcpmfE9cB4gdeGbdB40RBq7"
+    "mvQtH43UtldnjKNQS6m9uRoMNeFdV5ozFLSRzMb/UxgVcDzlmfiMiB5BD53IwQfY9DCxZf"
+    "25PIYw8vUnxM29OhyUmEEwTRIBhkMsocxYQthPeZy9UGqHHL1HAl0ShMS4rQpfY8+8/NiU"
+    "zMr6xuUqHd24FMqCQNncTHsWBre3nMHtJRncnaDZC7l33DkBobrbB1ssLjmwXghUOHjEmH"
+    "KuJ6j/8APAJvDtJzrJi4UoWs0soNNaK87OJGCXfmoe5lYVqS5zG5Lkqr7lk7YrYxEXeLz7"
+    "4YhHfxqLReRC+m273emctpud/lmve3raO2suIE/eWoX9xfWPDP7I2E/2h0XRsvU5Bdq3U/"
+    "yopd2RkKtuh0jz7oFnTCaAGxwg1d/OHAiw8/ypNk3Lt1sxDZKy1QVezgShMkvRxzaY5rM7"
+    "W5oNFtJaedaAhFx1O+VGqAr+8U/Q2tIaoKDVLohye3dQbm8f5V5BlHu7g3Jv+yi3mkVNRn"
+    "N3cJa6bhXoTlGgOzsEdKcCQPeLAt3fIaD72wZ6TAoCHQpWH+h/lYtzjrNDmwyhRU7DpETQ"
+    "4qdlXjjQkTin83Lw7KNHd/2qHAthQnm8jO2HIDDwmLNf7ESGb6FkxKxgG6mBFbof5nxUEE"
+    "WlowPS0XqIomwzihJ0Wy5uV5EpkXI0IBZx4zxG6H10dIK6CD83AG+tGPvYz0I+xqMkCvfY"
+    "T/2mCU/iyZewkpCr8mJAe2Fxgg1gA1A7h3mmEuMGAjOyneWYfwlDKFD0OxoR6V37kgY7aM"
+    "dSS6Upxx4w/D1MJJULUg5LGEqUaQflZc6uvnAIqAuFj2iXQxLMQI8PgFzzL2IPO1nO9XSW"
+    "H+vpJE717GEu52PEx5K6HfI3D/mbm1v1mD+eD2BFYncADrYdW0+QXex/Xpcg+1E2s9tYZ0"
+    "2QVYZceoJs3GSsAeFDCnIE4W3xJ/yYk4zg1lIZlEiNxioORR6a0tQMiJcZlFuesOKiGV3V"
+    "6DaLok03KsH5K9kUqC+SZI+S/EmhFl7+cvGnmKMTfM2iAT6pM0aptB8fuqh95K0vkBWfDy"
+    "lzeV3OtOxd6iKozx2f+CPaKHTp6LboBaHbzAYwsYWKfR9j/ZmNju/qSMv5jYyoVJVPqD9y"
+    "TfmnMvinSVgT/JP7rCcy9kHZh9Z3I9u0NnMdHXlege86PCCP1gN1z9dZC4tvOoQtVmR2HD"
+    "4fUPKejA8EbUoHAfWK8likhGCVjdKAKcstEKhjMzhnhT0xDypqlUpOyy7xCyYiLztHuurm"
+    "k7G5ShrBaTvmFxBfSFUZ9gfqGbHNANMV1E3oUa+IbUsNum9qAMspuAJsIjQlEg7SklVfzF"
+    "J4RZZqWZbINo6Jc4xsQ1l8xfcU8mesri9Tfs8CEXTH+oX9xMdksXM7xCG2RjaJnfMhBHFg"
+    "yDdj6A4MeckM+Xb4W94JKaxt0DnLuVr2Qq8haIcUgrELpxzrjJRsUubw83EC4mv2Uzc2+6"
+    "kbg6Fl4qrwqUR2WaqBXnmcMCq4Hju9STb7+j1zRoMhmgv9kg9RsdnDr3O4rqpMlbdsH6We"
+    "oP7vQOVi31fdxK+imfTBWl7kI0JVhv6KkdaBopXAe7d2BuuwRQ9ojBnIPEGJqbeXu4Mchw"
+    "v29jc2Xu/iZvwuQz7g4skC3yl0m/Tpz5GL9UktxauXd1b69TCs85Jjv/x4xMEtr9b5EZY/"
+    "LCdeVrdDEalyLkN2iDfvbrBJlQNhWf07RHcjwSaZYZNE+KfH+7uVSTlpLhzWCfgfsHCVVp"
+    "nMaK8Al4ER8cwSQdV4/DTmcrEGLrZ9QPPb/wHLEM/Y"
+)